@@ -1,16 +1,158 @@
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker
+import os
+import threading
+
+from sqlalchemy import create_engine, event, make_url, MetaData
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.declarative import declarative_base
+
+import metrics
 from config import Config
 
-engine = create_engine(Config.DATABASE_URI, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_statements = threading.local()
+
+
+def create_db_engine(database_uri: str = Config.DATABASE_URI):
+    """
+        Creates an engine with the connection pool configured in Config, or an embedded SQLite engine for a `sqlite://`
+        URI.
+
+        Args:
+            database_uri (str, optional): The database to connect to. Defaults to `Config.DATABASE_URI`.
+
+        Returns:
+            Engine: The new engine.
+        """
+    url = make_url(database_uri)
+    if url.get_backend_name() == 'sqlite':
+        new_engine = _create_sqlite_engine(url)
+    else:
+        new_engine = create_engine(url, echo=False,
+                                   pool_size=Config.DB_POOL_SIZE,
+                                   max_overflow=Config.DB_MAX_OVERFLOW,
+                                   pool_pre_ping=Config.DB_POOL_PRE_PING,
+                                   pool_recycle=Config.DB_POOL_RECYCLE)
+    event.listen(new_engine, 'before_cursor_execute', _count_statement)
+    return new_engine
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if metrics.is_enabled():
+        metrics.inc('sql_statements_total')
+        _statements.count = statement_count() + 1
+
+
+def statement_count() -> int:
+    """Returns the number of SQL statements the current thread executed while metrics were enabled."""
+    return getattr(_statements, 'count', 0)
+
+
+def _create_sqlite_engine(url):
+    """
+        Creates a SQLite engine tuned for write throughput. An in-memory database lives in a single connection shared by
+        all the threads, as every new connection would open another, empty, database. Nothing serializes that
+        connection: the sessions of all threads share its transaction, so a commit or rollback in one thread also ends
+        the work of the others. `sqlite://` is meant for tests and single-threaded tools, use a file otherwise.
+        """
+    if url.database in (None, '', ':memory:'):
+        sqlite_engine = create_engine(url, echo=False, poolclass=StaticPool,
+                                      connect_args={'check_same_thread': False})
+    else:
+        sqlite_engine = create_engine(url, echo=False,
+                                      pool_pre_ping=Config.DB_POOL_PRE_PING)
+    event.listen(sqlite_engine, 'connect', _set_sqlite_pragmas)
+    return sqlite_engine
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+        WAL lets readers run alongside the writer, and with synchronous=NORMAL a commit doesn't wait for the disk. SQLite
+        doesn't enforce foreign keys unless asked to, and waits `busy_timeout` ms for a lock held by another writer.
+        """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute(f'PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS}')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.execute(f'PRAGMA busy_timeout={Config.SQLITE_BUSY_TIMEOUT_MS}')
+    cursor.close()
+
+
+# The engine is created by the first session, or the first `get_engine()`, so importing the models costs no engine
+_engine = None
+_engine_lock = threading.Lock()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
-db_session = SessionLocal()
+
+def get_engine():
+    """
+        Returns the engine of the application, creating it for `Config.DATABASE_URI` on first use. Also available as
+        `battle_stat.engine`.
+
+        Returns:
+            Engine: The engine.
+        """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                new_engine = create_db_engine()
+                SessionLocal.configure(bind=new_engine)
+                _engine = new_engine
+    return _engine
+
+
+def _create_session():
+    get_engine()
+    return SessionLocal()
+
+
+def __getattr__(name):
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+# One session per thread, each checking out its own pooled connection. Threads that stop using the database, and
+# workers done with a task, release their session with `db_session.remove()`.
+db_session = scoped_session(_create_session)
 Base = declarative_base()
 
 
+def init_engine(database_uri: str):
+    """
+        Switches the application to another database. Only the calling thread's session is released, the other threads
+        must call `db_session.remove()` before their next query, or they keep a session bound to the previous engine.
+        The pooled connections of the previous engine are closed.
+
+        Args:
+            database_uri (str): The database to connect to.
+        """
+    global _engine
+    db_session.remove()
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = create_db_engine(database_uri)
+        SessionLocal.configure(bind=_engine)
+
+
+def _after_fork_in_child():
+    """
+        A forked process shares the sockets of the parent's pooled connections. Drop them without closing them, so the
+        child opens its own connections and the parent's stay usable, and forget the sessions inherited from the parent.
+        The engine lock may have been held by another thread of the parent, the child gets a new one.
+        """
+    global _engine_lock
+    _engine_lock = threading.Lock()
+    if _engine is not None:
+        _engine.dispose(close=False)
+    db_session.registry.clear()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
 class DBCache:
-    DIM_MOVE_CACHE = set()
-    DIM_POKEMON_CACHE = set()
-    DIM_STATS_CACHE = set()
+    DIM_MOVE_CACHE = {}  # {move name: dim_move.id}
+    DIM_POKEMON_CACHE = {}  # {poke_id: dim_pokemon.id}
+    DIM_STATS_CACHE = {}  # {(stat name, move name): dim_stat.id}
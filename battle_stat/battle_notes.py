@@ -1,116 +1,344 @@
+import copy
+from collections import namedtuple
+
+import metrics
 from battle_stat import DBCache
-from battle_stat.database import save_list_data
+from battle_stat.database import save_list_data, upsert_dimensions, \
+    bulk_save_battle_facts, upsert_matchups
 from battle_stat.model.dim_move import MoveDimension
 from battle_stat.model.dim_pokemon import PokemonDimension
 from battle_stat.model.dim_stats import StatDimension
 from battle_stat.model.fact_attack import AttackFact
 from battle_stat.model.fact_battle import BattleFact
-from battle_stat.repository.dim_move_repository import get_all_dim_moves, \
-    get_dim_move_by_name
-from battle_stat.repository.dim_pokemon_repository import get_all_dim_pokemons, \
-    get_dim_pokemon_by_poke_id
-from battle_stat.repository.dim_stats_repository import get_all_dim_stats, \
-    get_dim_stat_by_type_name
+from battle_stat.repository.dim_move_repository import get_all_dim_moves
+from battle_stat.repository.dim_pokemon_repository import get_all_dim_pokemons
+from battle_stat.repository.dim_stats_repository import get_all_dim_stats
 from model.pokemon import Pokemon
 
+PokemonNote = namedtuple('PokemonNote',
+                         ['poke_id', 'name', 'speed', 'hp', 'current_attack'])
+BattleNote = namedtuple('BattleNote',
+                        ['attacker', 'defender', 'battle_duration', 'turns',
+                         'seed', 'catalog_version', 'end_reason'],
+                        defaults=(None, None, None, None, None))
+
 
 def init_db_cache():
     """
         Initializes the database cache by loading and caching dimensions for moves, Pokémon, and stats.
-        Populates global cache variables with data fetched from the database to optimize future data retrieval.
+        Populates global cache variables with the ids of the dimensions fetched from the database, so facts can reference
+        them without querying the database.
         """
-    DBCache.DIM_MOVE_CACHE = {x.name for x in get_all_dim_moves()}
-    DBCache.DIM_POKEMON_CACHE = {x.poke_id for x in get_all_dim_pokemons()}
-    DBCache.DIM_STATS_CACHE = {(x.name, x.move.name) for x in
+    DBCache.DIM_MOVE_CACHE = {x.name: x.id for x in get_all_dim_moves()}
+    DBCache.DIM_POKEMON_CACHE = {x.poke_id: x.id for x in get_all_dim_pokemons()}
+    DBCache.DIM_STATS_CACHE = {(x.name, x.move.name): x.id for x in
                                get_all_dim_stats()}
 
 
 def take_battle_notes(attacker: Pokemon, defender: Pokemon,
-                      battle_duration: float = None):
+                      battle_duration: float = None, turns: int = None,
+                      seed: int = None, catalog_version: str = None,
+                      end_reason: str = None):
     """
         Records notes about a Pokémon battle, including details about the attacker, defender, and the battle outcome.
-        Prepares and saves battle and attack facts to the database for later analysis.
+        Prepares and saves battle and attack facts to the database for later analysis. The notes of a finished battle
+        are also added to the `agg_matchup` totals of its pair.
 
         Args:
             attacker (Pokemon): The attacking Pokémon in the battle.
             defender (Pokemon): The defending Pokémon in the battle.
             battle_duration (float, optional): The duration of the battle in seconds. Defaults to None.
+            turns (int, optional): The number of turns of the finished battle. Defaults to None.
+            seed (int, optional): The seed of the finished battle. Defaults to None.
+            catalog_version (str, optional): The version of the catalog data of the finished battle, see
+                `model.pokemon.catalog_version`. Defaults to None.
+            end_reason (str, optional): How the finished battle ended, see `main.battle`. Defaults to None.
 
         This function creates and saves dimensional and factual data related to the battle and the Pokémon involved.
         """
+    with metrics.timed('db_flush_seconds', path='sync'):
+        save_list = __prepare_battle_notes(attacker, defender, battle_duration,
+                                           turns, seed, catalog_version,
+                                           end_reason)
+        if battle_duration:
+            fact_battle = save_list[-1]
+            upsert_matchups(__matchup_rows(fact_battle.pokemon_id_1,
+                                           fact_battle.pokemon_id_2,
+                                           __winner_side(attacker, defender),
+                                           battle_duration, turns))
+        save_list_data(save_list)
+
+
+def write_battle_notes(notes):
+    """
+        Records the notes of many turns and battles in one transaction. Used by the background `NotesWriter`.
+        The dimensions missing from the cache are upserted for the whole batch at once, then the facts are written as
+        plain rows by the bulk loader instead of ORM objects.
+
+        Args:
+            notes (list): `BattleNote` tuples, the Pokémon as `PokemonNote` snapshots.
+        """
+    pokemons = [x for note in notes for x in note[:2]]
+    __count_dimension_lookups(pokemons)
+    resolve_dimensions(pokemons)
+    facts = []
+    matchups = []
+    for attacker, defender, battle_duration, turns, seed, version, end_reason in notes:
+        battle = __battle_row(attacker, defender, battle_duration, turns, seed,
+                              version, end_reason)
+        facts.append((__attack_row(attacker), __attack_row(defender), battle))
+        if battle_duration:
+            matchups += __matchup_rows(battle['pokemon_id_1'], battle['pokemon_id_2'],
+                                       __winner_side(attacker, defender),
+                                       battle_duration, turns)
+    upsert_matchups(matchups)
+    bulk_save_battle_facts(facts)
+
+
+def resolve_dimensions(pokemons: list):
+    """
+        Makes sure the move, Pokémon and stat dimensions of the Pokémon's current attacks exist in the database and their ids
+        are cached. Missing dimensions are written with one `INSERT ... ON CONFLICT DO NOTHING RETURNING` per dimension table,
+        which is safe when several writers insert the same dimension concurrently. A Pokémon without a current attack, e.g.
+        none of its moves resolved, only needs its own dimension.
+
+        Args:
+            pokemons (list): The Pokémon, or `PokemonNote` snapshots, whose dimensions are needed.
+        """
+    attacks = [x.current_attack for x in pokemons if x.current_attack is not None]
+    moves = {x.move.name: x.move for x in attacks
+             if x.move.name not in DBCache.DIM_MOVE_CACHE}
+    if moves:
+        ids = upsert_dimensions(MoveDimension,
+                                [{'name': x.name, 'power': x.power}
+                                 for x in moves.values()],
+                                ['name'])
+        DBCache.DIM_MOVE_CACHE.update({name: x for (name,), x in ids.items()})
+
+    new_pokemons = {x.poke_id: x for x in pokemons
+                    if x.poke_id not in DBCache.DIM_POKEMON_CACHE}
+    if new_pokemons:
+        ids = upsert_dimensions(PokemonDimension,
+                                [{'poke_id': x.poke_id, 'name': x.name,
+                                  'speed': x.speed}
+                                 for x in new_pokemons.values()],
+                                ['poke_id'])
+        DBCache.DIM_POKEMON_CACHE.update({poke_id: x for (poke_id,), x in
+                                          ids.items()})
+
+    stats = {(x.stat_type, x.move.name): x.move for x in attacks
+             if (x.stat_type, x.move.name) not in DBCache.DIM_STATS_CACHE}
+    if stats:
+        move_names = {DBCache.DIM_MOVE_CACHE[x.name]: x.name
+                      for x in stats.values()}
+        ids = upsert_dimensions(StatDimension,
+                                [{'name': stat_type, 'change': str(x.change),
+                                  'move_id': DBCache.DIM_MOVE_CACHE[x.name]}
+                                 for (stat_type, _), x in stats.items()],
+                                ['name', 'move_id'])
+        DBCache.DIM_STATS_CACHE.update({(stat_type, move_names[move_id]): x
+                                        for (stat_type, move_id), x in
+                                        ids.items()})
+
+
+def snapshot_pokemon(pokemon: Pokemon) -> PokemonNote:
+    """
+        Copies the state of a Pokémon needed for its battle notes, so the notes can be written after the battle moved on.
+
+        Args:
+            pokemon (Pokemon): The Pokémon to copy.
+
+        Returns:
+            PokemonNote: The copy of the Pokémon and its current attack.
+        """
+    return PokemonNote(poke_id=pokemon.poke_id, name=pokemon.name,
+                       speed=pokemon.speed, hp=pokemon.hp,
+                       current_attack=copy.copy(pokemon.current_attack))
+
+
+def __prepare_battle_notes(attacker: Pokemon, defender: Pokemon,
+                           battle_duration: float = None, turns: int = None,
+                           seed: int = None, catalog_version: str = None,
+                           end_reason: str = None) -> list:
+    """
+        Prepares the dimensional and factual data of a battle note.
+
+        Args:
+            attacker (Pokemon): The attacking Pokémon in the battle.
+            defender (Pokemon): The defending Pokémon in the battle.
+            battle_duration (float, optional): The duration of the battle in seconds. Defaults to None.
+            turns (int, optional): The number of turns of the finished battle. Defaults to None.
+            seed (int, optional): The seed of the finished battle. Defaults to None.
+            catalog_version (str, optional): The version of the catalog data of the finished battle. Defaults to None.
+            end_reason (str, optional): How the finished battle ended. Defaults to None.
+
+        Returns:
+            list: The new records to save.
+        """
     save_list = []
     attacker_tuple = __write_notes(attacker, save_list)
     defender_tuple = __write_notes(defender, save_list)
 
     winner = None
     if battle_duration:
-        if attacker.hp > 0:
-            winner = attacker_tuple[0]
-        else:
-            winner = defender_tuple[0]
+        winner = {1: attacker_tuple[0], 2: defender_tuple[0]}.get(
+            __winner_side(attacker, defender))
 
-    fact_battle = BattleFact(pokemon_1=attacker_tuple[0],
-                             pokemon_2=defender_tuple[0],
+    fact_battle = BattleFact(pokemon_id_1=attacker_tuple[0],
+                             pokemon_id_2=defender_tuple[0],
                              attack_1=attacker_tuple[1],
                              attack_2=defender_tuple[1],
-                             battle_duration_s=battle_duration,
-                             winner=winner
+                             battle_duration_s=_whole_seconds(battle_duration),
+                             turns=turns,
+                             seed=seed,
+                             catalog_version=catalog_version,
+                             end_reason=end_reason,
+                             winner_pokemon_id=winner
                              )
     save_list.append(fact_battle)
-    save_list_data(save_list)
+    return save_list
 
 
 def __write_notes(pokemon: Pokemon, save_list: list):
     """
         Records notes for a single Pokémon's performance in a battle, including its moves and stats.
-        Updates the cache with new dimensional data and appends factual data to the save list for database storage.
+        Resolves the ids of its dimensions from the cache, upserting the missing ones, and appends factual data to the
+        save list for database storage.
 
         Args:
             pokemon (Pokemon): The Pokémon for which to write notes.
             save_list (list): A list to which new data records are appended for batch saving.
 
         Returns:
-            tuple: A tuple containing the Pokémon's dimensional data and its latest attack fact.
+            tuple: A tuple containing the id of the Pokémon's dimension and its latest attack fact, None if it has no
+                current attack.
 
         This function is intended to be used internally by `take_battle_notes` to process each Pokémon involved in a battle.
         """
-    move = pokemon.current_attack.move
+    __count_dimension_lookups([pokemon])
     attack = pokemon.current_attack
+    if (pokemon.poke_id not in DBCache.DIM_POKEMON_CACHE
+            or (attack is not None
+                and (attack.move.name not in DBCache.DIM_MOVE_CACHE
+                     or (attack.stat_type, attack.move.name) not in DBCache.DIM_STATS_CACHE))):
+        resolve_dimensions([pokemon])
 
-    if move.name not in DBCache.DIM_MOVE_CACHE:
-        DBCache.DIM_MOVE_CACHE.add(move.name)
-        dim_move = MoveDimension(name=move.name,
-                                 power=move.power)
-        save_list.append(dim_move)
-    else:
-        dim_move = get_dim_move_by_name(move.name)
-
-    if pokemon.poke_id not in DBCache.DIM_POKEMON_CACHE:
-        DBCache.DIM_POKEMON_CACHE.add(pokemon.poke_id)
-        dim_pokemon = PokemonDimension(poke_id=pokemon.poke_id,
-                                       name=pokemon.name,
-                                       speed=pokemon.speed)
-        save_list.append(dim_pokemon)
-    else:
-        dim_pokemon = get_dim_pokemon_by_poke_id(pokemon.poke_id)
-
-    if (attack.stat_type, move.name) not in DBCache.DIM_STATS_CACHE:
-        DBCache.DIM_STATS_CACHE.add((attack.stat_type, move.name))
-        dim_stat = StatDimension(name=attack.stat_type,
-                                 change=move.change,
-                                 move=dim_move)
-        save_list.append(dim_stat)
-    else:
-        dim_stat = get_dim_stat_by_type_name(attack.stat_type, move.name)
-
-    fact_attack = AttackFact(stat_changed=attack.stat_changed,
-                             effort_ev=attack.effort_ev,
-                             stat=dim_stat,
-                             move=dim_move,
-                             iv=attack.iv,
-                             level=attack.level,
-                             nature_modifier=attack.nature_modifier,
-                             pokemon=dim_pokemon,
-                             hp=pokemon.hp)
+    if attack is None:
+        return DBCache.DIM_POKEMON_CACHE[pokemon.poke_id], None
+    fact_attack = AttackFact(**__attack_row(pokemon))
     save_list.append(fact_attack)
-    return dim_pokemon, fact_attack
+    return fact_attack.pokemon_id, fact_attack
+
+
+def __count_dimension_lookups(pokemons: list):
+    """Counts the hits and misses of the DBCache lookups of the Pokémon's dimensions, when metrics are enabled."""
+    if not metrics.is_enabled():
+        return
+    attacks = [x.current_attack for x in pokemons if x.current_attack is not None]
+    for cache, lookups in (
+            ('dim_move', [x.move.name in DBCache.DIM_MOVE_CACHE for x in attacks]),
+            ('dim_pokemon', [x.poke_id in DBCache.DIM_POKEMON_CACHE
+                             for x in pokemons]),
+            ('dim_stat', [(x.stat_type, x.move.name) in DBCache.DIM_STATS_CACHE
+                          for x in attacks])):
+        metrics.inc('cache_hits_total', sum(lookups), cache=cache)
+        metrics.inc('cache_misses_total', len(lookups) - sum(lookups), cache=cache)
+
+
+def __attack_row(pokemon: Pokemon) -> dict:
+    """
+        Builds the `fact_attack` row of a Pokémon's current attack, its dimensions must be cached already. The HP left is
+        rounded for the INT `hp` column, which COPY doesn't cast.
+
+        Args:
+            pokemon (Pokemon): The Pokémon, or its `PokemonNote` snapshot.
+
+        Returns:
+            dict: The column values of the attack fact, None if the Pokémon has no current attack.
+        """
+    attack = pokemon.current_attack
+    if attack is None:
+        return None
+    move = attack.move
+    return {'stat_changed': attack.stat_changed,
+            'effort_ev': attack.effort_ev,
+            'stat_id': DBCache.DIM_STATS_CACHE[(attack.stat_type, move.name)],
+            'move_id': DBCache.DIM_MOVE_CACHE[move.name],
+            'iv': attack.iv,
+            'level': attack.level,
+            'nature_modifier': attack.nature_modifier,
+            'pokemon_id': DBCache.DIM_POKEMON_CACHE[pokemon.poke_id],
+            'hp': round(pokemon.hp)}
+
+
+def __battle_row(attacker: Pokemon, defender: Pokemon,
+                 battle_duration: float = None, turns: int = None,
+                 seed: int = None, catalog_version: str = None,
+                 end_reason: str = None) -> dict:
+    """
+        Builds the `fact_battle` row of a turn, or of a finished battle when the battle duration is given, without the
+        ids of its attack facts.
+
+        Args:
+            attacker (Pokemon): The attacking Pokémon, or its `PokemonNote` snapshot.
+            defender (Pokemon): The defending Pokémon, or its `PokemonNote` snapshot.
+            battle_duration (float, optional): The duration of the battle in seconds. Defaults to None.
+            turns (int, optional): The number of turns of the finished battle. Defaults to None.
+            seed (int, optional): The seed of the finished battle. Defaults to None.
+            catalog_version (str, optional): The version of the catalog data of the finished battle. Defaults to None.
+            end_reason (str, optional): How the finished battle ended. Defaults to None.
+
+        Returns:
+            dict: The column values of the battle fact.
+        """
+    attacker_id = DBCache.DIM_POKEMON_CACHE[attacker.poke_id]
+    defender_id = DBCache.DIM_POKEMON_CACHE[defender.poke_id]
+    winner = None
+    if battle_duration:
+        winner = {1: attacker_id, 2: defender_id}.get(
+            __winner_side(attacker, defender))
+    return {'pokemon_id_1': attacker_id,
+            'pokemon_id_2': defender_id,
+            'battle_duration_s': _whole_seconds(battle_duration),
+            'turns': turns,
+            'seed': seed,
+            'catalog_version': catalog_version,
+            'end_reason': end_reason,
+            'winner_pokemon_id': winner}
+
+
+def _whole_seconds(battle_duration: float):
+    """`fact_battle.battle_duration_s` is an INT column: COPY rejects the fractional seconds an INSERT would cast."""
+    return None if battle_duration is None else round(battle_duration)
+
+
+def __winner_side(attacker: Pokemon, defender: Pokemon):
+    """Returns 1 when the attacker won the battle, 2 when the defender won and None for a draw, both still standing."""
+    if attacker.hp <= 0:
+        return 2
+    if defender.hp <= 0:
+        return 1
+    return None
+
+
+def __matchup_rows(pokemon_id_1: int, pokemon_id_2: int, winner_side,
+                   battle_duration: float, turns: int = None) -> list:
+    """
+        Builds the `agg_matchup` increments of a finished battle, one per order of its pair. A mirror matchup, the same
+        Pokémon on both sides, has a single order and gets a single increment, from the attacker's side.
+
+        Args:
+            pokemon_id_1 (int): The dimension id of the attacking Pokémon.
+            pokemon_id_2 (int): The dimension id of the defending Pokémon.
+            winner_side (int): 1 or 2 for the winning Pokémon, None for a draw.
+            battle_duration (float): The duration of the battle in seconds.
+            turns (int, optional): The number of turns of the battle. Defaults to None.
+
+        Returns:
+            list: The increments of the matchup totals.
+        """
+    sides = ((1, pokemon_id_1, pokemon_id_2), (2, pokemon_id_2, pokemon_id_1))
+    return [{'pokemon_id_1': pokemon_id, 'pokemon_id_2': opponent_id,
+             'battles': 1, 'wins': int(winner_side == side),
+             'total_duration_s': battle_duration, 'total_turns': turns or 0}
+            for side, pokemon_id, opponent_id in sides[:1 if pokemon_id_1 == pokemon_id_2 else 2]]
@@ -1,4 +1,45 @@
-from battle_stat import db_session
+import csv
+import io
+
+from sqlalchemy import select, or_, and_, insert, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from battle_stat import Base, db_session
+# All the models are imported so their tables are known to `init_schema`
+from battle_stat.model.agg_matchup import MatchupAggregate
+from battle_stat.model.dim_move import MoveDimension
+from battle_stat.model.dim_pokemon import PokemonDimension
+from battle_stat.model.dim_stats import StatDimension
+from battle_stat.model.fact_attack import AttackFact
+from battle_stat.model.fact_battle import BattleFact
+
+ATTACK_COLUMNS = [x.name for x in AttackFact.__table__.columns if x.name != 'id']
+AGG_COLUMNS = ['battles', 'wins', 'total_duration_s', 'total_turns']
+ATTACK_ID_COLUMNS = ['attack_pokemon_id_1', 'attack_pokemon_id_2']
+BATTLE_COLUMNS = [x.name for x in BattleFact.__table__.columns
+                  if x.name not in ['id', 'timestamp_'] + ATTACK_ID_COLUMNS]
+
+
+def init_schema():
+    """Create the tables of the models that don't exist yet, the same schema `init.sql` creates on PostgreSQL.
+    The tables of an older database get the columns and indexes added to their models since they were created."""
+    bind = db_session.get_bind()
+    Base.metadata.create_all(bind)
+    _add_missing_columns(bind)
+
+
+def _add_missing_columns(bind):
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {x['name'] for x in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    connection.execute(text(
+                        f'ALTER TABLE {table.name} ADD COLUMN {column.name} '
+                        f'{column.type.compile(bind.dialect)}'))
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
 
 
 def save_data(data):
@@ -27,6 +68,158 @@ def save_list_data(data):
         raise
 
 
+def upsert_dimensions(model, rows, key_columns):
+    """Insert dimension rows that don't exist yet with one `INSERT ... ON CONFLICT DO NOTHING RETURNING` statement
+    and look up the ids of the rows that already existed, without committing.
+    NULL never conflicts in a unique constraint, so rows with a NULL key are looked up before they are inserted.
+
+    :param model:The dimension model, e.g. MoveDimension.
+    :param rows:The rows to insert, as dicts of column values.
+    :param key_columns:Names of the columns of the unique constraint identifying a row.
+    :return:The ids of all the rows, by the tuple of their key column values."""
+    keys = [getattr(model, x) for x in key_columns]
+    row_keys = {tuple(row[x] for x in key_columns): row for row in rows}
+    try:
+        ids = _select_dimension_ids(model, keys, [x for x in row_keys
+                                                  if None in x])
+        new_rows = [row for key, row in row_keys.items() if key not in ids]
+        if new_rows:
+            statement = _dialect_insert(model).values(new_rows) \
+                .on_conflict_do_nothing(index_elements=key_columns) \
+                .returning(model.id, *keys)
+            ids.update({tuple(x[1:]): x[0] for x in db_session.execute(statement)})
+
+        ids.update(_select_dimension_ids(model, keys, row_keys.keys() - ids.keys()))
+        return ids
+    except:
+        db_session.rollback()
+        raise
+
+
+def _select_dimension_ids(model, keys, key_values):
+    if not key_values:
+        return {}
+    statement = select(model.id, *keys).where(or_(*[
+        and_(*[x.is_(None) if value is None else x == value
+               for x, value in zip(keys, key)])
+        for key in key_values]))
+    return {tuple(x[1:]): x[0] for x in db_session.execute(statement)}
+
+
+def _dialect_insert(model):
+    if db_session.get_bind().dialect.name == 'sqlite':
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def upsert_matchups(rows):
+    """Add battles to the running totals of their matchups with one `INSERT ... ON CONFLICT DO UPDATE` statement,
+    without committing. A statement can update a row only once, so the battles of a pair are summed beforehand.
+
+    :param rows:The battles, as dicts of `agg_matchup` column values with `battles` and `wins` counts.
+    """
+    keys = ['pokemon_id_1', 'pokemon_id_2']
+    totals = {}
+    for row in rows:
+        total = totals.setdefault(tuple(row[x] for x in keys),
+                                  dict.fromkeys(AGG_COLUMNS, 0))
+        for column in AGG_COLUMNS:
+            total[column] += row[column]
+    if not totals:
+        return
+    try:
+        statement = _dialect_insert(MatchupAggregate).values(
+            [dict(zip(keys, key), **total) for key, total in totals.items()])
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={x: getattr(MatchupAggregate, x) + getattr(statement.excluded, x)
+                  for x in AGG_COLUMNS})
+        db_session.execute(statement)
+    except:
+        db_session.rollback()
+        raise
+
+
+def bulk_save_battle_facts(facts):
+    """Write battle facts with Core statements instead of ORM objects and commit them in the DB.
+    The attack facts are inserted first, their generated ids are then set on the battle facts referencing them.
+    On PostgreSQL with psycopg2 both tables are loaded with `COPY FROM STDIN`, the attack ids being allocated from
+    their sequence beforehand, other databases get one `executemany` insert per table.
+
+    :param facts:`(attack_1, attack_2, battle)` tuples of dicts of column values, `battle` without its attack ids. An
+    attack is None for a Pokémon that didn't attack, its battle fact then references no attack fact.
+    :return:The number of rows written."""
+    if not facts:
+        return 0
+    try:
+        if _supports_copy():
+            _copy_battle_facts(facts)
+        else:
+            _insert_battle_facts(facts)
+        db_session.commit()
+        return len(facts) + sum(x is not None for fact in facts for x in fact[:2])
+    except:
+        db_session.rollback()
+        raise
+
+
+def _insert_battle_facts(facts):
+    attacks = [attack for x in facts for attack in x[:2] if attack is not None]
+    ids = []
+    if attacks:
+        statement = insert(AttackFact).returning(AttackFact.id,
+                                                 sort_by_parameter_order=True)
+        ids = db_session.execute(statement, attacks).scalars().all()
+    attack_ids = _attack_ids(facts, ids)
+    db_session.execute(insert(BattleFact), [
+        dict(battle, **dict(zip(ATTACK_ID_COLUMNS, x)))
+        for (_, _, battle), x in zip(facts, attack_ids)])
+
+
+def _copy_battle_facts(facts):
+    ids = db_session.execute(
+        text("SELECT nextval(pg_get_serial_sequence('fact_attack', 'id')) "
+             "FROM generate_series(1, :count)"),
+        {'count': sum(x is not None for fact in facts for x in fact[:2])}).scalars().all()
+    attack_ids = _attack_ids(facts, ids)
+    attack_rows = ([attack_id] + [attack[x] for x in ATTACK_COLUMNS]
+                   for fact, fact_ids in zip(facts, attack_ids)
+                   for attack, attack_id in zip(fact[:2], fact_ids)
+                   if attack is not None)
+    battle_rows = ([battle[x] for x in BATTLE_COLUMNS] + fact_ids
+                   for (_, _, battle), fact_ids in zip(facts, attack_ids))
+
+    cursor = db_session.connection().connection.cursor()
+    try:
+        _copy_rows(cursor, AttackFact.__tablename__, ['id'] + ATTACK_COLUMNS,
+                   attack_rows)
+        _copy_rows(cursor, BattleFact.__tablename__,
+                   BATTLE_COLUMNS + ATTACK_ID_COLUMNS, battle_rows)
+    finally:
+        cursor.close()
+
+
+def _attack_ids(facts, ids):
+    """Hands out the ids of the inserted attack facts, in order, as `[attack_1 id, attack_2 id]` per battle fact, None
+    for a missing attack."""
+    ids = iter(ids)
+    return [[None if attack is None else next(ids) for attack in fact[:2]]
+            for fact in facts]
+
+
+def _copy_rows(cursor, table, columns, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN "
+                       f"WITH (FORMAT csv)", buffer)
+
+
+def _supports_copy():
+    bind = db_session.get_bind()
+    return bind.dialect.name == 'postgresql' and bind.dialect.driver == 'psycopg2'
+
+
 def delete_data(data):
     """Delete data from the DB.
 
@@ -0,0 +1,191 @@
+"""
+    Streaming export of the battle history to NumPy `.npy` column files.
+
+    Run with `python main.py export DIRECTORY` from the project root.
+"""
+import argparse
+import json
+import os
+
+try:
+    import numpy as np
+    from numpy.lib.format import open_memmap
+except ImportError:  # pragma: no cover
+    np = None
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from battle_stat import db_session
+from battle_stat.model.dim_move import MoveDimension
+from battle_stat.model.dim_pokemon import PokemonDimension
+from battle_stat.model.dim_stats import StatDimension
+from battle_stat.model.fact_attack import AttackFact
+from battle_stat.model.fact_battle import BattleFact
+
+MANIFEST = 'manifest.json'
+
+_attack_1 = aliased(AttackFact)
+_attack_2 = aliased(AttackFact)
+
+# (column file, selected column, dtype, dimension of the codes). Dimension columns hold codes into the names of their
+# dimension, -1 for none. Missing integers are -1, missing floats NaN and missing timestamps NaT.
+COLUMNS = [
+    ('battle_id', BattleFact.id, 'int64', None),
+    ('timestamp', BattleFact.timestamp_, 'datetime64[us]', None),
+    ('pokemon_1', BattleFact.pokemon_id_1, 'int32', 'pokemon'),
+    ('pokemon_2', BattleFact.pokemon_id_2, 'int32', 'pokemon'),
+    ('winner', BattleFact.winner_pokemon_id, 'int32', 'pokemon'),
+    ('battle_duration_s', BattleFact.battle_duration_s, 'float32', None),
+    ('turns', BattleFact.turns, 'int32', None),
+    ('seed', BattleFact.seed, 'int64', None),
+] + [
+    (f'{prefix}_{name}', getattr(attack, column), dtype, dimension)
+    for prefix, attack in (('attack_1', _attack_1), ('attack_2', _attack_2))
+    for name, column, dtype, dimension in (
+        ('move', 'move_id', 'int32', 'move'),
+        ('stat', 'stat_id', 'int32', 'stat'),
+        ('stat_changed', 'stat_changed', 'float64', None),
+        ('effort_ev', 'effort_ev', 'int16', None),
+        ('iv', 'iv', 'float32', None),
+        ('level', 'level', 'int16', None),
+        ('nature_modifier', 'nature_modifier', 'float32', None),
+        ('hp', 'hp', 'int32', None),
+    )
+]
+
+
+def export_battles(directory: str, chunk_size: int = 10000) -> dict:
+    """
+        Exports `fact_battle` joined with its attack facts and their dimensions, one `.npy` file per column.
+
+        The rows are streamed from a server-side cursor `chunk_size` at a time straight into memory-mapped column files,
+        so memory use doesn't grow with the history. The export is bounded by the last battle id when it starts: battles
+        written meanwhile are left for the next export. Dimensions are written as small codes, their names are in
+        `<dimension>_names.npy`.
+
+        Args:
+            directory (str): The directory of the column files, created when missing.
+            chunk_size (int, optional): Number of rows fetched and written at a time. Defaults to 10000.
+
+        Returns:
+            dict: The manifest of the export, also written to `manifest.json`.
+        """
+    if np is None:
+        raise ImportError('The export requires numpy')
+    os.makedirs(directory, exist_ok=True)
+
+    codes = __write_dimensions(directory)
+    max_id = db_session.execute(select(func.max(BattleFact.id))).scalar() or 0
+    count = db_session.execute(select(func.count(BattleFact.id))
+                               .where(BattleFact.id <= max_id)).scalar()
+
+    statement = select(*[x[1] for x in COLUMNS]) \
+        .outerjoin(_attack_1, BattleFact.attack_pokemon_id_1 == _attack_1.id) \
+        .outerjoin(_attack_2, BattleFact.attack_pokemon_id_2 == _attack_2.id) \
+        .where(BattleFact.id <= max_id) \
+        .order_by(BattleFact.id) \
+        .execution_options(yield_per=chunk_size)
+
+    files = [open_memmap(os.path.join(directory, f'{name}.npy'), mode='w+',
+                         dtype=dtype, shape=(count,))
+             for name, _, dtype, _ in COLUMNS]
+    rows = 0
+    try:
+        for chunk in db_session.execute(statement).partitions():
+            chunk = chunk[:count - rows]
+            for values, file, (_, _, dtype, dimension) in zip(zip(*chunk), files,
+                                                               COLUMNS):
+                file[rows:rows + len(chunk)] = __encode(values, dtype,
+                                                        codes.get(dimension))
+            rows += len(chunk)
+            if rows == count:
+                break
+    finally:
+        for file in files:
+            file.flush()
+        db_session.rollback()
+
+    manifest = {'rows': rows, 'max_battle_id': max_id,
+                'columns': {name: dtype for name, _, dtype, _ in COLUMNS},
+                'dimensions': {name: x for name, _, _, x in COLUMNS if x}}
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_export(directory: str, mmap_mode: str = 'r') -> dict:
+    """
+        Loads an export, the column files memory-mapped rather than read.
+
+        Args:
+            directory (str): The directory of the export.
+            mmap_mode (str, optional): The `np.load` memory-map mode, None to read the files in memory. Defaults to 'r'.
+
+        Returns:
+            dict: The columns by name and the names of every dimension under `<dimension>_names`.
+        """
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    data = {name: np.load(os.path.join(directory, f'{name}.npy'),
+                          mmap_mode=mmap_mode)[:manifest['rows']]
+            for name in manifest['columns']}
+    for dimension in set(manifest['dimensions'].values()):
+        data[f'{dimension}_names'] = np.load(
+            os.path.join(directory, f'{dimension}_names.npy'))
+    return data
+
+
+def __write_dimensions(directory: str) -> dict:
+    """Writes the names of every dimension and returns the codes of the dimension ids, by dimension."""
+    dimensions = {
+        'pokemon': db_session.execute(select(PokemonDimension.id,
+                                             PokemonDimension.name)).all(),
+        'move': db_session.execute(select(MoveDimension.id,
+                                          MoveDimension.name)).all(),
+        'stat': db_session.execute(select(StatDimension.id,
+                                          StatDimension.name)).all(),
+    }
+    codes = {}
+    for dimension, rows in dimensions.items():
+        names = list(dict.fromkeys(name or '' for _, name in rows))
+        name_codes = {name: code for code, name in enumerate(names)}
+        codes[dimension] = {x: name_codes[name or ''] for x, name in rows}
+        np.save(os.path.join(directory, f'{dimension}_names.npy'),
+                np.array(names, dtype=str))
+    return codes
+
+
+def __encode(values: tuple, dtype: str, codes: dict = None):
+    if codes is not None:
+        return np.array([codes.get(x, -1) for x in values], dtype=dtype)
+    if np.issubdtype(dtype, np.integer):
+        return np.array([-1 if x is None else x for x in values], dtype=dtype)
+    return np.array(values, dtype=dtype)
+
+
+def main(argv=None) -> int:
+    """
+        Entry point of the `export` command.
+
+        Args:
+            argv (list, optional): The command line arguments, defaults to `sys.argv[1:]`.
+
+        Returns:
+            int: The exit code.
+        """
+    parser = argparse.ArgumentParser(
+        prog='export',
+        description='Exports the battle history to NumPy column files.')
+    parser.add_argument('directory', help='directory of the column files')
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help='rows fetched at a time (default: 10000)')
+    args = parser.parse_args(argv)
+
+    manifest = export_battles(args.directory, args.chunk_size)
+    print(f"Exported {manifest['rows']} battles to {args.directory}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
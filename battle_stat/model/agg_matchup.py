@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, ForeignKey, Float
+from sqlalchemy.orm import relationship
+
+from battle_stat import Base
+
+
+class MatchupAggregate(Base):
+    """Running totals of the battles of an ordered pair of Pokémon, `wins` counting the wins of the first one.
+    Every battle updates the rows of both orders of its pair, except a mirror matchup, a Pokémon against itself, whose
+    single row counts the battle once with the first side's win."""
+    __tablename__ = 'agg_matchup'
+
+    pokemon_id_1 = Column(Integer, ForeignKey('dim_pokemon.id'), primary_key=True)
+    pokemon_id_2 = Column(Integer, ForeignKey('dim_pokemon.id'), primary_key=True)
+    battles = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    total_duration_s = Column(Float, nullable=False, default=0)
+    total_turns = Column(Integer, nullable=False, default=0)
+
+    pokemon_1 = relationship("PokemonDimension", foreign_keys=[pokemon_id_1])
+    pokemon_2 = relationship("PokemonDimension", foreign_keys=[pokemon_id_2])
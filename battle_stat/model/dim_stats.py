@@ -1,5 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from battle_stat import Base
@@ -7,6 +7,8 @@ from battle_stat import Base
 
 class StatDimension(Base):
     __tablename__ = 'dim_stat'
+    __table_args__ = (UniqueConstraint('name', 'move_id',
+                                       name='name_move_id_unique'),)
 
     id = Column(Integer, primary_key=True)
     name = Column(String(100))
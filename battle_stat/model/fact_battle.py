@@ -1,5 +1,6 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, func, \
+    BigInteger, String
 from sqlalchemy.orm import relationship
 
 from battle_stat import Base
@@ -9,13 +10,20 @@ class BattleFact(Base):
     __tablename__ = 'fact_battle'
 
     id = Column(Integer, primary_key=True)
-    timestamp_ = Column(DateTime, default=func.now())
-    pokemon_id_1 = Column(Integer, ForeignKey('dim_pokemon.id'))
-    pokemon_id_2 = Column(Integer, ForeignKey('dim_pokemon.id'))
+    timestamp_ = Column(DateTime, default=func.now(), server_default=func.now(),
+                        index=True)
+    pokemon_id_1 = Column(Integer, ForeignKey('dim_pokemon.id'), index=True)
+    pokemon_id_2 = Column(Integer, ForeignKey('dim_pokemon.id'), index=True)
     attack_pokemon_id_1 = Column(Integer, ForeignKey('fact_attack.id'))
     attack_pokemon_id_2 = Column(Integer, ForeignKey('fact_attack.id'))
     battle_duration_s = Column(Integer)
-    winner_pokemon_id = Column(Integer, ForeignKey('dim_pokemon.id'))
+    turns = Column(Integer)
+    # The battle replays from its seed and the version of the catalog data, see `replay.py`
+    seed = Column(BigInteger)
+    catalog_version = Column(String(16))
+    # How the battle ended: knockout, or a draw by errors, max_turns or stalled, see `main.battle`
+    end_reason = Column(String(16))
+    winner_pokemon_id = Column(Integer, ForeignKey('dim_pokemon.id'), index=True)
 
     # Relationships (optional, for easier querying)
     pokemon_1 = relationship("PokemonDimension", foreign_keys=[pokemon_id_1])
@@ -0,0 +1,187 @@
+import atexit
+import queue
+import threading
+import time
+
+import metrics
+from battle_stat import db_session, statement_count
+from battle_stat.battle_notes import BattleNote, init_db_cache, \
+    snapshot_pokemon, write_battle_notes
+from config import Config
+from model.pokemon import Pokemon
+
+_FLUSH = object()
+_STOP = object()
+
+_notes_writer = None
+_notes_writer_lock = threading.Lock()
+
+
+class NotesWriter:
+    """
+        Writes battle notes to the database from a background thread, so a battle never waits for a database round-trip.
+
+        Notes are snapshots of the Pokémon queued in memory. The worker thread writes them in one transaction per batch,
+        once `batch_size` notes are queued or `flush_interval_s` seconds passed since the first note of the batch. The queue
+        is bounded by `queue_size`: when the database can't keep up, submitting blocks until there is room again.
+
+        Attributes:
+            batch_size (int): Maximum number of notes written in one transaction.
+            flush_interval_s (float): Maximum time a note waits in the queue before its batch is written.
+            written (int): Number of notes written so far.
+            failed (int): Number of notes lost because they couldn't be written, on their own after their batch failed.
+
+        Methods:
+            start: Starts the worker thread.
+            submit: Queues the notes of a turn or of a finished battle.
+            flush: Blocks until every queued note is written.
+            close: Flushes the queue and stops the worker thread.
+        """
+    def __init__(self, batch_size: int = Config.NOTES_BATCH_SIZE,
+                 flush_interval_s: float = Config.NOTES_FLUSH_INTERVAL_S,
+                 queue_size: int = Config.NOTES_QUEUE_SIZE,
+                 write=write_battle_notes):
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.written = 0
+        self.failed = 0
+        self._write = write
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self.__run, name='notes-writer',
+                                        daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, attacker: Pokemon, defender: Pokemon,
+               battle_duration: float = None, turns: int = None,
+               seed: int = None, catalog_version: str = None,
+               end_reason: str = None):
+        """
+            Queues the notes of a turn, or of a finished battle when the battle duration is given.
+
+            Args:
+                attacker (Pokemon): The attacking Pokémon in the battle.
+                defender (Pokemon): The defending Pokémon in the battle.
+                battle_duration (float, optional): The duration of the battle in seconds. Defaults to None.
+                turns (int, optional): The number of turns of the finished battle. Defaults to None.
+                seed (int, optional): The seed of the finished battle. Defaults to None.
+                catalog_version (str, optional): The version of the catalog data of the finished battle. Defaults to None.
+                end_reason (str, optional): How the finished battle ended, see `main.battle`. Defaults to None.
+            """
+        self._queue.put(BattleNote(snapshot_pokemon(attacker),
+                                   snapshot_pokemon(defender), battle_duration,
+                                   turns, seed, catalog_version, end_reason))
+
+    def flush(self):
+        """Writes the queued notes right away and blocks until all of them are written."""
+        if self._thread.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self):
+        """Writes the queued notes and stops the worker thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def __run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _FLUSH and item is not _STOP:
+                batch.append(item)
+                deadline = deadline or time.monotonic() + self.flush_interval_s
+                if len(batch) < self.batch_size:
+                    continue
+
+            if batch:
+                self.__write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+                deadline = None
+            if item is _FLUSH or item is _STOP:
+                self._queue.task_done()
+            if item is _STOP:
+                db_session.remove()
+                return
+
+    def __write(self, batch: list):
+        statements = statement_count()
+        try:
+            with metrics.timed('db_flush_seconds', path='batch'):
+                self._write(batch)
+            self.written += len(batch)
+            metrics.inc('battle_notes_written_total', len(batch))
+            battles = sum(1 for x in batch if x.battle_duration)
+            if battles:
+                metrics.observe('sql_statements_per_battle',
+                                (statement_count() - statements) / battles,
+                                metrics.COUNT_BUCKETS)
+        except Exception as e:
+            self.__reload_db_cache()
+            if len(batch) > 1:
+                # Write the notes one by one, so a bad note doesn't take the rest of its batch down with it
+                print(f"Failed to write {len(batch)} battle notes, writing them one by one: {e}")
+                for note in batch:
+                    self.__write([note])
+                return
+            self.failed += len(batch)
+            metrics.inc('battle_notes_failed_total', len(batch))
+            print(f"Failed to write {len(batch)} battle notes: {e}")
+
+    @staticmethod
+    def __reload_db_cache():
+        """The dimensions cached while preparing a failed batch were never written, reload the cache from the database."""
+        try:
+            init_db_cache()
+        except Exception as e:
+            print(f"Failed to reload the database cache: {e}")
+
+
+def get_notes_writer() -> NotesWriter:
+    """
+        Returns the notes writer shared by the application, starting it on first use. It is flushed and stopped at exit.
+
+        Returns:
+            NotesWriter: The running notes writer.
+        """
+    global _notes_writer
+    with _notes_writer_lock:
+        if _notes_writer is None:
+            _notes_writer = NotesWriter().start()
+            atexit.register(_notes_writer.close)
+    return _notes_writer
+
+
+def queue_battle_notes(attacker: Pokemon, defender: Pokemon,
+                       battle_duration: float = None, turns: int = None,
+                       seed: int = None, catalog_version: str = None,
+                       end_reason: str = None):
+    """
+        Queues battle notes to be written in the background, see `take_battle_notes` for the written data.
+
+        Args:
+            attacker (Pokemon): The attacking Pokémon in the battle.
+            defender (Pokemon): The defending Pokémon in the battle.
+            battle_duration (float, optional): The duration of the battle in seconds. Defaults to None.
+            turns (int, optional): The number of turns of the finished battle. Defaults to None.
+            seed (int, optional): The seed of the finished battle. Defaults to None.
+            catalog_version (str, optional): The version of the catalog data of the finished battle. Defaults to None.
+            end_reason (str, optional): How the finished battle ended, see `main.battle`. Defaults to None.
+        """
+    get_notes_writer().submit(attacker, defender, battle_duration, turns, seed,
+                              catalog_version, end_reason)
+
+
+def flush_battle_notes():
+    """Blocks until every queued battle note is written."""
+    get_notes_writer().flush()
@@ -0,0 +1,53 @@
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+
+from battle_stat import db_session
+from battle_stat.model.agg_matchup import MatchupAggregate
+from battle_stat.model.dim_pokemon import PokemonDimension
+
+
+def get_matchup(pokemon_name_1, pokemon_name_2):
+    """Returns the totals of the battles of the first Pokémon against the second, `wins` being the first one's wins,
+    or None when they never battled."""
+    pokemon_1 = aliased(PokemonDimension)
+    pokemon_2 = aliased(PokemonDimension)
+    return db_session.query(MatchupAggregate).join(
+        pokemon_1, MatchupAggregate.pokemon_id_1 == pokemon_1.id).join(
+        pokemon_2, MatchupAggregate.pokemon_id_2 == pokemon_2.id).filter(
+        pokemon_1.name == pokemon_name_1).filter(
+        pokemon_2.name == pokemon_name_2).first()
+
+
+def get_matchups_of(pokemon_name):
+    """Returns `(opponent name, MatchupAggregate)` tuples of every opponent the Pokémon battled."""
+    pokemon_1 = aliased(PokemonDimension)
+    pokemon_2 = aliased(PokemonDimension)
+    return db_session.query(pokemon_2.name, MatchupAggregate).join(
+        pokemon_1, MatchupAggregate.pokemon_id_1 == pokemon_1.id).join(
+        pokemon_2, MatchupAggregate.pokemon_id_2 == pokemon_2.id).filter(
+        pokemon_1.name == pokemon_name).order_by(pokemon_2.name).all()
+
+
+def get_leaderboard(limit=None):
+    """Returns `(name, battles, wins, win rate, average duration in seconds, average turns)` rows of every Pokémon,
+    best win rate first. Reads one row per matchup, however many battles were fought."""
+    battles = func.sum(MatchupAggregate.battles)
+    win_rate = func.sum(MatchupAggregate.wins) * 1.0 / battles
+    query = db_session.query(
+        PokemonDimension.name, battles, func.sum(MatchupAggregate.wins), win_rate,
+        func.sum(MatchupAggregate.total_duration_s) / battles,
+        func.sum(MatchupAggregate.total_turns) * 1.0 / battles).join(
+        PokemonDimension, MatchupAggregate.pokemon_id_1 == PokemonDimension.id).group_by(
+        PokemonDimension.id, PokemonDimension.name).order_by(
+        win_rate.desc(), PokemonDimension.name)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def get_average_duration(pokemon_name):
+    """Returns the average duration in seconds of the battles of the Pokémon, or None when it never battled."""
+    return db_session.query(
+        func.sum(MatchupAggregate.total_duration_s) / func.sum(MatchupAggregate.battles)).join(
+        PokemonDimension, MatchupAggregate.pokemon_id_1 == PokemonDimension.id).filter(
+        PokemonDimension.name == pokemon_name).scalar()
@@ -0,0 +1,6 @@
+from battle_stat import db_session
+from battle_stat.model.fact_battle import BattleFact
+
+
+def get_battle_fact(battle_id):
+    return db_session.query(BattleFact).filter(BattleFact.id == battle_id).first()
@@ -0,0 +1,78 @@
+"""
+    Import-time budget of the entry points: the cumulative `python -X importtime` time of each module imported in a fresh
+    interpreter, best of `--repeat` runs, compared with its budget in `BUDGET_MS`.
+
+    Run with `python -m benchmarks.bench_import` from the project root: the exit code is 1 when a module is over budget.
+    `--tree MODULE` prints the slowest imports of a module instead.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Budgets with headroom over the times measured when the budget was set, on a machine importing `main` in 12ms
+BUDGET_MS = {
+    'model.pokemon': 30,
+    'main': 40,
+    'simulate': 150,
+    'tournament': 150,
+    'fetch_poke_data': 150,
+    'battle_stat': 600,
+}
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str) -> list:
+    """
+        Imports a module in a fresh interpreter.
+
+        Args:
+            module (str): The module to import.
+
+        Returns:
+            list: `(module, self ms, cumulative ms)` tuples of every module the import loaded, in import order.
+        """
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=_PROJECT_ROOT, capture_output=True, text=True,
+                            check=True).stderr
+    times = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times.append((name.strip(), int(own) / 1000, int(cumulative) / 1000))
+    return times
+
+
+def import_time_ms(module: str, repeat: int = 5) -> float:
+    """Returns the best cumulative import time of a module in milliseconds over `repeat` fresh interpreters."""
+    return min(next(x[2] for x in import_times(module) if x[0] == module)
+               for _ in range(repeat))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='fresh interpreters per module (default: 5)')
+    parser.add_argument('--tree', metavar='MODULE',
+                        help='print the 20 slowest imports of MODULE')
+    args = parser.parse_args(argv)
+
+    if args.tree:
+        for name, own, cumulative in sorted(import_times(args.tree),
+                                            key=lambda x: x[2], reverse=True)[:20]:
+            print(f'{name:<48}{own:>10.1f}{cumulative:>10.1f} ms')
+        return 0
+
+    over_budget = False
+    for module, budget in BUDGET_MS.items():
+        elapsed = import_time_ms(module, args.repeat)
+        over_budget |= elapsed > budget
+        print(f"{module:<28}{elapsed:>10.1f} ms{budget:>8} ms budget"
+              f"{'  OVER BUDGET' if elapsed > budget else ''}")
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""
+    Ingestion benchmark of the battle facts: rows per second written by the ORM path (`save_list_data` of `AttackFact`
+    and `BattleFact` objects) compared with the Core bulk loader `bulk_save_battle_facts`.
+
+    Runs on a temporary SQLite database by default, pass `--database-uri` to measure another database, e.g. PostgreSQL
+    where the bulk loader uses `COPY FROM STDIN`. The fact tables of that database are emptied first.
+
+    Run with `python -m benchmarks.bench_ingest` from the project root.
+"""
+import argparse
+import os
+import random
+import tempfile
+from time import perf_counter
+
+from sqlalchemy import delete
+
+from battle_stat import DBCache, db_session, init_engine
+from battle_stat import battle_notes
+from battle_stat.database import init_schema, save_list_data
+from battle_stat.model.fact_attack import AttackFact
+from battle_stat.model.fact_battle import BattleFact
+from model.affecting_move import AffectingMove
+from model.move import Move
+
+
+def synthetic_notes(count: int, pokemons: int = 50, seed: int = 0) -> list:
+    """Returns `count` battle notes of synthetic Pokémon, the last note of every ten being the end of a battle."""
+    rng = random.Random(seed)
+    moves = [Move(f'move-{i}', rng.choice((None, 40, 60, 90)), rng.choice((-1, 0, 1)))
+             for i in range(20)]
+
+    def note(poke_id, hp):
+        attack = AffectingMove(rng.choice(('attack', 'defense')),
+                               rng.randint(30, 120), rng.randint(0, 3),
+                               rng.choice(moves))
+        return battle_notes.PokemonNote(poke_id=poke_id, name=f'pokemon-{poke_id}',
+                                        speed=rng.randint(30, 120), hp=hp,
+                                        current_attack=attack)
+
+    return [battle_notes.BattleNote(
+                note(rng.randrange(pokemons), rng.randint(-10, 100)),
+                note(rng.randrange(pokemons), rng.randint(-10, 100)),
+                *((rng.uniform(0.1, 5), rng.randint(1, 30), rng.getrandbits(63),
+                   'synthetic') if i % 10 == 9 else ()))
+            for i in range(count)]
+
+
+def orm_write(notes: list):
+    """The ORM path `write_battle_notes` used before the bulk loader."""
+    battle_notes.resolve_dimensions([x for note in notes for x in note[:2]])
+    save_list_data([x for note in notes
+                    for x in battle_notes.__prepare_battle_notes(*note)])
+
+
+def measure(write, notes: list, batch_size: int) -> float:
+    """Returns the fact rows written per second by `write` in batches of `batch_size` notes."""
+    db_session.execute(delete(BattleFact))
+    db_session.execute(delete(AttackFact))
+    db_session.commit()
+
+    t1 = perf_counter()
+    for start in range(0, len(notes), batch_size):
+        write(notes[start:start + batch_size])
+    return 3 * len(notes) / (perf_counter() - t1)
+
+
+def run(database_uri: str, notes: int = 20000, batch_size: int = 500) -> dict:
+    """
+        Runs the ingestion benchmark.
+
+        Args:
+            database_uri (str): The database to write to, its tables are created when missing.
+            notes (int, optional): Number of battle notes written by each path, every note is three fact rows.
+            batch_size (int, optional): Number of notes written per transaction, as `NotesWriter` does.
+
+        Returns:
+            dict: The measured rows per second, by ingestion path.
+        """
+    init_engine(database_uri)
+    init_schema()
+    DBCache.DIM_MOVE_CACHE, DBCache.DIM_POKEMON_CACHE, DBCache.DIM_STATS_CACHE = {}, {}, {}
+
+    battle_notes_data = synthetic_notes(notes)
+    # Warm the dimension cache so both paths only write facts
+    battle_notes.resolve_dimensions([x for note in battle_notes_data for x in note[:2]])
+    db_session.commit()
+
+    results = {'orm_rows_per_s': measure(orm_write, battle_notes_data, batch_size),
+               'bulk_rows_per_s': measure(battle_notes.write_battle_notes,
+                                          battle_notes_data, batch_size)}
+    results['speedup'] = results['bulk_rows_per_s'] / results['orm_rows_per_s']
+    db_session.remove()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-uri',
+                        help='database to write to (default: a temporary SQLite file)')
+    parser.add_argument('--notes', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = args.database_uri or \
+            f"sqlite:///{os.path.join(directory, 'bench_ingest.sqlite3')}"
+        for name, value in run(database_uri, args.notes, args.batch_size).items():
+            print(f'{name:<28}{value:>12.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+"""
+    Memory benchmark of the battle objects: bytes per `Move`, `AffectingMove` and `Pokemon` compared with the plain
+    `__dict__` based classes they replaced, and the memory allocated by a batch of battles.
+
+    Run with `python -m benchmarks.bench_memory` from the project root.
+"""
+import argparse
+import random
+import tracemalloc
+
+from fetch_poke_data import CACHE_MOVES
+from main import battle
+from model.affecting_move import AffectingMove
+from model.move import Move, MOVE_REGISTRY, intern_move
+from model.pokemon import Pokemon
+
+STAT_NAMES = ('attack', 'defense', 'special-attack', 'special-defense')
+
+
+class DictMove:
+    def __init__(self, name, power, change):
+        self.name = name
+        self.power = power
+        self.change = change
+
+
+class DictAffectingMove:
+    def __init__(self, stat_type, base_stat, effort_ev, move):
+        self.stat_type = stat_type
+        self.stat_changed = base_stat
+        self.effort_ev = effort_ev
+        self.move = move
+        self.iv = random.uniform(0, 15)
+        self.level = 1
+        self.nature_modifier = random.uniform(0.85, 1.0)
+
+
+class DictPokemon:
+    def __init__(self, poke_id, name, moves, stats):
+        self.poke_id = poke_id
+        self.name = name
+        self.moves = moves
+        self.hp = stats['hp'][0]
+        self.speed = stats['speed'][0]
+        self.stats = stats
+        self.current_attack = None
+        self.attacks = {}
+        self.move_index = {}
+        self.usable_moves = ()
+
+
+def synthetic_pokemons(count: int, moves_per_pokemon: int = 40,
+                       catalog_size: int = 400, seed: int = 0) -> list:
+    """
+        Fills CACHE_MOVES with a synthetic move catalog and returns constructor arguments of Pokémon using it.
+        """
+    rng = random.Random(seed)
+    for i in range(catalog_size):
+        if i % 4:
+            CACHE_MOVES[f'move-{i}'] = (rng.choice((None, 40, 60, 90)), 0)
+        else:
+            CACHE_MOVES[f'move-{i}'] = {x: (None, rng.choice((-2, -1, 1, 2)))
+                                        for x in rng.sample(STAT_NAMES, 2)}
+
+    stat_names = ('hp', 'speed') + STAT_NAMES
+    return [{'poke_id': i, 'name': f'pokemon-{i}',
+             'moves': tuple(f'move-{x}' for x in
+                            rng.sample(range(catalog_size), moves_per_pokemon)),
+             'stats': {x: (rng.randint(30, 120), rng.randint(0, 3))
+                       for x in stat_names}}
+            for i in range(count)]
+
+
+def measure(factory, count: int) -> float:
+    """Returns the bytes allocated per object by creating `count` objects with `factory`."""
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current / count
+
+
+def run(instances: int = 20000, battles: int = 500) -> dict:
+    """
+        Runs the memory benchmark.
+
+        Args:
+            instances (int, optional): Number of objects created to measure the size of one object.
+            battles (int, optional): Number of battles simulated to measure the memory of a battle.
+
+        Returns:
+            dict: The measured bytes, by measurement name.
+        """
+    pokemons_data = synthetic_pokemons(50)
+    move = intern_move('move-1', 40, 0)
+    results = {
+        'move_bytes': measure(lambda i: Move(f'm{i % 10}', 40, 0), instances),
+        'dict_move_bytes': measure(lambda i: DictMove(f'm{i % 10}', 40, 0), instances),
+        'affecting_move_bytes': measure(
+            lambda i: AffectingMove('attack', 50, 1, move), instances),
+        'dict_affecting_move_bytes': measure(
+            lambda i: DictAffectingMove('attack', 50, 1, move), instances),
+        'pokemon_shell_bytes': measure(
+            lambda i: Pokemon(i, 'p', (), {'hp': (1, 0), 'speed': (1, 0)}), instances),
+        'dict_pokemon_shell_bytes': measure(
+            lambda i: DictPokemon(i, 'p', (), {'hp': (1, 0), 'speed': (1, 0)}), instances),
+    }
+
+    MOVE_REGISTRY.clear()
+    tracemalloc.start()
+    for i in range(battles):
+        battle(Pokemon(**pokemons_data[i % len(pokemons_data)]),
+               Pokemon(**pokemons_data[(i + 1) % len(pokemons_data)]),
+               verbose=False, take_notes=False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results['battle_peak_bytes'] = peak
+    results['interned_moves'] = len(MOVE_REGISTRY)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--instances', type=int, default=20000)
+    parser.add_argument('--battles', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    for name, value in run(args.instances, args.battles).items():
+        print(f'{name:<28}{value:>12.0f}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
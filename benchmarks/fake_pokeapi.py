@@ -0,0 +1,137 @@
+"""
+    A local fake of the PokeAPI endpoints the application uses, serving a synthetic catalog so benchmarks run offline
+    with reproducible data.
+"""
+import asyncio
+import random
+import threading
+
+from aiohttp import web
+
+STAT_NAMES = ('hp', 'attack', 'defense', 'special-attack', 'special-defense',
+              'speed', 'accuracy', 'evasion')
+BATTLE_STAT_NAMES = STAT_NAMES[1:5]
+
+
+class FakePokeAPI:
+    """
+        Serves `/stat`, `/stat/{name}`, `/move/{name}`, `/pokemon` and `/pokemon/{name}` from a background thread.
+
+        Attributes:
+            url (str): The base URL of the running API, to be used instead of `Config.POKE_API`.
+            requests (int): Number of requests served so far.
+
+        Methods:
+            start: Starts serving on a free local port.
+            stop: Stops serving.
+        """
+    def __init__(self, moves: int = 400, pokemons: int = 50,
+                 moves_per_pokemon: int = 40, latency_s: float = 0.0,
+                 seed: int = 0):
+        self.url = None
+        self.requests = 0
+        self.latency_s = latency_s
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name='fake-pokeapi', daemon=True)
+        self.__build_catalog(moves, pokemons, moves_per_pokemon, seed)
+
+    @property
+    def pokemon_names(self) -> list:
+        return list(self._pokemons)
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.__start(), self._loop).result()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def __start(self):
+        app = web.Application(middlewares=[self.__count])
+        app.add_routes([web.get('/stat', self.__stats),
+                        web.get('/stat/{name}', self.__stat),
+                        web.get('/move/{name}', self.__move),
+                        web.get('/pokemon', self.__pokemons),
+                        web.get('/pokemon/{name}', self.__pokemon)])
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f'http://127.0.0.1:{port}'
+
+    @web.middleware
+    async def __count(self, request, handler):
+        self.requests += 1
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return await handler(request)
+
+    def __build_catalog(self, moves, pokemons, moves_per_pokemon, seed):
+        rng = random.Random(seed)
+        self._moves = {}
+        for i in range(moves):
+            stat_changes = []
+            if i % 4 == 0:
+                stat_changes = [{'change': rng.choice((-2, -1, 1, 2)),
+                                 'stat': {'name': x}}
+                                for x in rng.sample(BATTLE_STAT_NAMES, 2)]
+            self._moves[f'move-{i}'] = {'name': f'move-{i}',
+                                        'power': rng.choice((None, 40, 60, 90)),
+                                        'stat_changes': stat_changes}
+
+        self._pokemons = {}
+        for i in range(1, pokemons + 1):
+            self._pokemons[f'pokemon-{i}'] = {
+                'id': i, 'name': f'pokemon-{i}',
+                'moves': [{'move': {'name': x}}
+                          for x in rng.sample(list(self._moves), moves_per_pokemon)],
+                'stats': [{'base_stat': rng.randint(30, 120),
+                           'effort': rng.randint(0, 3), 'stat': {'name': x}}
+                          for x in STAT_NAMES[:6]]}
+
+    async def __stats(self, request):
+        return web.json_response({'results': [{'name': x, 'url': f'{self.url}/stat/{x}'}
+                                              for x in STAT_NAMES]})
+
+    async def __stat(self, request):
+        name = request.match_info['name']
+        affecting = {'increase': [], 'decrease': []}
+        for move in self._moves.values():
+            for x in move['stat_changes']:
+                if x['stat']['name'] == name:
+                    affecting['increase' if x['change'] > 0 else 'decrease'].append(
+                        {'change': x['change'],
+                         'move': {'name': move['name'],
+                                  'url': f"{self.url}/move/{move['name']}"}})
+        return web.json_response({'name': name, 'affecting_moves': affecting})
+
+    async def __move(self, request):
+        move = self._moves.get(request.match_info['name'])
+        if move is None:
+            raise web.HTTPNotFound()
+        return web.json_response(move)
+
+    async def __pokemons(self, request):
+        names = list(self._pokemons)[:int(request.query.get('limit', 20))]
+        return web.json_response({'count': len(self._pokemons),
+                                  'results': [{'name': x, 'url': f'{self.url}/pokemon/{x}'}
+                                              for x in names]})
+
+    async def __pokemon(self, request):
+        name = request.match_info['name']
+        pokemon = self._pokemons.get(name) or self._pokemons.get(f'pokemon-{name}')
+        if pokemon is None:
+            raise web.HTTPNotFound()
+        return web.json_response(pokemon)
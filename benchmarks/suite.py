@@ -0,0 +1,286 @@
+"""
+    Throughput benchmarks of the hot paths: the import time of `main`, the PokeAPI crawl, move resolution from PokeAPI
+    and from the offline catalog, move selection, damage math, full battles and battle notes. Runs offline against a
+    local fake PokeAPI and a temporary SQLite database.
+
+    Run with `python -m benchmarks.suite -o results.json` from the project root, and compare two runs with
+    `python -m benchmarks.suite --compare baseline.json -o results.json`: the exit code is 1 when a benchmark regressed by
+    more than `--threshold`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from contextlib import ExitStack
+from time import perf_counter
+from unittest.mock import patch
+
+import fetch_poke_data
+from battle_stat import DBCache, db_session, init_engine
+from battle_stat.battle_notes import BattleNote, init_db_cache, \
+    resolve_dimensions, snapshot_pokemon, take_battle_notes, write_battle_notes
+from battle_stat.database import init_schema
+from benchmarks.bench_import import import_time_ms
+from benchmarks.fake_pokeapi import FakePokeAPI
+from catalog import compile_catalog
+from config import Config
+from fetch_poke_data import CACHE_MOVES, CACHE_POKEMONS
+from main import battle
+from model.affecting_move import AffectingMove
+from model.move import Move
+from model.pokemon import Pokemon, ATTACK, DEFENSE
+
+BENCHMARKS = []
+
+
+def benchmark(unit: str, higher_is_better: bool = True):
+    """Registers a benchmark of the suite, a function of the `Context` returning its measured value."""
+    def register(function):
+        BENCHMARKS.append((function.__name__, unit, higher_is_better, function))
+        return function
+    return register
+
+
+def rate(function, min_time_s: float = 0.2, repeat: int = 3) -> float:
+    """Returns the best calls per second of `function` over `repeat` runs of at least `min_time_s` seconds each."""
+    best = 0.0
+    for _ in range(repeat):
+        calls, elapsed = 0, 0.0
+        t1 = perf_counter()
+        while elapsed < min_time_s:
+            function()
+            calls += 1
+            elapsed = perf_counter() - t1
+        best = max(best, calls / elapsed)
+    return best
+
+
+def best_time(function, repeat: int = 3) -> float:
+    """Returns the best wall time in seconds of `repeat` calls of `function`."""
+    times = []
+    for _ in range(repeat):
+        t1 = perf_counter()
+        function()
+        times.append(perf_counter() - t1)
+    return min(times)
+
+
+class Context:
+    """
+        The fake PokeAPI, the SQLite database and the Pokémon shared by the benchmarks of a run.
+        """
+    def __init__(self, api: FakePokeAPI, directory: str, min_time_s: float):
+        self.api = api
+        self.directory = directory
+        self.min_time_s = min_time_s
+        self.pokemons_data = []
+
+    def pokemon(self, index: int) -> Pokemon:
+        return Pokemon(**self.pokemons_data[index % len(self.pokemons_data)])
+
+
+@benchmark('s', higher_is_better=False)
+def import_main_s(context):
+    return import_time_ms('main') / 1000
+
+
+@benchmark('s', higher_is_better=False)
+def crawl_s(context):
+    def crawl():
+        CACHE_MOVES.clear()
+        asyncio.run(fetch_poke_data.fetch_stats())
+    return best_time(crawl)
+
+
+@benchmark('s', higher_is_better=False)
+def resolve_move_pool_s(context):
+    def resolve():
+        CACHE_MOVES.clear()
+        CACHE_POKEMONS.clear()
+        context.pokemons_data = fetch_poke_data.resolve_move_pool(
+            *fetch_poke_data.fetch_pokemons_data(*context.api.pokemon_names))
+    return best_time(resolve)
+
+
+@benchmark('s', higher_is_better=False)
+def catalog_resolve_move_pool_s(context):
+    path = os.path.join(context.directory, 'catalog.bin')
+    compile_catalog(*asyncio.run(fetch_poke_data.crawl_catalog()), path)
+
+    def resolve():
+        CACHE_MOVES.clear()
+        CACHE_POKEMONS.clear()
+        fetch_poke_data.resolve_move_pool(
+            *fetch_poke_data.fetch_pokemons_data(*context.api.pokemon_names))
+    with patch.object(Config, 'CATALOG_PATH', path):
+        return best_time(resolve)
+
+
+@benchmark('ops/s')
+def set_current_move_ops(context):
+    pokemon = context.pokemon(0)
+    return rate(lambda: pokemon.set_current_move(ATTACK), context.min_time_s)
+
+
+@benchmark('ops/s')
+def attacking_damage_ops(context):
+    move = Move('benchmark', 60, 0)
+    attack = AffectingMove(ATTACK, 80, 2, move)
+    defense = AffectingMove(DEFENSE, 70, 1, move)
+    return rate(lambda: attack.attacking_damage(defense), context.min_time_s)
+
+
+@benchmark('battles/s')
+def battle_ops(context):
+    battles = iter(range(10 ** 9))
+
+    def run_battle():
+        i = next(battles)
+        battle(context.pokemon(i), context.pokemon(i + 1), verbose=False,
+               take_notes=False)
+    return rate(run_battle, context.min_time_s)
+
+
+@benchmark('notes/s')
+def take_battle_notes_ops(context):
+    pokemon1, pokemon2 = context.pokemon(0), context.pokemon(1)
+
+    def take_notes():
+        pokemon1.set_current_move(ATTACK)
+        pokemon2.set_current_move(DEFENSE)
+        take_battle_notes(pokemon1, pokemon2)
+    # The first run also upserts the dimensions of the moves, the best run measures the notes alone
+    return rate(take_notes, context.min_time_s)
+
+
+@benchmark('notes/s')
+def write_battle_notes_ops(context):
+    notes = []
+    for i in range(500):
+        pokemon1, pokemon2 = context.pokemon(i), context.pokemon(i + 1)
+        pokemon1.set_current_move(ATTACK)
+        pokemon2.set_current_move(DEFENSE)
+        notes.append(BattleNote(snapshot_pokemon(pokemon1),
+                                snapshot_pokemon(pokemon2)))
+    resolve_dimensions([x for note in notes for x in note[:2]])
+    db_session.commit()
+    return len(notes) * rate(lambda: write_battle_notes(notes),
+                             context.min_time_s, repeat=1)
+
+
+def run(min_time_s: float = 0.2, only: list = None) -> dict:
+    """
+        Runs the benchmark suite.
+
+        Args:
+            min_time_s (float, optional): Minimum time a throughput is measured for. Defaults to 0.2.
+            only (list, optional): Names of the benchmarks to run, all of them by default. Benchmarks needing the
+                Pokémon of the fake PokeAPI always load them first.
+
+        Returns:
+            dict: `{benchmark name: {'value': ..., 'unit': ..., 'higher_is_better': ...}}`.
+        """
+    with ExitStack() as stack:
+        api = stack.enter_context(FakePokeAPI())
+        stack.enter_context(patch.multiple(
+            fetch_poke_data, POKE_API_ALL_STATS=f'{api.url}/stat',
+            POKE_API_POKEMON=f'{api.url}/pokemon/',
+            POKE_API_MOVE=f'{api.url}/move/', _response_cache=None))
+        stack.enter_context(patch.multiple(Config, HTTP_CACHE_PATH='', CATALOG_PATH=''))
+        stack.enter_context(patch.multiple(DBCache, DIM_MOVE_CACHE={},
+                                           DIM_POKEMON_CACHE={},
+                                           DIM_STATS_CACHE={}))
+        directory = stack.enter_context(tempfile.TemporaryDirectory())
+        init_engine(f"sqlite:///{os.path.join(directory, 'benchmark.sqlite3')}")
+        init_schema()
+        init_db_cache()
+
+        context = Context(api, directory, min_time_s)
+        results = {}
+        for name, unit, higher_is_better, function in BENCHMARKS:
+            if not context.pokemons_data and name not in ('import_main_s', 'crawl_s'):
+                resolve_move_pool_s(context)
+            if only and name not in only:
+                continue
+            results[name] = {'value': function(context), 'unit': unit,
+                             'higher_is_better': higher_is_better}
+        db_session.remove()
+        init_engine(Config.DATABASE_URI)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+        Compares a run with a baseline run.
+
+        Args:
+            results (dict): The benchmarks of the run.
+            baseline (dict): The benchmarks of the baseline run.
+            threshold (float): Relative change beyond which a slower benchmark counts as a regression, e.g. 0.1.
+
+        Returns:
+            list: `(name, baseline value, value, relative change, regressed)` tuples of the benchmarks of both runs, the
+                  change being positive when the benchmark got faster.
+        """
+    rows = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['value'], result['value']
+        change = (after - before) / before if before else 0.0
+        if not result['higher_is_better']:
+            change = -change
+        rows.append((name, before, after, change, change < -threshold))
+    return rows
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-o', '--output', help='JSON file the results are written to')
+    parser.add_argument('--compare', type=argparse.FileType('r'),
+                        help='JSON results of a baseline run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown counted as a regression (default: 0.1)')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='seconds a throughput is measured for (default: 0.2)')
+    parser.add_argument('benchmarks', nargs='*', metavar='BENCHMARK',
+                        help='benchmarks to run (default: all)')
+    args = parser.parse_args(argv)
+
+    results = run(args.min_time, args.benchmarks)
+    for name, result in results.items():
+        print(f"{name:<28}{result['value']:>14.4g} {result['unit']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'commit': _git_commit(), 'timestamp': time.time(),
+                       'python': platform.python_version(),
+                       'benchmarks': results}, f, indent=2)
+
+    if args.compare:
+        rows = compare(results, json.load(args.compare)['benchmarks'],
+                       args.threshold)
+        print()
+        for name, before, after, change, regressed in rows:
+            print(f"{name:<28}{before:>14.4g}{after:>14.4g}{change:>+9.1%}"
+                  f"{'  REGRESSION' if regressed else ''}")
+        if any(x[-1] for x in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,334 @@
+"""
+    Compiled, memory-mapped catalog of every Pokémon and every move of their move pools.
+
+    `python main.py catalog` crawls PokeAPI once and compiles the catalog to `Config.CATALOG_PATH`. When the file exists,
+    `fetch_poke_data` reads the Pokémon and the moves from it instead of the network, and the stat crawl is skipped.
+    The file is memory-mapped read-only, so every process using it shares the same pages and only decodes the entries it
+    looks up.
+
+    Layout, in the byte order of the machine that built it: a header, a table of `(offset, count)` per section, then the
+    sections, each a fixed-width array aligned on 4 bytes.
+
+        strings           UTF-8 bytes of every distinct name, concatenated
+        string_offsets    uint32, start of every string in `strings`, plus the end of the last one
+        pokemon_ids       int32, the id of every Pokémon, ascending
+        pokemon_names     uint32, string of every Pokémon's name
+        pokemon_index     uint32, the Pokémon ordered by name, for lookups by name
+        stats_start       uint32, first stat of every Pokémon in the stat arrays, plus the end of the last one
+        stat_names        uint32, string of the stat's name
+        stat_bases        int32, base stat
+        stat_efforts      int32, effort value
+        moves_start       uint32, first move of every Pokémon in `pokemon_moves`, plus the end of the last one
+        pokemon_moves     uint32, index of the move in the move arrays
+        move_names        uint32, string of every move's name, the moves being ordered by name
+        move_powers       int32, power of the move, -1 for none
+        changes_start     uint32, first stat change of every move, plus the end of the last one
+        change_stats      uint32, string of the changed stat
+        change_values     int32, stages of the change
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from config import Config
+from exceptions import CatalogError
+
+MAGIC = b'POKECAT\0'
+FORMAT_VERSION = 1
+BYTE_ORDER_MARK = 0x01020304
+NO_POWER = -1
+
+# (section, array typecode)
+SECTIONS = (
+    ('strings', 'B'), ('string_offsets', 'I'),
+    ('pokemon_ids', 'i'), ('pokemon_names', 'I'), ('pokemon_index', 'I'),
+    ('stats_start', 'I'), ('stat_names', 'I'), ('stat_bases', 'i'), ('stat_efforts', 'i'),
+    ('moves_start', 'I'), ('pokemon_moves', 'I'),
+    ('move_names', 'I'), ('move_powers', 'i'),
+    ('changes_start', 'I'), ('change_stats', 'I'), ('change_values', 'i'),
+)
+_HEADER = struct.Struct(f'=8sII{2 * len(SECTIONS)}I')
+
+_catalog = None
+_catalog_path = None
+_catalog_lock = threading.Lock()
+
+
+class Catalog:
+    """
+        Read-only view of a compiled catalog file.
+
+        Attributes:
+            path (str): Location of the catalog file.
+
+        Methods:
+            pokemon: The `Pokemon` constructor arguments of a Pokémon, by name or id.
+            move: The CACHE_MOVES entry of a move, by name.
+            pokemon_names: Names of all the Pokémon, by id.
+            close: Unmaps the file.
+        """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.__map_sections()
+        except (CatalogError, struct.error, ValueError) as e:
+            self._mmap.close()
+            raise CatalogError(f'Invalid catalog {path}: {e}') from e
+
+    def __map_sections(self):
+        magic, version, byte_order, *table = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise CatalogError('not a catalog of this format version')
+        if byte_order != BYTE_ORDER_MARK:
+            raise CatalogError('built on a machine of another byte order')
+
+        view = memoryview(self._mmap)
+        self._views = [view]
+        for (name, typecode), offset, count in zip(SECTIONS, table[::2], table[1::2]):
+            size = struct.calcsize(typecode)
+            if offset + count * size > len(self._mmap):
+                raise CatalogError(f'section {name} is truncated')
+            section = view[offset:offset + count * size].cast(typecode)
+            self._views.append(section)
+            setattr(self, f'_{name}', section)
+
+    def __len__(self) -> int:
+        return len(self._pokemon_ids)
+
+    @property
+    def move_count(self) -> int:
+        return len(self._move_names)
+
+    def pokemon(self, name_or_id):
+        """
+            Looks a Pokémon up by name or id.
+
+            Args:
+                name_or_id (str | int): The name or the id of the Pokémon.
+
+            Returns:
+                dict: The `poke_id`, `name`, `moves` and `stats` of the Pokémon, as `fetch_pokemon_data` returns them,
+                      None if the catalog doesn't have it.
+            """
+        key = str(name_or_id).strip().lower()
+        if key.isdigit():
+            index = _search(self._pokemon_ids, int(key), len(self._pokemon_ids))
+        else:
+            position = _search(self._pokemon_index, key, len(self._pokemon_index),
+                               lambda x: self._string(self._pokemon_names[x]))
+            index = None if position is None else self._pokemon_index[position]
+        return None if index is None else self.__pokemon_at(index)
+
+    def move(self, name: str):
+        """
+            Looks a move up by name.
+
+            Args:
+                name (str): The name of the move.
+
+            Returns:
+                dict | tuple: The CACHE_MOVES entry of the move, None if the catalog doesn't have it.
+            """
+        index = _search(self._move_names, name, len(self._move_names), self._string)
+        return None if index is None else self.__move_at(index)
+
+    def pokemon_names(self) -> list:
+        return [self._string(x) for x in self._pokemon_names]
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._mmap.close()
+
+    def __pokemon_at(self, index: int) -> dict:
+        stats = range(self._stats_start[index], self._stats_start[index + 1])
+        moves = range(self._moves_start[index], self._moves_start[index + 1])
+        return {'poke_id': self._pokemon_ids[index],
+                'name': self._string(self._pokemon_names[index]),
+                'moves': tuple(self._string(self._move_names[self._pokemon_moves[x]])
+                               for x in moves),
+                'stats': {self._string(self._stat_names[x]):
+                          (self._stat_bases[x], self._stat_efforts[x]) for x in stats}}
+
+    def __move_at(self, index: int):
+        power = self._move_powers[index]
+        power = None if power == NO_POWER else power
+        changes = range(self._changes_start[index], self._changes_start[index + 1])
+        if not changes:
+            return power, 0
+        return {self._string(self._change_stats[x]): (power, self._change_values[x])
+                for x in changes}
+
+    def _string(self, index: int) -> str:
+        return str(self._strings[self._string_offsets[index]:
+                                 self._string_offsets[index + 1]], 'utf-8')
+
+
+def _search(array, value, length: int, key=None):
+    """Returns the index of `value` in a sorted array, comparing `key(item)` when given, or None if it's missing."""
+    low, high = 0, length
+    while low < high:
+        middle = (low + high) // 2
+        item = array[middle] if key is None else key(array[middle])
+        if item < value:
+            low = middle + 1
+        elif item > value:
+            high = middle
+        else:
+            return middle
+    return None
+
+
+def compile_catalog(pokemons_data: list, moves: dict, path: str) -> dict:
+    """
+        Compiles Pokémon and moves into a catalog file. The file is written next to `path` and renamed, so processes
+        mapping the previous catalog keep reading a consistent file.
+
+        Args:
+            pokemons_data (list): The `Pokemon` constructor arguments of the Pokémon, as returned by
+                `fetch_pokemon_data`. Moves missing from `moves` are left out of their move pools.
+            moves (dict): `{move name: CACHE_MOVES entry}` of the moves.
+            path (str): Location of the catalog file.
+
+        Returns:
+            dict: The number of Pokémon, moves and bytes of the catalog.
+        """
+    strings = {}
+
+    def string(value: str) -> int:
+        return strings.setdefault(value, len(strings))
+
+    sections = {name: [] for name, _ in SECTIONS}
+    move_names = sorted(moves)
+    move_index = {name: i for i, name in enumerate(move_names)}
+    for name in move_names:
+        entry = moves[name]
+        changes = entry.items() if isinstance(entry, dict) else ()
+        power = next(iter(entry.values()))[0] if changes else entry[0]
+        sections['move_names'].append(string(name))
+        sections['move_powers'].append(NO_POWER if power is None else power)
+        sections['changes_start'].append(len(sections['change_stats']))
+        for stat_name, (_, change) in changes:
+            sections['change_stats'].append(string(stat_name))
+            sections['change_values'].append(change)
+    sections['changes_start'].append(len(sections['change_stats']))
+
+    pokemons_data = sorted({x['poke_id']: x for x in pokemons_data}.values(),
+                           key=lambda x: x['poke_id'])
+    for pokemon_data in pokemons_data:
+        sections['pokemon_ids'].append(pokemon_data['poke_id'])
+        sections['pokemon_names'].append(string(pokemon_data['name']))
+        sections['stats_start'].append(len(sections['stat_names']))
+        for stat_name, (base_stat, effort) in pokemon_data['stats'].items():
+            sections['stat_names'].append(string(stat_name))
+            sections['stat_bases'].append(base_stat)
+            sections['stat_efforts'].append(effort)
+        sections['moves_start'].append(len(sections['pokemon_moves']))
+        sections['pokemon_moves'] += [move_index[x] for x in pokemon_data['moves']
+                                      if x in move_index]
+    sections['stats_start'].append(len(sections['stat_names']))
+    sections['moves_start'].append(len(sections['pokemon_moves']))
+    sections['pokemon_index'] = sorted(range(len(pokemons_data)),
+                                       key=lambda x: pokemons_data[x]['name'])
+
+    encoded = [x.encode() for x in strings]
+    sections['strings'] = b''.join(encoded)
+    offsets = [0]
+    for x in encoded:
+        offsets.append(offsets[-1] + len(x))
+    sections['string_offsets'] = offsets
+
+    blobs, table, offset = [], [], _HEADER.size
+    for name, typecode in SECTIONS:
+        values = sections[name]
+        blob = bytes(values) if typecode == 'B' else struct.pack(f'={len(values)}{typecode}', *values)
+        table += [offset, len(values)]
+        blobs.append(blob + b'\0' * (-len(blob) % 4))
+        offset += len(blobs[-1])
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f'{path}.tmp', 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER_MARK, *table))
+        f.writelines(blobs)
+    os.replace(f'{path}.tmp', path)
+    return {'pokemons': len(pokemons_data), 'moves': len(move_names), 'bytes': offset}
+
+
+def build_catalog(path: str = None) -> dict:
+    """
+        Crawls every Pokémon and every move of their move pools from PokeAPI and compiles them into a catalog.
+
+        Args:
+            path (str, optional): Location of the catalog file. Defaults to `Config.CATALOG_PATH`.
+
+        Returns:
+            dict: The number of Pokémon, moves and bytes of the catalog.
+        """
+    import asyncio
+    from fetch_poke_data import crawl_catalog
+
+    global _catalog_path
+    pokemons_data, moves = asyncio.run(crawl_catalog())
+    summary = compile_catalog(pokemons_data, moves, path or Config.CATALOG_PATH)
+    _catalog_path = None
+    return summary
+
+
+def get_catalog():
+    """
+        Returns the catalog of the application, mapping `Config.CATALOG_PATH` on first use. The catalog previously mapped
+        is closed when the path changes, or after `build_catalog`.
+
+        Returns:
+            Catalog: The catalog, or None if there is no catalog file, or `Config.CATALOG_PATH` is empty.
+        """
+    global _catalog, _catalog_path
+    path = Config.CATALOG_PATH
+    if path != _catalog_path:
+        with _catalog_lock:
+            if path != _catalog_path:
+                if _catalog is not None:
+                    _catalog.close()
+                    _catalog = None
+                if path and os.path.exists(path):
+                    try:
+                        _catalog = Catalog(path)
+                    except (CatalogError, OSError) as e:
+                        print(e)
+                _catalog_path = path
+    return _catalog
+
+
+def main(argv=None) -> int:
+    """
+        Entry point of the `catalog` command.
+
+        Args:
+            argv (list, optional): The command line arguments, defaults to `sys.argv[1:]`.
+
+        Returns:
+            int: The exit code.
+        """
+    parser = argparse.ArgumentParser(
+        prog='catalog', description='Crawls PokeAPI and compiles the offline Pokémon and move catalog.')
+    parser.add_argument('path', nargs='?', default=Config.CATALOG_PATH,
+                        help=f'catalog file to write (default: {Config.CATALOG_PATH})')
+    args = parser.parse_args(argv)
+    if not args.path:
+        parser.error('no catalog path given')
+
+    summary = build_catalog(args.path)
+    print(f"Catalog {args.path}: {summary['pokemons']} pokemons, {summary['moves']} moves, "
+          f"{summary['bytes'] / 1024:.0f} KiB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
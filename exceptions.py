@@ -4,3 +4,15 @@ class FetchingError(Exception):
 
 class StatsMissMatchError(Exception):
     pass
+
+
+class UnresolvedMoveError(Exception):
+    pass
+
+
+class CatalogVersionError(Exception):
+    pass
+
+
+class CatalogError(Exception):
+    pass
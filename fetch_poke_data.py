@@ -1,88 +1,271 @@
-import asyncio
-
-import aiohttp
-import requests
+from __future__ import annotations
 
+import asyncio
+import functools
+import json
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import metrics
+from catalog import get_catalog
+from config import Config
 from exceptions import FetchingError
+from model.move import CACHE_MOVES
 
-POKE_API = 'https://pokeapi.co/api/v2'
+# aiohttp, requests and the response cache are imported on first use, by the first fetch: the HTTP clients take
+# longer to import than the rest of the application
+if TYPE_CHECKING:
+    import aiohttp
+    import requests
+
+POKE_API = Config.POKE_API
 POKE_API_ALL_STATS = f'{POKE_API}/stat'
 POKE_API_POKEMON = f'{POKE_API}/pokemon/'
 POKE_API_MOVE = f'{POKE_API}/move/'
 
-CACHE_MOVES = {}
+_response_cache = None
+_http_session = None
+_http_session_lock = threading.Lock()
+_http_executor = None
+_http_executor_lock = threading.Lock()
 
-lock = asyncio.Lock()
 
+def get_response_cache():
+    """
+        Returns the persistent response cache shared by `fetch_data` and `fetch_data_sync`, opening it on first use.
 
-async def fetch_data(url: str, session: aiohttp.ClientSession):
+        Returns:
+            ResponseCache: The response cache, or None if it is disabled by an empty `Config.HTTP_CACHE_PATH`.
+        """
+    global _response_cache
+    if _response_cache is None and Config.HTTP_CACHE_PATH:
+        from http_cache import ResponseCache
+        _response_cache = ResponseCache(path=Config.HTTP_CACHE_PATH,
+                                        ttl_s=Config.HTTP_CACHE_TTL_S,
+                                        max_bytes=Config.HTTP_CACHE_MAX_BYTES)
+    return _response_cache
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+async def _get_json(url: str, session: aiohttp.ClientSession):
     """
-        Asynchronously fetches JSON data from a given URL using aiohttp session.
+        Asynchronously fetches JSON data from a given URL, going through the response cache.
 
         Args:
             url (str): The URL from which data is to be fetched.
             session (aiohttp.ClientSession): The aiohttp session to be used for making the request.
 
         Returns:
-            dict: The JSON data fetched from the URL. Returns an empty dict if the fetch fails.
+            tuple: `(status, data, retry_after)` where status is None if the request itself failed and retry_after is
+                   the server's `Retry-After` in seconds, if it sent one.
         """
+    import aiohttp
+    # The cache is a SQLite file, its reads and writes run in the default executor to keep them off the event loop
+    loop = asyncio.get_running_loop()
+    cache = get_response_cache()
+    cached = await loop.run_in_executor(None, cache.get, url) if cache else None
+    if cached and cached.is_fresh:
+        metrics.inc('cache_hits_total', cache='http')
+        return 200, cached.data, None
+
+    metrics.inc('cache_misses_total', cache='http')
+    headers = cached.conditional_headers() if cached else None
     try:
-        async with session.get(url) as response:
-            if response.status == 200:
-                return await response.json()
+        async with metrics.timed('http_fetch_seconds'), \
+                session.get(url, headers=headers) as response:
+            metrics.inc('http_requests_total', status=response.status)
+            if response.status == 304 and cached:
+                await loop.run_in_executor(None, cache.revalidate, url)
+                return 200, cached.data, None
+            elif response.status == 200:
+                body = await response.text()
+                if cache:
+                    await loop.run_in_executor(None, functools.partial(
+                        cache.put, url, body,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')))
+                return 200, json.loads(body), None
             else:
-                print(f"Error fetching {url}: {response.status}")
-                return {}
-    except aiohttp.ClientError as e:
+                retry_after = response.headers.get('Retry-After')
+                return (response.status, {},
+                        float(retry_after) if retry_after and
+                        retry_after.isdigit() else None)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        metrics.inc('http_requests_total', status='error')
         print(f"Request failed: {e}")
-        return {}
+        return None, {}, None
 
 
-async def add_moves(session: aiohttp.ClientSession,
-                    stat_name: str,
-                    affecting_moves: list):
+async def fetch_data(url: str, session: aiohttp.ClientSession):
     """
-        Asynchronously adds move details to the CACHE_MOVES dictionary for a given stat.
+        Asynchronously fetches JSON data from a given URL using aiohttp session.
+        Fresh responses are served from the response cache, stale ones are revalidated with a conditional request.
 
         Args:
+            url (str): The URL from which data is to be fetched.
             session (aiohttp.ClientSession): The aiohttp session to be used for making the request.
-            stat_name (str): The name of the stat for which moves are being added.
-            affecting_moves (list): A list of moves that are part of a stat.
 
-        This function updates the global CACHE_MOVES dictionary with move details.
+        Returns:
+            dict: The JSON data fetched from the URL. Returns an empty dict if the fetch fails.
         """
-    for af_move in affecting_moves:
-        move_name = af_move['move']['name']
+    status, data, _ = await _get_json(url, session)
+    if status not in (200, None):
+        print(f"Error fetching {url}: {status}")
+    return data
 
-        if move_name not in CACHE_MOVES:
-            move_detail = await fetch_data(url=af_move['move']['url'],
-                                           session=session)
-            CACHE_MOVES[move_name] = {stat_name: (move_detail['power'],
-                                                  af_move['change'])}
-        elif stat_name not in CACHE_MOVES[move_name]:
-            power = list(CACHE_MOVES[move_name].values())[0][0]
-            CACHE_MOVES[move_name][stat_name] = (power,
-                                                 af_move['change'])
 
+class Crawler:
+    """
+        Fetches PokeAPI resources over one shared aiohttp session with bounded concurrency.
+
+        Concurrent requests for the same URL are deduplicated into a single fetch, and requests answered with 429/5xx
+        or failing on the connection level are retried with jittered exponential backoff.
 
-async def process_stat(session: aiohttp.ClientSession, stat_name: str,
-                       stat_url: str):
+        Attributes:
+            session (aiohttp.ClientSession): The aiohttp session shared by all requests.
+            max_retries (int): How many times a failed request is retried.
+            backoff_s (float): Base delay of the exponential backoff between retries.
+
+        Methods:
+            fetch: Fetches the JSON data of a URL, joining an in-flight fetch of the same URL if there is one.
+        """
+    def __init__(self, session: aiohttp.ClientSession,
+                 max_concurrency: int = Config.CRAWL_MAX_CONCURRENCY,
+                 max_retries: int = Config.CRAWL_MAX_RETRIES,
+                 backoff_s: float = Config.CRAWL_BACKOFF_S):
+        self.session = session
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = {}
+
+    async def fetch(self, url: str) -> dict:
+        """
+            Fetches the JSON data of a URL. Every URL is fetched at most once per crawler, later and concurrent calls
+            share the result of the first one.
+
+            Args:
+                url (str): The URL from which data is to be fetched.
+
+            Returns:
+                dict: The JSON data fetched from the URL. Returns an empty dict if all the attempts failed.
+            """
+        task = self._in_flight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self.__fetch_with_retries(url))
+            self._in_flight[url] = task
+        return await asyncio.shield(task)
+
+    async def __fetch_with_retries(self, url: str) -> dict:
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                status, data, retry_after = await _get_json(url, self.session)
+
+            if status == 200:
+                return data
+            if status not in RETRY_STATUSES and status is not None:
+                break
+            if attempt < self.max_retries:
+                delay = retry_after or self.backoff_s * 2 ** attempt
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+        print(f"Error fetching {url}: {status}")
+        return {}
+
+
+# Moves being fetched, by name: every lookup of a move in flight, from any thread, awaits the one fetch of it
+_pending_moves = {}
+_pending_lock = threading.Lock()
+
+
+def _claim_moves(move_names) -> tuple:
     """
-        Processes a single stat by fetching its details and the moves affecting it.
+        Splits the moves missing from CACHE_MOVES between the ones the caller has to fetch and the ones already in flight.
+        The moves to fetch are marked in flight until the caller publishes them with `_publish_move`.
 
         Args:
-            session (aiohttp.ClientSession): The aiohttp session to be used for making requests.
-            stat_name (str): The name of the stat to process.
-            stat_url (str): The URL to fetch the stat details from.
+            move_names (Iterable[str]): The names of the moves.
 
-        This function fetches stat details and updates the CACHE_MOVES with moves affecting this stat.
+        Returns:
+            tuple: `(moves to fetch, {move in flight: future done when it is published})`.
         """
-    stat = await fetch_data(url=stat_url, session=session)
+    claimed, in_flight = [], {}
+    with _pending_lock:
+        for move_name in move_names:
+            if move_name in CACHE_MOVES or move_name in in_flight:
+                continue
+            future = _pending_moves.get(move_name)
+            if future is None:
+                _pending_moves[move_name] = Future()
+                claimed.append(move_name)
+            else:
+                in_flight[move_name] = future
+    return claimed, in_flight
 
-    affecting_moves = (stat['affecting_moves']['increase'] +
-                       stat['affecting_moves']['decrease'])
 
-    await add_moves(session, stat_name, affecting_moves)
+def _publish_move(move_name: str, move_data: dict):
+    """Adds a fetched move to CACHE_MOVES, if its details were fetched, and wakes up the lookups awaiting it."""
+    if 'power' in move_data:
+        CACHE_MOVES[move_name] = parse_move(move_data)
+    with _pending_lock:
+        future = _pending_moves.pop(move_name)
+    future.set_result(move_name in CACHE_MOVES)
+
+
+async def stream_stats(crawler: Crawler,
+                       consumers: int = Config.CRAWL_MAX_CONCURRENCY):
+    """
+        Streams the moves affecting the stats into CACHE_MOVES. A producer walks the stat pages and queues their moves,
+        consumers fetch them and publish every move as soon as it arrives. A move is only marked in flight once a
+        consumer starts fetching it: a lookup of a move still waiting in the queue fetches it right away, and the
+        consumer then skips it. Moves whose details can't be fetched are skipped.
+
+        Args:
+            crawler (Crawler): The crawler used for making requests.
+            consumers (int, optional): The number of consumers fetching moves. Defaults to `Config.CRAWL_MAX_CONCURRENCY`.
+        """
+    queue = asyncio.Queue()
+    queued = set()
+
+    async def produce(stat_name: str, stat_url: str):
+        stat = await crawler.fetch(stat_url)
+        if not stat:
+            print(f"Skipping stat {stat_name}, its details are missing")
+            return
+        for x in stat['affecting_moves']['increase'] + stat['affecting_moves']['decrease']:
+            if x['move']['name'] not in queued:
+                queued.add(x['move']['name'])
+                queue.put_nowait(x['move']['name'])
+
+    async def consume():
+        while True:
+            move_name = await queue.get()
+            claimed, _ = _claim_moves([move_name])
+            move_data = {}
+            try:
+                if claimed:
+                    move_data = await crawler.fetch(POKE_API_MOVE + move_name)
+                    if 'power' not in move_data:
+                        print(f"Skipping move {move_name}, its details are missing")
+            finally:
+                if claimed:
+                    _publish_move(move_name, move_data)
+                queue.task_done()
+
+    workers = [asyncio.create_task(consume()) for _ in range(consumers)]
+    try:
+        stats = await crawler.fetch(POKE_API_ALL_STATS)
+        await asyncio.gather(*[produce(x['name'], x['url'])
+                               for x in stats.get('results', [])])
+        await queue.join()
+    finally:
+        for worker in workers:
+            worker.cancel()
 
 
 async def get_stats_with_moves(session: aiohttp.ClientSession):
@@ -92,14 +275,51 @@ async def get_stats_with_moves(session: aiohttp.ClientSession):
         Args:
             session (aiohttp.ClientSession): The aiohttp session to be used for making requests.
 
-        This function fetches all stats and then processes each stat to update CACHE_MOVES with move details.
+        This function streams the moves of every stat into CACHE_MOVES, see `stream_stats`.
         """
-    stats = await fetch_data(url=POKE_API_ALL_STATS,
-                             session=session)
-    stats = ((x['name'], x['url']) for x in stats.get('results', {}))
+    await stream_stats(Crawler(session))
 
-    await asyncio.gather(*[asyncio.create_task(process_stat(session, k, v))
-                           for k, v in stats])
+
+def create_session() -> aiohttp.ClientSession:
+    """
+        Creates the aiohttp session shared by a crawl, with the connection limits from the config.
+
+        Returns:
+            aiohttp.ClientSession: The new session, to be used as an async context manager.
+        """
+    import aiohttp
+    connector = aiohttp.TCPConnector(limit=Config.CRAWL_MAX_CONCURRENCY,
+                                     limit_per_host=Config.CRAWL_LIMIT_PER_HOST)
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def crawl_catalog(limit: int = 100000) -> tuple:
+    """
+        Crawls every Pokémon and every move of their move pools, for compiling the offline catalog.
+
+        Args:
+            limit (int): The maximum number of Pokémon to crawl.
+
+        Returns:
+            tuple: `(pokemons data, moves)`, the `Pokemon` constructor arguments of every Pokémon and the CACHE_MOVES
+                   entry of every move, by name. Pokémon and moves whose details can't be fetched are left out.
+        """
+    async with create_session() as session:
+        crawler = Crawler(session)
+        index = await crawler.fetch(f"{POKE_API_POKEMON.rstrip('/')}?limit={limit}")
+        names = [x['name'] for x in index.get('results', [])]
+        pokemons = await asyncio.gather(*[crawler.fetch(POKE_API_POKEMON + x)
+                                          for x in names])
+        pokemons_data = [parse_pokemon(x) for x in pokemons if x]
+
+        move_names = list(dict.fromkeys(x for pokemon_data in pokemons_data
+                                        for x in pokemon_data['moves']))
+        moves = await asyncio.gather(*[crawler.fetch(POKE_API_MOVE + x)
+                                       for x in move_names])
+
+    return pokemons_data, {move_name: parse_move(move_data)
+                           for move_name, move_data in zip(move_names, moves)
+                           if 'power' in move_data}
 
 
 async def fetch_stats():
@@ -108,13 +328,145 @@ async def fetch_stats():
 
         This function creates an aiohttp session and calls get_stats_with_moves to populate CACHE_MOVES.
         """
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         await get_stats_with_moves(session)
 
 
+def start_stat_crawl() -> Future:
+    """
+        Starts `fetch_stats` in a background thread. Moves are published into CACHE_MOVES as they arrive and
+        `resolve_moves` awaits the moves the crawl is fetching, so battles can start before the crawl is done.
+
+        Returns:
+            concurrent.futures.Future: Done when the crawl is, with its exception if it failed.
+        """
+    future = Future()
+
+    def crawl():
+        try:
+            asyncio.run(fetch_stats())
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+
+    threading.Thread(target=crawl, name='stat-crawl', daemon=True).start()
+    return future
+
+
+def parse_move(move_data: dict):
+    """
+        Converts a PokeAPI `/move` payload into its CACHE_MOVES entry.
+
+        Args:
+            move_data (dict): The JSON data fetched from the `/move` endpoint.
+
+        Returns:
+            dict | tuple: `{'stat.name': (power, change), ...}` for a move changing stats, `(power, 0)` otherwise.
+        """
+    power = move_data['power']
+    stat_changes = move_data.get('stat_changes') or []
+    if stat_changes:
+        return {x['stat']['name']: (power, x['change']) for x in stat_changes}
+    return power, 0
+
+
+async def resolve_moves(move_names) -> list:
+    """
+        Concurrently fetches every move missing from CACHE_MOVES and adds it to the cache.
+        Moves found in the offline catalog are read from it instead of being fetched, and moves already being fetched,
+        e.g. by the background stat crawl, are awaited instead of being fetched again.
+
+        Args:
+            move_names (Iterable[str]): The names of the moves to resolve, duplicates are fetched once.
+
+        Returns:
+            list: The names of the moves that couldn't be resolved.
+        """
+    move_names = list(dict.fromkeys(move_names))
+    missing = [x for x in move_names if x not in CACHE_MOVES]
+    metrics.inc('cache_hits_total', len(move_names) - len(missing), cache='moves')
+    metrics.inc('cache_misses_total', len(missing), cache='moves')
+    catalog = get_catalog()
+    if catalog is not None and missing:
+        moves = {x: catalog.move(x) for x in missing}
+        CACHE_MOVES.update((k, v) for k, v in moves.items() if v is not None)
+        missing = [x for x in missing if moves[x] is None]
+        metrics.inc('cache_hits_total', len(moves) - len(missing), cache='catalog')
+        metrics.inc('cache_misses_total', len(missing), cache='catalog')
+    if missing:
+        claimed, in_flight = _claim_moves(missing)
+        metrics.inc('moves_awaited_total', len(in_flight))
+        await asyncio.gather(_fetch_moves(claimed),
+                             *[asyncio.wrap_future(x) for x in in_flight.values()])
+
+    return [x for x in missing if x not in CACHE_MOVES]
+
+
+async def _fetch_moves(move_names: list):
+    """Fetches moves claimed with `_claim_moves` and publishes them, the moves that failed too."""
+    if not move_names:
+        return
+    moves = [{}] * len(move_names)
+    try:
+        async with create_session() as session:
+            crawler = Crawler(session)
+            moves = await asyncio.gather(*[crawler.fetch(POKE_API_MOVE + x)
+                                           for x in move_names])
+    finally:
+        for move_name, move_data in zip(move_names, moves):
+            _publish_move(move_name, move_data)
+
+
+def resolve_move_pool(*pokemons_data) -> list:
+    """
+        Resolves the moves of several Pokémon before a battle, so the battle itself never has to fetch a move.
+        Moves that can't be resolved are dropped from the Pokémon's move pool.
+
+        Args:
+            *pokemons_data (dict): The `Pokemon` constructor arguments of the Pokémon, as returned by `fetch_pokemon_data`.
+
+        Returns:
+            list: The constructor arguments of the Pokémon, with `moves` limited to the moves found in CACHE_MOVES.
+        """
+    with metrics.timed('move_resolution_seconds'):
+        unresolved = asyncio.run(resolve_moves(
+            x for pokemon_data in pokemons_data for x in pokemon_data['moves']))
+    if unresolved:
+        print(f"Skipping moves that couldn't be resolved: {', '.join(unresolved)}")
+
+    return [dict(pokemon_data,
+                 moves=tuple(x for x in pokemon_data['moves']
+                             if x in CACHE_MOVES))
+            for pokemon_data in pokemons_data]
+
+
+def get_http_session() -> requests.Session:
+    """
+        Returns the keep-alive requests session shared by all synchronous fetches, creating it on first use.
+
+        Returns:
+            requests.Session: The session, with a connection pool sized by `Config.HTTP_POOL_SIZE`.
+        """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=Config.HTTP_POOL_SIZE,
+                                      pool_maxsize=Config.HTTP_POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _http_session = session
+    return _http_session
+
+
 def fetch_data_sync(static_path, variable):
     """
         Synchronously fetches JSON data by constructing a URL from a static path and a variable component.
+        Fresh responses are served from the response cache, stale ones are revalidated with a conditional request.
 
         Args:
             static_path (str): The static part of the URL.
@@ -126,10 +478,149 @@ def fetch_data_sync(static_path, variable):
         Raises:
             FetchingError: If the fetch operation fails with a non-200 status code.
         """
-    response = requests.get(''.join([static_path, variable]))
-
-    if response.status_code == 200:
+    url = ''.join([static_path, variable])
+    cache = get_response_cache()
+    cached = cache.get(url) if cache else None
+    if cached and cached.is_fresh:
+        metrics.inc('cache_hits_total', cache='http')
+        return cached.data
+
+    metrics.inc('cache_misses_total', cache='http')
+    headers = cached.conditional_headers() if cached else None
+    with metrics.timed('http_fetch_seconds'):
+        response = get_http_session().get(url, headers=headers)
+    metrics.inc('http_requests_total', status=response.status_code)
+
+    if response.status_code == 304 and cached:
+        cache.revalidate(url)
+        return cached.data
+    elif response.status_code == 200:
+        if cache:
+            cache.put(url, response.text,
+                      etag=response.headers.get('ETag'),
+                      last_modified=response.headers.get('Last-Modified'))
         return response.json()
     else:
         raise FetchingError(
             f"Error fetching {response.request.url}: {response.status_code}")
+
+
+class LRUCache:
+    """
+        Thread-safe, size bounded mapping that evicts the least recently used entries first.
+
+        Attributes:
+            maxsize (int): The maximum number of entries kept in the cache.
+
+        Methods:
+            get: Returns the value of a key and marks it as recently used.
+            put: Stores the value of a key, evicting the least recently used entries if the cache is full.
+        """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+CACHE_POKEMONS = LRUCache(maxsize=Config.POKEMON_CACHE_SIZE)
+
+
+def parse_pokemon(pokemon_data: dict) -> dict:
+    """
+        Converts a PokeAPI `/pokemon` payload into the keyword arguments of the `Pokemon` constructor.
+
+        Args:
+            pokemon_data (dict): The JSON data fetched from the `/pokemon` endpoint.
+
+        Returns:
+            dict: The `poke_id`, `name`, `moves` and `stats` of the Pokémon.
+        """
+    return {'poke_id': pokemon_data['id'],
+            'name': pokemon_data['name'],
+            'moves': tuple(x['move']['name'] for x in pokemon_data['moves']),
+            'stats': {x['stat']['name']: (x['base_stat'], x['effort'])
+                      for x in pokemon_data['stats']}}
+
+
+def fetch_pokemon_data(name_or_id) -> dict:
+    """
+        Returns the `Pokemon` constructor arguments for a Pokémon name or id, fetching them only on a CACHE_POKEMONS miss
+        that the offline catalog doesn't have either.
+        A fetched Pokémon is cached under its name and its id, so later lookups by either of them are hits.
+
+        Args:
+            name_or_id (str | int): The name or the id of the Pokémon.
+
+        Returns:
+            dict: The `poke_id`, `name`, `moves` and `stats` of the Pokémon.
+
+        Raises:
+            FetchingError: If the Pokémon can't be fetched.
+        """
+    key = _pokemon_key(name_or_id)
+    pokemon_data = CACHE_POKEMONS.get(key)
+    if pokemon_data is None:
+        catalog = get_catalog()
+        pokemon_data = catalog.pokemon(key) if catalog is not None else None
+        if catalog is not None:
+            metrics.inc('cache_misses_total' if pokemon_data is None else 'cache_hits_total',
+                        cache='catalog')
+        if pokemon_data is None:
+            pokemon_data = parse_pokemon(fetch_data_sync(POKE_API_POKEMON, key))
+        for alias in {key, pokemon_data['name'], str(pokemon_data['poke_id'])}:
+            CACHE_POKEMONS.put(alias, pokemon_data)
+    return dict(pokemon_data)
+
+
+def fetch_pokemons_data(*names_or_ids) -> list:
+    """
+        Concurrently fetches the `Pokemon` constructor arguments for several Pokémon over the shared keep-alive session.
+        A Pokémon requested more than once is fetched only once.
+
+        Args:
+            *names_or_ids (str | int): The names or the ids of the Pokémon.
+
+        Returns:
+            list: The constructor arguments of the Pokémon, in the order they were requested.
+
+        Raises:
+            FetchingError: If any of the Pokémon can't be fetched.
+        """
+    global _http_executor
+    if _http_executor is None:
+        with _http_executor_lock:
+            if _http_executor is None:
+                _http_executor = ThreadPoolExecutor(max_workers=Config.HTTP_POOL_SIZE,
+                                                    thread_name_prefix='poke-fetch')
+
+    keys = [_pokemon_key(x) for x in names_or_ids]
+    unique_keys = list(dict.fromkeys(keys))
+    pokemons_data = dict(zip(unique_keys,
+                             _http_executor.map(fetch_pokemon_data,
+                                                unique_keys)))
+    return [dict(pokemons_data[key]) for key in keys]
+
+
+def _pokemon_key(name_or_id) -> str:
+    return str(name_or_id).strip().lower()
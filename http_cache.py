@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class CachedResponse:
+    """
+        A JSON response previously stored in the `ResponseCache`.
+
+        Attributes:
+            url (str): The URL the response was fetched from.
+            body (str): The raw JSON body of the response.
+            etag (str): The `ETag` header sent by the server, if any.
+            last_modified (str): The `Last-Modified` header sent by the server, if any.
+            stored_at (float): Unix time of the last successful fetch or revalidation.
+            ttl_s (float): Number of seconds the response is considered fresh.
+        """
+    def __init__(self, url: str, body: str, etag: str, last_modified: str,
+                 stored_at: float, ttl_s: float):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.ttl_s = ttl_s
+
+    @property
+    def data(self) -> dict:
+        return json.loads(self.body)
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() - self.stored_at < self.ttl_s
+
+    def conditional_headers(self) -> dict:
+        """
+            Builds the request headers used to revalidate a stale response with the server.
+
+            Returns:
+                dict: `If-None-Match` and/or `If-Modified-Since` headers, empty if the server sent neither validator.
+            """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+        Persistent, URL keyed cache of JSON API responses stored in a SQLite file.
+
+        Fresh entries are served without touching the network, stale entries keep their `ETag`/`Last-Modified`
+        validators so they can be revalidated with a conditional request. The total size of the stored bodies is
+        bounded by `max_bytes`, the least recently used entries are evicted first. The total is kept up to date by
+        `put`, and only read back from the file, which other processes may write too, when it goes over the bound.
+
+        Attributes:
+            path (str): Location of the SQLite database file.
+            ttl_s (float): Number of seconds a stored response is considered fresh.
+            max_bytes (int): Upper bound for the total size of the stored response bodies.
+
+        Methods:
+            get: Returns the stored response for a URL, fresh or stale.
+            put: Stores a response and evicts the least recently used entries if the cache grew too big.
+            revalidate: Marks a stored response as fresh again after a `304 Not Modified`.
+            clear: Removes all stored responses.
+        """
+    def __init__(self, path: str, ttl_s: float, max_bytes: int):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, timeout=30,
+                                           check_same_thread=False,
+                                           isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS http_response ('
+            ' url TEXT PRIMARY KEY,'
+            ' body TEXT NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' stored_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL,'
+            ' size INTEGER NOT NULL)')
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS http_response_accessed_at'
+            ' ON http_response (accessed_at)')
+        self._size = self.__stored_size()
+
+    def get(self, url: str):
+        """
+            Looks up the stored response for a URL and marks it as recently used.
+
+            Args:
+                url (str): The URL of the response.
+
+            Returns:
+                CachedResponse: The stored response, or None if the URL is not cached.
+            """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT body, etag, last_modified, stored_at'
+                ' FROM http_response WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                'UPDATE http_response SET accessed_at = ? WHERE url = ?',
+                (time.time(), url))
+
+        return CachedResponse(url, *row, ttl_s=self.ttl_s)
+
+    def put(self, url: str, body: str, etag: str = None,
+            last_modified: str = None):
+        """
+            Stores a response body together with its validators, replacing any previous entry for the URL.
+
+            Args:
+                url (str): The URL of the response.
+                body (str): The raw JSON body of the response.
+                etag (str, optional): The `ETag` header sent by the server.
+                last_modified (str, optional): The `Last-Modified` header sent by the server.
+            """
+        size = len(body.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute(
+                'SELECT size FROM http_response WHERE url = ?', (url,)).fetchone()
+            self._connection.execute(
+                'INSERT OR REPLACE INTO http_response'
+                ' (url, body, etag, last_modified, stored_at, accessed_at, size)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, body, etag, last_modified, now, now, size))
+            self._size += size - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self.__evict()
+
+    def revalidate(self, url: str):
+        """
+            Restarts the TTL of a stored response after the server answered a conditional request with `304 Not Modified`.
+
+            Args:
+                url (str): The URL of the response.
+            """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                'UPDATE http_response SET stored_at = ?, accessed_at = ?'
+                ' WHERE url = ?', (now, now, url))
+
+    def clear(self):
+        """Removes all stored responses."""
+        with self._lock:
+            self._connection.execute('DELETE FROM http_response')
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __stored_size(self) -> int:
+        total, = self._connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM http_response').fetchone()
+        return total
+
+    def __evict(self):
+        """Deletes the least recently used responses until the stored bodies fit in `max_bytes`."""
+        total = self.__stored_size()
+        evicted = []
+        if total > self.max_bytes:
+            # Walks the accessed_at index only as far as needed
+            for url, size in self._connection.execute(
+                    'SELECT url, size FROM http_response ORDER BY accessed_at'):
+                evicted.append((url,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+        self._connection.executemany(
+            'DELETE FROM http_response WHERE url = ?', evicted)
+        self._size = total
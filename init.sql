@@ -45,6 +45,10 @@ CREATE TABLE IF NOT EXISTS fact_battle (
     attack_pokemon_id_1 INT,
     attack_pokemon_id_2 INT,
     battle_duration_s INT,
+    turns INT,
+    seed BIGINT,
+    catalog_version VARCHAR(16),
+    end_reason VARCHAR(16),
     winner_pokemon_id INT,
     FOREIGN KEY (pokemon_id_1) REFERENCES dim_pokemon(id),
     FOREIGN KEY (pokemon_id_2) REFERENCES dim_pokemon(id),
@@ -52,3 +56,26 @@ CREATE TABLE IF NOT EXISTS fact_battle (
     FOREIGN KEY (attack_pokemon_id_2) REFERENCES fact_attack(id),
     FOREIGN KEY (winner_pokemon_id) REFERENCES dim_pokemon(id)
 );
+
+-- Columns added since fact_battle was first created, for databases initialized by an older init.sql
+ALTER TABLE fact_battle ADD COLUMN IF NOT EXISTS turns INT;
+ALTER TABLE fact_battle ADD COLUMN IF NOT EXISTS seed BIGINT;
+ALTER TABLE fact_battle ADD COLUMN IF NOT EXISTS catalog_version VARCHAR(16);
+ALTER TABLE fact_battle ADD COLUMN IF NOT EXISTS end_reason VARCHAR(16);
+
+CREATE INDEX IF NOT EXISTS ix_fact_battle_pokemon_id_1 ON fact_battle (pokemon_id_1);
+CREATE INDEX IF NOT EXISTS ix_fact_battle_pokemon_id_2 ON fact_battle (pokemon_id_2);
+CREATE INDEX IF NOT EXISTS ix_fact_battle_winner_pokemon_id ON fact_battle (winner_pokemon_id);
+CREATE INDEX IF NOT EXISTS ix_fact_battle_timestamp_ ON fact_battle (timestamp_);
+
+CREATE TABLE IF NOT EXISTS agg_matchup (
+    pokemon_id_1 INT,
+    pokemon_id_2 INT,
+    battles INT NOT NULL DEFAULT 0,
+    wins INT NOT NULL DEFAULT 0,
+    total_duration_s FLOAT NOT NULL DEFAULT 0,
+    total_turns INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (pokemon_id_1, pokemon_id_2),
+    FOREIGN KEY (pokemon_id_1) REFERENCES dim_pokemon(id),
+    FOREIGN KEY (pokemon_id_2) REFERENCES dim_pokemon(id)
+);
@@ -1,103 +1,196 @@
-import asyncio
+import random
+import sys
+from collections import namedtuple
 from time import perf_counter
 
-from battle_stat.battle_notes import init_db_cache, take_battle_notes
-from fetch_poke_data import fetch_stats, fetch_data_sync, \
-    POKE_API_POKEMON
-from model.pokemon import Pokemon\
+import metrics
+from config import Config
+from model.pokemon import Pokemon, catalog_version
 
+# The database and the PokeAPI clients are imported by the functions using them, so processes only running battles,
+# e.g. the workers of a tournament, don't pay for importing SQLAlchemy, asyncio and the HTTP clients
 
-def fetch_init_data():
+BattleResult = namedtuple('BattleResult', ['winner', 'turns', 'errors', 'seed', 'end_reason'])
+TurnLog = namedtuple('TurnLog', ['turn', 'attacker', 'move', 'damage', 'defender_hp'])
+
+# How a battle ended, recorded in `fact_battle.end_reason`
+KNOCKOUT = 'knockout'
+TOO_MANY_ERRORS = 'errors'
+MAX_TURNS = 'max_turns'
+STALLED = 'stalled'
+
+# Seeds of the battles, drawn from the OS so forked workers don't repeat each other's battles
+_seeds = random.SystemRandom()
+
+
+def fetch_init_data(background: bool = False):
     """
         Initializes the application by loading and fetching Pokémon stats asynchronously.
         Measures and prints the time taken to fetch all Pokémon stats.
+        The crawl is skipped when there is an offline catalog, the moves are then read from it as they are needed.
+
+        Args:
+            background (bool, optional): Crawl in a background thread and return right away, battles resolve their own
+                moves meanwhile and await the ones the crawl is fetching. Defaults to False.
         """
-    print('Loading pokemon data...')
+    import asyncio
+    from catalog import get_catalog
+    from fetch_poke_data import fetch_stats, start_stat_crawl
+
+    catalog = get_catalog()
+    if catalog is not None:
+        print(f'Pokemon data loaded from {catalog.path} ({len(catalog)} pokemons, {catalog.move_count} moves).')
+        return
+
     t1 = perf_counter()
+    if background:
+        print('Loading pokemon data in the background...')
+        start_stat_crawl().add_done_callback(
+            lambda _: metrics.observe('crawl_seconds', perf_counter() - t1))
+        return
+
+    print('Loading pokemon data...')
     asyncio.run(fetch_stats())
     t2 = perf_counter() - t1
+    metrics.observe('crawl_seconds', t2)
     print('Pokemon stats are ready. ({:.2f}s)'.format(t2))
 
 
 def init_pokemon_battlefield():
     """
         Initializes the Pokémon battlefield by prompting the user to choose two Pokémon.
-        Fetches data for the chosen Pokémon and creates `Pokemon` instances for them.
+        Fetches data for the chosen Pokémon, resolves all of their moves and creates `Pokemon` instances for them,
+        so the battle itself doesn't need the network.
 
         Returns:
             tuple: A pair of `Pokemon` objects representing the chosen Pokémon for the battle.
         """
+    from fetch_poke_data import fetch_pokemons_data, resolve_move_pool
+
     print('Welcome to the Pokemon battlefield game!')
     print('Please choose your pokemons:')
     pokemon1_name = input('Pokemon 1: ')
     pokemon2_name = input('Pokemon 2: ')
 
     print('Preparing the pokemons...')
-    pokemon1_data = fetch_data_sync(POKE_API_POKEMON, pokemon1_name)
-    pokemon2_data = fetch_data_sync(POKE_API_POKEMON, pokemon2_name)
-
-    pokemon1_obj = Pokemon(poke_id=pokemon1_data['id'],
-                           name=pokemon1_data['name'],
-                           moves=[x['move']['name'] for x in
-                                  pokemon1_data['moves']],
-                           stats={
-                               x['stat']['name']: (x['base_stat'], x['effort'])
-                               for x in pokemon1_data['stats']})
-    pokemon2_obj = Pokemon(poke_id=pokemon2_data['id'],
-                           name=pokemon2_data['name'],
-                           moves=[x['move']['name'] for x in
-                                  pokemon2_data['moves']],
-                           stats={
-                               x['stat']['name']: (x['base_stat'], x['effort'])
-                               for x in pokemon2_data['stats']})
+    pokemon1_data, pokemon2_data = resolve_move_pool(
+        *fetch_pokemons_data(pokemon1_name, pokemon2_name))
+
+    pokemon1_obj = Pokemon(**pokemon1_data)
+    pokemon2_obj = Pokemon(**pokemon2_data)
 
     return pokemon1_obj, pokemon2_obj
 
 
-def battle(pkm1: Pokemon, pkm2: Pokemon):
+def battle(pkm1: Pokemon, pkm2: Pokemon, verbose: bool = True,
+           take_notes: bool = True, seed: int = None,
+           turn_log: list = None, max_turns: int = None,
+           stall_turns: int = None) -> BattleResult:
     """
         Simulates a battle between two Pokémon, determining the order based on their speed.
         Continuously alternates attacks between the two Pokémon until one's HP drops to 0 or below.
         Records battle notes and handles exceptions during the battle process.
+        A battle that runs out of turns, or in which neither Pokémon loses HP for `stall_turns` turns in a row, e.g.
+        when both only have moves without power, ends in a draw.
+
+        Every random draw of the battle, the move choices, the IV and nature rolls and the damage variance, comes from one
+        generator seeded with `seed`: fresh Pokémon battling with the same seed and the same catalog data fight the same
+        battle again, see `replay.py`.
 
         Args:
             pkm1 (Pokemon): The first Pokémon participant in the battle.
             pkm2 (Pokemon): The second Pokémon participant in the battle.
+            verbose (bool, optional): Whether to print the progress and the outcome of the battle. Defaults to True.
+            take_notes (bool, optional): Whether to queue battle notes after every turn. Defaults to True. The notes of
+                the turns are skipped anyway when `Config.NOTES_PER_TURN` is off.
+            seed (int, optional): Seed of the battle's random generator, a random seed by default.
+            turn_log (list, optional): A list every attack is appended to, as a `TurnLog`.
+            max_turns (int, optional): Turn budget of the battle. Defaults to `Config.BATTLE_MAX_TURNS`.
+            stall_turns (int, optional): Turns in a row without any HP lost after which the battle is stalled. Defaults
+                to `Config.BATTLE_STALL_TURNS`.
 
-        Prints the outcome of the battle, including the winner and any errors that occurred.
+        Returns:
+            BattleResult: The winner (None for a draw), the number of turns, the number of errors, the seed of the
+                battle and how it ended, one of `KNOCKOUT`, `TOO_MANY_ERRORS`, `MAX_TURNS` and `STALLED`.
         """
+    log = print if verbose else _silent
+    take_notes = take_notes and Config.NOTES_PER_TURN
+    if take_notes:
+        from battle_stat.notes_writer import queue_battle_notes
+    if seed is None:
+        seed = _seeds.getrandbits(63)
+    if max_turns is None:
+        max_turns = Config.BATTLE_MAX_TURNS
+    if stall_turns is None:
+        stall_turns = Config.BATTLE_STALL_TURNS
+    pkm1.rng = pkm2.rng = random.Random(seed)
+
     if pkm1.speed > pkm2.speed:
         attacker, defender = pkm1, pkm2
     else:
         attacker, defender = pkm2, pkm1
 
-    print('Battle starts...')
+    log('Battle starts...')
     error_count = 0
+    turns = 0
+    stalled_turns = 0
     while True:
+        total_hp = attacker.hp + defender.hp
         try:
+            turns += 1
             # Attacker's turn
-            attacker.attack(defender)
+            damage = attacker.attack(defender)
+            if turn_log is not None:
+                turn_log.append(TurnLog(turns, attacker.name,
+                                        attacker.current_attack.move.name,
+                                        damage, defender.hp))
             if defender.hp <= 0:
-                print(
-                    f"The winner is: {attacker.name} with {attacker.hp}HP left")
-                break
+                log(f"The winner is: {attacker.name} with {attacker.hp}HP left")
+                metrics.inc('battles_total', outcome='win')
+                return BattleResult(attacker, turns, error_count, seed, KNOCKOUT)
 
             # Defender's turn
-            defender.attack(attacker)
+            damage = defender.attack(attacker)
+            if turn_log is not None:
+                turn_log.append(TurnLog(turns, defender.name,
+                                        defender.current_attack.move.name,
+                                        damage, attacker.hp))
             if attacker.hp <= 0:
-                print(
-                    f"The winner is: {defender.name} with {defender.hp}HP left")
-                break
-            take_battle_notes(attacker, defender)
+                log(f"The winner is: {defender.name} with {defender.hp}HP left")
+                metrics.inc('battles_total', outcome='win')
+                return BattleResult(defender, turns, error_count, seed, KNOCKOUT)
+            if take_notes:
+                queue_battle_notes(attacker, defender)
 
         except Exception as e:
-            print(f"An error occurred: {e.args}")
+            log(f"An error occurred: {e.args}")
+            metrics.inc('battle_errors_total', error=type(e).__name__)
             error_count += 1
             if error_count > 3:
-                print("[DRAW] Too many errors, stopping the battle.")
-                print(f"{attacker.name} left with {attacker.hp}HP")
-                print(f"{defender.name} left with {defender.hp}HP")
-                break
+                log("[DRAW] Too many errors, stopping the battle.")
+                return _draw(log, attacker, defender, turns, error_count, seed,
+                             TOO_MANY_ERRORS)
+
+        stalled_turns = stalled_turns + 1 if attacker.hp + defender.hp == total_hp else 0
+        if stalled_turns >= stall_turns:
+            log(f"[DRAW] No HP lost for {stalled_turns} turns, stopping the battle.")
+            return _draw(log, attacker, defender, turns, error_count, seed, STALLED)
+        if turns >= max_turns:
+            log(f"[DRAW] No winner after {turns} turns, stopping the battle.")
+            return _draw(log, attacker, defender, turns, error_count, seed, MAX_TURNS)
+
+
+def _draw(log, attacker: Pokemon, defender: Pokemon, turns: int,
+          error_count: int, seed: int, end_reason: str) -> BattleResult:
+    log(f"{attacker.name} left with {attacker.hp}HP")
+    log(f"{defender.name} left with {defender.hp}HP")
+    metrics.inc('battles_total', outcome='draw')
+    metrics.inc('battle_draws_total', reason=end_reason)
+    return BattleResult(None, turns, error_count, seed, end_reason)
+
+
+def _silent(*args, **kwargs):
+    pass
 
 
 if __name__ == "__main__":
@@ -106,8 +199,42 @@ if __name__ == "__main__":
         Initializes data and database cache, then continuously prompts the user to start a new Pokémon battle.
         Fetches initial data for Pokémon, initializes the battlefield, and conducts the battle between the chosen Pokémon.
         Records battle notes and handles exceptions.
+        `python main.py simulate ...` runs headless batch simulations instead, see `simulate.py`, and
+        `python main.py tournament ...` runs a multi-core round-robin tournament, see `tournament.py`, and
+        `python main.py monte-carlo ...` estimates the win probability of a matchup, see `monte_carlo.py`, and
+        `python main.py export ...` exports the battle history to NumPy column files, see `battle_stat/export.py`, and
+        `python main.py replay ...` replays a recorded battle from its seed, see `replay.py`, and
+        `python main.py catalog` builds the offline Pokémon and move catalog, see `catalog.py`, and
+        `python main.py serve` runs the HTTP battle service, see `server.py`.
         """
-    fetch_init_data()
+    if sys.argv[1:2] == ['simulate']:
+        from simulate import main as simulate_main
+        sys.exit(simulate_main(sys.argv[2:]))
+    if sys.argv[1:2] == ['tournament']:
+        from tournament import main as tournament_main
+        sys.exit(tournament_main(sys.argv[2:]))
+    if sys.argv[1:2] == ['monte-carlo']:
+        from monte_carlo import main as monte_carlo_main
+        sys.exit(monte_carlo_main(sys.argv[2:]))
+    if sys.argv[1:2] == ['export']:
+        from battle_stat.export import main as export_main
+        sys.exit(export_main(sys.argv[2:]))
+    if sys.argv[1:2] == ['replay']:
+        from replay import main as replay_main
+        sys.exit(replay_main(sys.argv[2:]))
+    if sys.argv[1:2] == ['catalog']:
+        from catalog import main as catalog_main
+        sys.exit(catalog_main(sys.argv[2:]))
+    if sys.argv[1:2] == ['serve']:
+        from server import main as serve_main
+        sys.exit(serve_main(sys.argv[2:]))
+
+    from battle_stat.battle_notes import init_db_cache
+    from battle_stat.database import init_schema
+    from battle_stat.notes_writer import queue_battle_notes, flush_battle_notes
+
+    fetch_init_data(background=True)
+    init_schema()
     init_db_cache()
 
     while True:
@@ -119,9 +246,11 @@ if __name__ == "__main__":
         try:
             pokemon1, pokemon2 = init_pokemon_battlefield()
             t1 = perf_counter()
-            battle(pokemon1, pokemon2)
+            result = battle(pokemon1, pokemon2)
             t2 = perf_counter() - t1
 
-            take_battle_notes(pokemon1, pokemon2, t2)
+            queue_battle_notes(pokemon1, pokemon2, t2, result.turns, result.seed,
+                               catalog_version(pokemon1, pokemon2), result.end_reason)
+            flush_battle_notes()
         except Exception as e:
             print(e)
@@ -0,0 +1,238 @@
+"""
+    Counters and histograms of the hot paths, exposed as JSON and in the Prometheus text format.
+
+    Recording is disabled unless `Config.METRICS_ENABLED` is set or `enable()` is called. While disabled, `inc` and
+    `observe` return right away and `timed` returns a shared no-op context manager.
+"""
+import bisect
+import json
+import threading
+from time import perf_counter
+
+from config import Config
+
+# Upper bounds of the histogram buckets, in seconds for timings
+TIME_BUCKETS = (0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001,
+                0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """
+        Distribution of observed values over fixed buckets.
+
+        Attributes:
+            buckets (tuple): Upper bounds of the buckets, the last bucket being unbounded.
+            counts (list): Number of observations per bucket, not cumulative.
+            sum (float): Sum of the observed values.
+            count (int): Number of observations.
+        """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple = TIME_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list:
+        """
+            Returns:
+                list: `(upper bound, observations up to it)` tuples as Prometheus expects them, the last bound being inf.
+            """
+        total, counts = 0, []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            counts.append((bound, total))
+        return counts
+
+
+class _Timer:
+    """Observes the time spent in a `with` or `async with` block."""
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, perf_counter() - self.start, **self.labels)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        self.__exit__(*exc_info)
+
+
+class _NoTimer:
+    """The timer of disabled metrics, doing nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+class MetricsRegistry:
+    """
+        Thread-safe store of counters and histograms, identified by a name and optional labels.
+
+        Methods:
+            inc: Increments a counter.
+            observe: Adds a value to a histogram.
+            timed: Context manager observing the time spent in its block.
+            to_dict: The metrics as plain data, for a JSON dump.
+            to_prometheus: The metrics in the Prometheus text exposition format.
+            reset: Forgets all the metrics.
+        """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: tuple = TIME_BUCKETS,
+                **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def timed(self, name: str, **labels):
+        return _Timer(self, name, labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_dict(self) -> dict:
+        """
+            Returns:
+                dict: `{'counters': [...], 'histograms': [...]}`, every metric with its name and labels.
+            """
+        with self._lock:
+            return {
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                'histograms': [{'name': name, 'labels': dict(labels),
+                                'count': x.count, 'sum': x.sum,
+                                'buckets': [[bound, count] for bound, count in
+                                            x.cumulative_counts()[:-1]]}
+                               for (name, labels), x in sorted(self.histograms.items())],
+            }
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for metric_type, metrics in (('counter', self.counters),
+                                         ('histogram', self.histograms)):
+                declared = set()
+                for (name, labels), value in sorted(metrics.items()):
+                    if name not in declared:
+                        lines.append(f'# TYPE {name} {metric_type}')
+                        declared.add(name)
+                    if metric_type == 'counter':
+                        lines.append(f'{name}{_labels(labels)} {value}')
+                        continue
+                    for bound, count in value.cumulative_counts():
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {count}')
+                    lines.append(f'{name}_sum{_labels(labels)} {value.sum}')
+                    lines.append(f'{name}_count{_labels(labels)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _key(name: str, labels: dict) -> tuple:
+    # Label values are kept as strings, so the keys of a metric sort whatever the types it was recorded with
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"')
+               .replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"'
+                          for (name, _), value in zip(labels, escaped)) + '}'
+
+
+REGISTRY = MetricsRegistry()
+_enabled = Config.METRICS_ENABLED
+
+
+def enable(enabled: bool = True):
+    """Starts, or stops, recording the metrics."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Increments the counter `name`, for the given labels, by `value`."""
+    if _enabled:
+        REGISTRY.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, buckets: tuple = TIME_BUCKETS, **labels):
+    """Adds `value` to the histogram `name`, for the given labels."""
+    if _enabled:
+        REGISTRY.observe(name, value, buckets, **labels)
+
+
+def timed(name: str, **labels):
+    """
+        Context manager adding the seconds spent in its block to the histogram `name`.
+
+        Example:
+            with metrics.timed('move_resolution_seconds'):
+                ...
+        """
+    if _enabled:
+        return REGISTRY.timed(name, **labels)
+    return _NO_TIMER
+
+
+def to_json() -> str:
+    return json.dumps(REGISTRY.to_dict(), indent=2)
+
+
+def to_prometheus() -> str:
+    return REGISTRY.to_prometheus()
+
+
+def dump(path: str):
+    """Writes the metrics to a file, in the Prometheus text format for a `.prom` file and as JSON otherwise."""
+    with open(path, 'w') as f:
+        f.write(to_prometheus() if path.endswith('.prom') else to_json())
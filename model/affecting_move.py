@@ -2,6 +2,12 @@ import random
 
 from model.move import Move
 
+# Stat stages are clamped to ±MAX_STAGE, the multiplier of stage s is STAGE_MULTIPLIERS[s + MAX_STAGE]:
+# (2 + s) / 2 for a raised stat and 2 / (2 - s) for a lowered one
+MAX_STAGE = 6
+STAGE_MULTIPLIERS = tuple((2 + s) / 2 if s >= 0 else 2 / (2 - s)
+                          for s in range(-MAX_STAGE, MAX_STAGE + 1))
+
 
 class AffectingMove:
     """
@@ -9,59 +15,68 @@ class AffectingMove:
 
         Attributes:
             stat_type (str): The type of stat affected by the move (e.g., 'attack', 'defense').
-            stat_changed (float): The base stat that is modified by the move.
+            stat (float): The stat calculated once from the base stat, IVs, EVs, level, and nature.
+            stage (int): The stages the stat was raised, or lowered, by the uses of the move, clamped to ±6.
+            stat_changed (float): The stat multiplied by the multiplier of its stage, updated when the stage moves.
             effort_ev (int): The effort values (EVs) associated with the stat.
             move (Move): The move causing the stat change.
             iv (float): The individual values (IVs), randomly determined for the stat.
             level (int): The level of the Pokémon, affecting the stat calculation.
             nature_modifier (float): A modifier based on the Pokémon's nature, affecting the stat.
 
+        The IV and the nature modifier are rolled with the `rng` generator, the global `random` module by default, so a
+        battle seeding its own generator is reproducible.
+
         Methods:
-            calculate_stat: Recalculates the `stat_changed` attribute considering base stat, IVs, EVs, level, and nature.
-            apply_baste_stat_change: Applies the move's effect on the stat, adjusting `stat_changed` based on the move's power.
+            calculate_stat: Calculates the `stat` attribute considering base stat, IVs, EVs, level, and nature.
+            apply_baste_stat_change: Applies the move's effect on the stat, moving its stage by the move's change.
             attacking_damage: Calculates the damage dealt by an attack, considering the defender's modified stats.
         """
-    def __init__(self, stat_type: str, base_stat: float, effort_ev: int, move: Move):
+    __slots__ = ('stat_type', 'stat', 'stage', 'stat_changed', 'effort_ev',
+                 'move', 'iv', 'level', 'nature_modifier')
+
+    def __init__(self, stat_type: str, base_stat: float, effort_ev: int, move: Move,
+                 rng=random):
         self.stat_type = stat_type  # ['attack' | 'defense', ...]
-        self.stat_changed = base_stat
+        self.stat = base_stat
+        self.stage = 0
         self.effort_ev = effort_ev
         self.move: Move = move
-        self.iv = random.uniform(0, 15)
+        self.iv = rng.uniform(0, 15)
         self.level = 1
-        self.nature_modifier = random.uniform(0.85, 1.0)
+        self.nature_modifier = rng.uniform(0.85, 1.0)
 
         if stat_type:
             self.calculate_stat()
+        self.stat_changed = self.stat
 
     def calculate_stat(self):
         """
-            Recalculates the modified stat value considering base stat, IVs, EVs, level, and nature modifier. This method updates
-            the `stat_changed` attribute based on these factors, following the Pokémon stat calculation formula.
+            Calculates the stat value considering base stat, IVs, EVs, level, and nature modifier, following the Pokémon stat
+            calculation formula. The stat is calculated once, stat changes only move its stage.
             """
-        self.stat_changed = \
-            ((((2 * self.stat_changed + self.iv + (
+        self.stat = \
+            ((((2 * self.stat + self.iv + (
                         self.effort_ev // 4)) * self.level) // 100 + 5)
              * self.nature_modifier)
 
     def apply_baste_stat_change(self):
         """
-            Applies the base stat change induced by the move. If the move increases the stat, it's boosted by a factor related
-            to the move's change value. If the move decreases the stat, it's reduced according to a predefined decrease scale.
-            This method updates the `stat_changed` attribute accordingly.
+            Applies the stat change induced by the move: the stage of the stat moves by the move's change value, within ±6
+            stages. A raised stat is boosted by (2 + stage) / 2 and a lowered one reduced to 2 / (2 - stage).
             """
-        decreases = (0.667, 0.5, 0.4, 0.333, 0.285, 0.25)
-        if self.move.change > 0:
-            self.stat_changed *= (1 + 0.5 * self.move.change)
-        if self.move.change < 0:
-            self.stat_changed *= decreases[abs(self.move.change) - 1]
+        if self.move.change:
+            self.stage = max(-MAX_STAGE, min(MAX_STAGE, self.stage + self.move.change))
+            self.stat_changed = self.stat * STAGE_MULTIPLIERS[self.stage + MAX_STAGE]
 
-    def attacking_damage(self, defense) -> float:
+    def attacking_damage(self, defense, rng=random) -> float:
         """
             Calculates the damage dealt by this move to a defender, considering the current modified stats of both the attacker
             and the defender.
 
             Args:
                 defense (AffectingMove): The defending Pokémon's corresponding `AffectingMove` instance, representing its defense stat.
+                rng (random.Random, optional): The generator of the damage variance. Defaults to the global `random` module.
 
             Returns:
                 float: The calculated damage based on the move's power, the attacker's and defender's modified stats, and random
@@ -76,5 +91,5 @@ class AffectingMove:
         damage = (((((2 * self.level) / 5 + 2) *
                     self.move.power * self.stat_changed / defense.stat_changed)
                    / 50) + 2)
-        damage *= random.uniform(0.85, 1.0)
+        damage *= rng.uniform(0.85, 1.0)
         return damage
@@ -1,11 +1,69 @@
 
 
 class Move:
+    """
+        An immutable move, shared by every Pokémon using it. Use `intern_move` instead of creating moves directly.
+
+        Attributes:
+            name (str): Name of the move.
+            power (int): Power of the move, None for moves that deal no damage.
+            change (int): Stages by which the move changes the affected stat.
+        """
+    __slots__ = ('name', 'power', 'change')
 
     def __init__(self, name: str, power: int, change: int):
-        self.name = name
-        self.power = power
-        self.change = change
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'power', power)
+        object.__setattr__(self, 'change', change)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, key):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __reduce__(self):
+        return intern_move, (self.name, self.power, self.change)
 
     def details(self):
         return f'Move({self.name}, {self.power}, {self.change})'
+
+
+# Interned moves by (name, power, change)
+MOVE_REGISTRY = {}
+
+# Resolved moves by name: {move: {stat: (power, change)}}, or (power, 0) for moves changing no stat. Filled by
+# fetch_poke_data, which re-exports it, and lives here so battles don't import the HTTP clients.
+CACHE_MOVES = {}
+
+
+def intern_move(name: str, power: int, change: int) -> Move:
+    """
+        Returns the shared `Move` for a name, power and change, creating it on first use.
+
+        Args:
+            name (str): Name of the move.
+            power (int): Power of the move.
+            change (int): Stages by which the move changes the affected stat.
+
+        Returns:
+            Move: The interned move.
+        """
+    key = (name, power, change)
+    move = MOVE_REGISTRY.get(key)
+    if move is None:
+        move = MOVE_REGISTRY.setdefault(key, Move(name, power, change))
+    return move
+
+
+def build_move_registry(cache_moves: dict):
+    """
+        Interns every move of a move cache up front, e.g. before forking worker processes so that they share the moves.
+
+        Args:
+            cache_moves (dict): Moves in the format of `fetch_poke_data.CACHE_MOVES`.
+        """
+    for move_name, entry in cache_moves.items():
+        for power, change in (entry.values() if isinstance(entry, dict)
+                              else (entry,)):
+            intern_move(move_name, power, change)
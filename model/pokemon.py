@@ -1,13 +1,16 @@
+import hashlib
+import json
 import random
 
+import metrics
 from model.affecting_move import AffectingMove
-from exceptions import StatsMissMatchError
-from fetch_poke_data import CACHE_MOVES, fetch_data_sync, \
-    POKE_API_MOVE
-from model.move import Move
+from exceptions import StatsMissMatchError, UnresolvedMoveError
+from model.move import CACHE_MOVES, intern_move
 
 ATTACK = 'attack'
 DEFENSE = 'defense'
+# Version of the battle rules, part of the catalog version: a battle recorded under other rules doesn't replay the same
+RULES_VERSION = 2
 
 
 class Pokemon:
@@ -22,13 +25,22 @@ class Pokemon:
             speed (float): Speed stat of the Pokémon, determining turn order in battles.
             stats (dict): Dictionary containing various stats of the Pokémon, e.g., {'stat_name': (base_stat, effort)}.
             current_attack (AffectingMove): The current move set for an attack, represented as an AffectingMove instance.
-            attacks (list): List of AffectingMove instances representing moves the Pokémon has used.
+            attacks (dict): AffectingMove instances of the moves the Pokémon has used, by move name.
+            move_index (dict): The stat and the interned Move of every usable move when used to attack or to defend,
+                               e.g., {'move_name': {'attack': (stat_name, Move), 'defense': (stat_name, Move)}}.
+            usable_moves (tuple): Names of the moves whose stats match the Pokémon's stats.
+            rng (random.Random): The generator of the Pokémon's move choices, IV and nature rolls and damage variance,
+                                 the global `random` module by default. `battle` gives both Pokémon its seeded generator.
 
         Methods:
             set_current_move: Sets the current move for the Pokémon from its list of possible moves, considering the move type.
             attack: Executes an attack on an opponent Pokémon, calculating and applying damage.
         """
-    def __init__(self, poke_id: int, name: str, moves: list, stats: dict):
+    __slots__ = ('poke_id', 'name', 'moves', 'hp', 'speed', 'stats',
+                 'current_attack', 'attacks', 'move_index', 'usable_moves', 'rng')
+
+    def __init__(self, poke_id: int, name: str, moves: list, stats: dict,
+                 rng=random):
         self.poke_id = poke_id
         self.name = name
         self.moves = moves
@@ -36,62 +48,81 @@ class Pokemon:
         self.speed = stats['speed'][0]
         self.stats = stats  # {'stat.name': (baste_stat, effort), ...}
         self.current_attack: AffectingMove = None
-        self.attacks = []
+        self.attacks = {}
+        self.move_index = self.__compile_move_index()
+        self.usable_moves = tuple(self.move_index)
+        self.rng = rng
+
+    def __compile_move_index(self) -> dict:
+        """
+            Resolves once, for every move of the Pokémon, the stat the move affects when it's used to attack and when it's
+            used to defend. A stat containing the attack type is preferred, otherwise the first stat shared by the move and the
+            Pokémon is taken. Moves sharing no stat with the Pokémon are left out of the index.
+
+            Returns:
+                dict: {'move_name': {'attack': (stat_name, Move), 'defense': (stat_name, Move)}}, where stat_name is None
+                      for moves that don't change stats.
+
+            Raises:
+                UnresolvedMoveError: If a move is missing from CACHE_MOVES.
+            """
+        move_index = {}
+        for move_name in self.moves:
+            if move_name not in CACHE_MOVES:
+                metrics.inc('cache_misses_total', cache='moves')
+                raise UnresolvedMoveError(f'Move {move_name} of pokemon {self.name} is not resolved')
+
+            if isinstance(CACHE_MOVES[move_name], dict):
+                common_stats = sorted(set(CACHE_MOVES[move_name].keys())
+                                      & set(self.stats.keys()))
+                if not common_stats:
+                    continue
+
+                move_index[move_name] = {}
+                for attack_type in (ATTACK, DEFENSE):
+                    stat_name = next((key for key in common_stats
+                                      if attack_type in key), common_stats[0])
+                    move_index[move_name][attack_type] = \
+                        (stat_name, intern_move(move_name,
+                                                *CACHE_MOVES[move_name][stat_name]))
+            else:
+                move = intern_move(move_name, *CACHE_MOVES[move_name])
+                move_index[move_name] = {ATTACK: (None, move),
+                                         DEFENSE: (None, move)}
+        return move_index
 
     def set_current_move(self, attack_type: str):
         """
-            Randomly selects a move from the Pokémon's move list and sets it as the current attack. If the move has already been used,
-            it retrieves the corresponding AffectingMove instance; otherwise, it creates a new one.
+            Randomly selects a usable move of the Pokémon and sets it as the current attack. If the move has already been used,
+            it retrieves the corresponding AffectingMove instance; otherwise, it creates a new one from the move index.
 
             Args:
                 attack_type (str): The type of attack to set, either 'attack' or 'defense', affecting the choice of move.
 
             Raises:
-                StatsMissMatchError: If there's a mismatch between the move's expected stats and the Pokémon's actual stats.
+                StatsMissMatchError: If none of the Pokémon's moves matches the Pokémon's stats.
             """
-        move_name = random.choice(self.moves)
-
-        if self.current_attack and move_name == self.current_attack.move.name:
-            return
-        elif any(x.move.name == move_name for x in self.attacks):
-            self.current_attack = [x for x in self.attacks
-                                   if x.move.name == move_name][0]
-            return
-
-        if move_name in CACHE_MOVES:
-            stat_name = None
-            if isinstance(CACHE_MOVES[move_name], dict):
-                common_stats = (set(CACHE_MOVES[move_name].keys())
-                                & set(self.stats.keys()))
-                stat_name = next((key for key in common_stats
-                                  if attack_type in key), None)
-                stat_name = stat_name or next(iter(common_stats), None)
-                if stat_name is None:
-                    raise StatsMissMatchError(f'Stats missmatch for pokemon {self.name} and move {move_name}')
+        if not self.usable_moves:
+            raise StatsMissMatchError(f'Stats missmatch for pokemon {self.name} and all of its moves')
+        move_name = self.rng.choice(self.usable_moves)
 
+        attack = self.attacks.get(move_name)
+        if attack is None:
+            stat_name, move = self.move_index[move_name][attack_type]
             if stat_name:
-                power, change = CACHE_MOVES[move_name][stat_name]
-                self.current_attack = AffectingMove(
-                    stat_type=stat_name,
-                    base_stat=self.stats[stat_name][0],
-                    effort_ev=self.stats[stat_name][1],
-                    move=Move(name=move_name, power=power, change=change))
+                attack = AffectingMove(stat_type=stat_name,
+                                       base_stat=self.stats[stat_name][0],
+                                       effort_ev=self.stats[stat_name][1],
+                                       move=move,
+                                       rng=self.rng)
             else:
-                power, change = CACHE_MOVES[move_name]
-                self.current_attack = AffectingMove(
-                    stat_type=None,
-                    base_stat=1,
-                    effort_ev=1,
-                    move=Move(name=move_name, power=power, change=change))
-        else:
-            move = fetch_data_sync(POKE_API_MOVE, move_name)
-            self.current_attack = AffectingMove(
-                stat_type=None,
-                base_stat=1,
-                effort_ev=1,
-                move=Move(name=move_name, power=move['power'], change=0))
-            CACHE_MOVES[move_name] = (move['power'], 0)
-        self.attacks.append(self.current_attack)
+                attack = AffectingMove(stat_type=None,
+                                       base_stat=1,
+                                       effort_ev=1,
+                                       move=move,
+                                       rng=self.rng)
+            self.attacks[move_name] = attack
+        self.current_attack = attack
 
     def attack(self, opponent):
         """
@@ -100,9 +131,33 @@ class Pokemon:
 
             Args:
                 opponent (Pokemon): The opponent Pokémon being attacked.
+
+            Returns:
+                float: The damage dealt to the opponent.
             """
         self.set_current_move(ATTACK)
         opponent.set_current_move(DEFENSE)
 
-        damage = self.current_attack.attacking_damage(opponent.current_attack)
+        with metrics.timed('damage_seconds'):
+            damage = self.current_attack.attacking_damage(opponent.current_attack,
+                                                          self.rng)
         opponent.hp -= damage
+        return damage
+
+
+def catalog_version(*pokemons) -> str:
+    """
+        Fingerprints the catalog data the battles of these Pokémon depend on: their ids, stats and moves, the resolved
+        `CACHE_MOVES` entries of those moves and the version of the battle rules. A battle replays identically from its
+        seed as long as the version is the same.
+
+        Args:
+            *pokemons (Pokemon): The Pokémon of the battle.
+
+        Returns:
+            str: 16 hexadecimal digits identifying the data.
+        """
+    catalog = [RULES_VERSION] + [[x.poke_id, x.stats, [[move, CACHE_MOVES[move]] for move in x.moves]]
+                                 for x in pokemons]
+    return hashlib.blake2b(json.dumps(catalog, sort_keys=True).encode(),
+                           digest_size=8).hexdigest()
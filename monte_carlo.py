@@ -0,0 +1,275 @@
+import argparse
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from config import Config
+from fetch_poke_data import fetch_pokemons_data, resolve_move_pool
+from model.affecting_move import MAX_STAGE, STAGE_MULTIPLIERS
+from model.pokemon import Pokemon, ATTACK, DEFENSE
+
+LEVEL = 1
+_STAGE_MULTIPLIERS = None if np is None else np.array(STAGE_MULTIPLIERS)
+
+
+class MonteCarloResult:
+    """
+        Outcome of many simulated replicas of one matchup.
+
+        Attributes:
+            pokemon1 (str): Name of the first Pokémon.
+            pokemon2 (str): Name of the second Pokémon.
+            winners (np.ndarray): Per replica 1 or 2 for the winning Pokémon, 0 for a draw.
+            turns (np.ndarray): Per replica the number of turns of the battle.
+            remaining_hp (np.ndarray): Per replica the HP left to the winner, NaN for a draw.
+
+        Methods:
+            turn_distribution: Number of battles per battle length.
+            remaining_hp_distribution: Histogram of the winner's remaining HP.
+        """
+    def __init__(self, pokemon1: str, pokemon2: str, winners, turns,
+                 remaining_hp):
+        self.pokemon1 = pokemon1
+        self.pokemon2 = pokemon2
+        self.winners = winners
+        self.turns = turns
+        self.remaining_hp = remaining_hp
+
+    @property
+    def replicas(self) -> int:
+        return len(self.winners)
+
+    @property
+    def win_rate(self) -> float:
+        """Share of the replicas won by the first Pokémon."""
+        return float(np.mean(self.winners == 1))
+
+    @property
+    def draw_rate(self) -> float:
+        return float(np.mean(self.winners == 0))
+
+    def turn_distribution(self):
+        """
+            Returns:
+                np.ndarray: At index `n` the number of battles that lasted `n` turns.
+            """
+        return np.bincount(self.turns)
+
+    def remaining_hp_distribution(self, bins: int = 10):
+        """
+            Args:
+                bins (int, optional): Number of equal-width bins. Defaults to 10.
+
+            Returns:
+                tuple: `(counts, bin_edges)` of the winner's remaining HP, draws excluded.
+            """
+        return np.histogram(self.remaining_hp[~np.isnan(self.remaining_hp)],
+                            bins=bins)
+
+    def summary(self) -> str:
+        return (f'{self.pokemon1} vs {self.pokemon2} over {self.replicas} battles: '
+                f'{self.win_rate:.1%} won by {self.pokemon1}, {self.draw_rate:.1%} draws, '
+                f'{np.mean(self.turns):.1f} turns on average')
+
+
+class _MoveTable:
+    """
+        The usable moves of one Pokémon as arrays, built from its move index: the power, the stat change stages and the
+        stat of each move when it's first used to attack or to defend, indexed by `[move, role]`.
+        """
+    def __init__(self, pokemon: Pokemon):
+        if not pokemon.usable_moves:
+            raise ValueError(f'Pokemon {pokemon.name} has no usable moves')
+
+        power, change, base, effort, has_stat = [], [], [], [], []
+        for move_name in pokemon.usable_moves:
+            roles = [pokemon.move_index[move_name][x] for x in (ATTACK, DEFENSE)]
+            stat_name = roles[0][0]
+            if stat_name:
+                base.append([pokemon.stats[x[0]][0] for x in roles])
+                effort.append([pokemon.stats[x[0]][1] for x in roles])
+            else:
+                base.append([1, 1])
+                effort.append([1, 1])
+            has_stat.append(stat_name is not None)
+
+            power.append([np.nan if x[1].power is None else x[1].power for x in roles])
+            change.append([x[1].change for x in roles])
+
+        self.power = np.array(power, dtype=float)
+        self.change = np.array(change, dtype=np.int64)
+        self.base = np.array(base, dtype=float)
+        self.effort = np.array(effort, dtype=float)
+        self.has_stat = np.array(has_stat)
+
+    def __len__(self):
+        return len(self.power)
+
+
+class _Side:
+    """
+        The state of one Pokémon across all the replicas: its HP, and the stat, the stat stage and the role it was first
+        used in of every move it has used. Like an `AffectingMove`, a move keeps the stat, power and change of that role.
+        """
+    def __init__(self, pokemon: Pokemon, replicas: int, rng):
+        self.moves = _MoveTable(pokemon)
+        shape = (replicas, len(self.moves))
+        self.hp = np.full(replicas, float(pokemon.hp))
+        self.iv = rng.uniform(0, 15, size=shape)
+        self.nature_modifier = rng.uniform(0.85, 1.0, size=shape)
+        self.stat = np.zeros(shape)
+        self.stage = np.zeros(shape, dtype=np.int64)
+        self.created = np.zeros(shape, dtype=bool)
+        self.role = np.zeros(shape, dtype=np.int64)
+
+    def choose_moves(self, replicas, role: int, rng):
+        """
+            Randomly picks the current move of the given replicas, calculating the stat of moves used for the first
+            time the way `AffectingMove.calculate_stat` does.
+            """
+        moves = rng.integers(0, len(self.moves), size=len(replicas))
+        new = ~self.created[replicas, moves]
+        if new.any():
+            new_replicas, new_moves = replicas[new], moves[new]
+            stat = (np.floor_divide(
+                (2 * self.moves.base[new_moves, role]
+                 + self.iv[new_replicas, new_moves]
+                 + np.floor_divide(self.moves.effort[new_moves, role], 4))
+                * LEVEL, 100) + 5) * self.nature_modifier[new_replicas, new_moves]
+            self.stat[new_replicas, new_moves] = np.where(
+                self.moves.has_stat[new_moves], stat, 1.0)
+            self.created[new_replicas, new_moves] = True
+            self.role[new_replicas, new_moves] = role
+        return moves
+
+
+def _change_stage(side: _Side, replicas, moves):
+    """Vectorized `AffectingMove.apply_baste_stat_change` of the given moves, returns their new stages."""
+    change = side.moves.change[moves, side.role[replicas, moves]]
+    stage = np.clip(side.stage[replicas, moves] + change, -MAX_STAGE, MAX_STAGE)
+    side.stage[replicas, moves] = stage
+    return stage
+
+
+def _attack(attacker: _Side, defender: _Side, replicas, rng):
+    """Vectorized `Pokemon.attack` of the attacker on the defender for the given replicas."""
+    attack_moves = attacker.choose_moves(replicas, 0, rng)
+    defense_moves = defender.choose_moves(replicas, 1, rng)
+
+    attack_stage = _change_stage(attacker, replicas, attack_moves)
+    defense_stage = _change_stage(defender, replicas, defense_moves)
+
+    power = attacker.moves.power[attack_moves, attacker.role[replicas, attack_moves]]
+    damage = (((2 * LEVEL) / 5 + 2) * power
+              * attacker.stat[replicas, attack_moves] * _STAGE_MULTIPLIERS[attack_stage + MAX_STAGE]
+              / (defender.stat[replicas, defense_moves] * _STAGE_MULTIPLIERS[defense_stage + MAX_STAGE])
+              / 50 + 2)
+    damage *= rng.uniform(0.85, 1.0, size=len(replicas))
+    defender.hp[replicas] -= np.where(np.isnan(power), 0, damage)
+
+
+def simulate_matchup(pokemon1: Pokemon, pokemon2: Pokemon,
+                     replicas: int = 10000, max_turns: int = None,
+                     seed: int = None, stall_turns: int = None) -> MonteCarloResult:
+    """
+        Simulates many replicas of a battle at once with NumPy arrays, following the rules of `main.battle`.
+        Replicas still going after `max_turns` turns, or without any HP lost for `stall_turns` turns in a row, are
+        counted as draws.
+
+        Args:
+            pokemon1 (Pokemon): The first Pokémon, its moves resolved in CACHE_MOVES.
+            pokemon2 (Pokemon): The second Pokémon, its moves resolved in CACHE_MOVES.
+            replicas (int, optional): Number of battles to simulate. Defaults to 10000.
+            max_turns (int, optional): Turn limit of every battle. Defaults to `Config.BATTLE_MAX_TURNS`.
+            seed (int, optional): Seed of the random generator, for reproducible results.
+            stall_turns (int, optional): Turns in a row without any HP lost after which a battle is stalled. Defaults
+                to `Config.BATTLE_STALL_TURNS`.
+
+        Returns:
+            MonteCarloResult: The winner, the number of turns and the remaining HP of every replica.
+        """
+    if np is None:
+        raise ImportError('The Monte Carlo engine requires numpy')
+
+    if max_turns is None:
+        max_turns = Config.BATTLE_MAX_TURNS
+    if stall_turns is None:
+        stall_turns = Config.BATTLE_STALL_TURNS
+    rng = np.random.default_rng(seed)
+    sides = (_Side(pokemon1, replicas, rng), _Side(pokemon2, replicas, rng))
+    first, second = (0, 1) if pokemon1.speed > pokemon2.speed else (1, 0)
+
+    winners = np.zeros(replicas, dtype=np.int8)
+    turns = np.full(replicas, max_turns, dtype=np.int64)
+    active = np.arange(replicas)
+    stalled_turns = np.zeros(replicas, dtype=np.int64)
+
+    with np.errstate(over='ignore', under='ignore', invalid='ignore',
+                     divide='ignore'):
+        for turn in range(1, max_turns + 1):
+            total_hp = sides[0].hp + sides[1].hp
+            for attacker, defender in ((first, second), (second, first)):
+                _attack(sides[attacker], sides[defender], active, rng)
+                knocked_out = sides[defender].hp[active] <= 0
+                if knocked_out.any():
+                    finished = active[knocked_out]
+                    winners[finished] = attacker + 1
+                    turns[finished] = turn
+                    active = active[~knocked_out]
+
+            no_progress = sides[0].hp[active] + sides[1].hp[active] == total_hp[active]
+            stalled_turns[active] = np.where(no_progress, stalled_turns[active] + 1, 0)
+            stalled = stalled_turns[active] >= stall_turns
+            if stalled.any():
+                turns[active[stalled]] = turn
+                active = active[~stalled]
+            if not len(active):
+                break
+
+    remaining_hp = np.full(replicas, np.nan)
+    for side in (0, 1):
+        won = winners == side + 1
+        remaining_hp[won] = sides[side].hp[won]
+
+    return MonteCarloResult(pokemon1.name, pokemon2.name, winners, turns,
+                            remaining_hp)
+
+
+def main(argv=None) -> int:
+    """
+        Entry point of the `monte-carlo` command.
+
+        Args:
+            argv (list, optional): The command line arguments, defaults to `sys.argv[1:]`.
+
+        Returns:
+            int: The exit code.
+        """
+    parser = argparse.ArgumentParser(
+        prog='monte-carlo',
+        description='Estimates the win probability of a matchup with vectorized battles.')
+    parser.add_argument('pokemon1')
+    parser.add_argument('pokemon2')
+    parser.add_argument('-n', '--replicas', type=int, default=10000,
+                        help='number of battles (default: 10000)')
+    parser.add_argument('--max-turns', type=int, default=Config.BATTLE_MAX_TURNS,
+                        help=f'turns after which a battle is a draw (default: {Config.BATTLE_MAX_TURNS})')
+    parser.add_argument('--stall-turns', type=int, default=Config.BATTLE_STALL_TURNS,
+                        help='turns without any HP lost after which a battle is a draw '
+                             f'(default: {Config.BATTLE_STALL_TURNS})')
+    parser.add_argument('--seed', type=int, help='seed of the random generator')
+    args = parser.parse_args(argv)
+
+    pokemon1_data, pokemon2_data = resolve_move_pool(
+        *fetch_pokemons_data(args.pokemon1, args.pokemon2))
+    result = simulate_matchup(Pokemon(**pokemon1_data), Pokemon(**pokemon2_data),
+                              replicas=args.replicas, max_turns=args.max_turns,
+                              seed=args.seed, stall_turns=args.stall_turns)
+    print(result.summary())
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+"""
+    Replays battles from their seed. A battle only draws random numbers from its own seeded generator, so the same two
+    Pokémon, with the same catalog data, battling with the same seed fight the exact same battle again.
+
+    Run `python main.py replay BATTLE_ID` to print the turns of a recorded battle.
+"""
+import argparse
+from collections import namedtuple
+
+from battle_stat.repository.fact_battle_repository import get_battle_fact
+from exceptions import CatalogVersionError
+from fetch_poke_data import fetch_pokemons_data, resolve_move_pool
+from main import battle, fetch_init_data
+from model.pokemon import Pokemon, catalog_version as version_of
+
+Replay = namedtuple('Replay', ['result', 'turn_log', 'catalog_version'])
+
+
+def replay_battle(pokemon1, pokemon2, seed: int,
+                  catalog_version: str = None) -> Replay:
+    """
+        Fights a battle again from its seed and logs every attack.
+
+        Args:
+            pokemon1 (str | int): The name or the id of the first Pokémon of the battle.
+            pokemon2 (str | int): The name or the id of the second Pokémon of the battle.
+            seed (int): The seed of the battle.
+            catalog_version (str, optional): The catalog version the battle was fought with, checked against the current
+                catalog data when given.
+
+        Returns:
+            Replay: The result of the battle, its `TurnLog` entries and the version of the catalog data it was replayed
+                    with.
+
+        Raises:
+            CatalogVersionError: If the catalog data changed since the battle, the replay would fight another battle.
+        """
+    pokemon1_data, pokemon2_data = resolve_move_pool(
+        *fetch_pokemons_data(pokemon1, pokemon2))
+    pokemon1, pokemon2 = Pokemon(**pokemon1_data), Pokemon(**pokemon2_data)
+
+    version = version_of(pokemon1, pokemon2)
+    if catalog_version is not None and version != catalog_version:
+        raise CatalogVersionError(f'The battle was fought with catalog {catalog_version}, '
+                                  f'the current catalog is {version}')
+
+    turn_log = []
+    result = battle(pokemon1, pokemon2, verbose=False, take_notes=False,
+                    seed=seed, turn_log=turn_log)
+    return Replay(result, turn_log, version)
+
+
+def replay_recorded_battle(battle_id: int) -> Replay:
+    """
+        Replays a battle recorded in `fact_battle`.
+
+        Args:
+            battle_id (int): The id of the `fact_battle` row of the finished battle.
+
+        Returns:
+            Replay: See `replay_battle`.
+
+        Raises:
+            ValueError: If there is no such battle, or it has no seed because it's the note of a single turn.
+            CatalogVersionError: If the catalog data changed since the battle.
+        """
+    fact = get_battle_fact(battle_id)
+    if fact is None or fact.seed is None:
+        raise ValueError(f'No replayable battle with id {battle_id}')
+    return replay_battle(fact.pokemon_1.poke_id, fact.pokemon_2.poke_id,
+                         fact.seed, fact.catalog_version)
+
+
+def main(argv=None) -> int:
+    """
+        Entry point of the `replay` command.
+
+        Args:
+            argv (list, optional): The command line arguments, defaults to `sys.argv[1:]`.
+
+        Returns:
+            int: The exit code.
+        """
+    parser = argparse.ArgumentParser(
+        prog='replay', description='Replays a recorded battle turn by turn.')
+    parser.add_argument('battle_id', type=int, help='id of the battle in fact_battle')
+    args = parser.parse_args(argv)
+
+    fetch_init_data()
+    try:
+        replay = replay_recorded_battle(args.battle_id)
+    except (ValueError, CatalogVersionError) as e:
+        print(e)
+        return 1
+
+    for x in replay.turn_log:
+        print(f'Turn {x.turn}: {x.attacker} uses {x.move}, {x.damage:.1f} damage, '
+              f'{x.defender_hp:.1f}HP left')
+    winner = replay.result.winner
+    print(f'The winner is: {winner.name}' if winner else f'[DRAW] {replay.result.end_reason}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
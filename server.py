@@ -0,0 +1,331 @@
+"""
+    HTTP battle service. Run with `python main.py serve`, it listens on `Config.SERVER_PORT` (80, mapped to 8000 by
+    docker-compose).
+
+    Endpoints:
+        POST /battle                      {"pokemon1": ..., "pokemon2": ..., "seed": optional} fights one battle and
+                                          returns its turns.
+        POST /simulate                    {"pokemon1": ..., "pokemon2": ..., "n": ...} fights `n` battles of a matchup.
+        GET  /stats?limit=N               The leaderboard of the recorded battles.
+        GET  /stats/{pokemon}             The matchups of a Pokémon.
+        GET  /stats/{pokemon1}/{pokemon2} One matchup.
+        GET  /metrics                     The metrics in the Prometheus text format.
+
+    The event loop never runs a battle or waits for a database round-trip. The move catalog and the Pokémon stay warm in
+    the caches of the service process, battles run in a pool of worker processes and the notes of the battles come back
+    to be queued to the background `NotesWriter`. Only the end of every battle is recorded, its turns replay from the
+    seed, see `replay.py`.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from aiohttp import web
+
+import metrics
+from battle_stat import db_session
+from battle_stat.battle_notes import BattleNote, init_db_cache, snapshot_pokemon
+from battle_stat.database import init_schema
+from battle_stat.notes_writer import queue_battle_notes
+from battle_stat.repository.agg_matchup_repository import get_leaderboard, \
+    get_matchup, get_matchups_of
+from config import Config
+from exceptions import FetchingError
+from fetch_poke_data import CACHE_MOVES, fetch_pokemons_data, \
+    resolve_move_pool
+from main import battle, fetch_init_data
+from model.pokemon import Pokemon, catalog_version
+
+# Battles of one matchup fought per worker task
+CHUNK_SIZE = 50
+
+battle_pool = web.AppKey('battle_pool', ProcessPoolExecutor)
+take_notes = web.AppKey('take_notes', bool)
+
+
+def create_app(pool=None, notes: bool = True) -> web.Application:
+    """
+        Creates the battle service.
+
+        Args:
+            pool (concurrent.futures.Executor, optional): The pool the battles run in, a process pool of
+                `Config.SERVER_WORKERS` workers by default. It is shut down with the application.
+            notes (bool, optional): Whether to record the battles in the database. Defaults to True.
+
+        Returns:
+            web.Application: The application, to be run with `web.run_app`.
+        """
+    app = web.Application(middlewares=[_count_requests])
+    app[battle_pool] = pool or ProcessPoolExecutor(
+        max_workers=Config.SERVER_WORKERS or os.cpu_count(),
+        mp_context=multiprocessing.get_context(
+            'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'))
+    app[take_notes] = notes
+    app.add_routes([web.post('/battle', post_battle),
+                    web.post('/simulate', post_simulate),
+                    web.get('/stats', get_stats),
+                    web.get('/stats/{pokemon}', get_pokemon_stats),
+                    web.get('/stats/{pokemon1}/{pokemon2}', get_matchup_stats),
+                    web.get('/metrics', get_metrics)])
+    app.on_cleanup.append(_shutdown_pool)
+    return app
+
+
+async def post_battle(request):
+    pokemon1, pokemon2, seed = await _read_matchup(request, 'seed')
+    # fact_battle.seed is a BIGINT, a larger seed would fail the whole batch of notes it's written with
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or not 0 <= seed < 2 ** 63):
+        raise _error(web.HTTPBadRequest, 'seed must be an integer between 0 and 2**63 - 1')
+    matchup = await _load_matchup(pokemon1, pokemon2)
+
+    loop = asyncio.get_running_loop()
+    result, turn_log, note = await loop.run_in_executor(
+        request.app[battle_pool], _fight, (*matchup[:3], seed))
+    await _record(request.app, [note], matchup[3])
+
+    return web.json_response({
+        'winner': result['winner'], 'turns': result['turns'],
+        'seed': result['seed'], 'end_reason': result['end_reason'],
+        'catalog_version': matchup[3],
+        'turn_log': [dict(x._asdict()) for x in turn_log]})
+
+
+async def post_simulate(request):
+    pokemon1, pokemon2, battles = await _read_matchup(request, 'n')
+    if not isinstance(battles, int) or isinstance(battles, bool) or not 0 < battles <= Config.SERVER_MAX_BATTLES:
+        raise _error(web.HTTPBadRequest, f'n must be an integer between 1 and {Config.SERVER_MAX_BATTLES}')
+    matchup = await _load_matchup(pokemon1, pokemon2)
+
+    loop = asyncio.get_running_loop()
+    t1 = perf_counter()
+    chunks = await asyncio.gather(*[
+        loop.run_in_executor(request.app[battle_pool], _simulate,
+                             (*matchup[:3], min(CHUNK_SIZE, battles - start)))
+        for start in range(0, battles, CHUNK_SIZE)])
+    duration = perf_counter() - t1
+
+    outcomes, turns, notes = Counter(), 0, []
+    for chunk_outcomes, chunk_turns, chunk_notes in chunks:
+        outcomes.update(chunk_outcomes)
+        turns += chunk_turns
+        notes += chunk_notes
+    await _record(request.app, notes, matchup[3])
+
+    return web.json_response({
+        'pokemon1': matchup[0]['name'], 'pokemon2': matchup[1]['name'],
+        'battles': battles, 'wins': [outcomes[1], outcomes[2]],
+        'draws': outcomes[None], 'turns': turns, 'duration_s': duration,
+        'catalog_version': matchup[3]})
+
+
+async def get_stats(request):
+    try:
+        limit = int(request.query.get('limit', 0)) or None
+    except ValueError:
+        raise _error(web.HTTPBadRequest, 'limit must be an integer')
+    rows = await _query(get_leaderboard, limit)
+    return web.json_response([
+        {'pokemon': name, 'battles': battles, 'wins': wins, 'win_rate': win_rate,
+         'avg_duration_s': avg_duration, 'avg_turns': avg_turns}
+        for name, battles, wins, win_rate, avg_duration, avg_turns in rows])
+
+
+async def get_pokemon_stats(request):
+    rows = await _query(lambda name: [(x, _matchup_json(y)) for x, y in get_matchups_of(name)],
+                        request.match_info['pokemon'])
+    return web.json_response({'pokemon': request.match_info['pokemon'],
+                              'matchups': [dict(x, opponent=name) for name, x in rows]})
+
+
+async def get_matchup_stats(request):
+    matchup = await _query(lambda *names: _matchup_json(get_matchup(*names)),
+                           request.match_info['pokemon1'], request.match_info['pokemon2'])
+    if matchup is None:
+        raise _error(web.HTTPNotFound, 'the Pokémon never battled')
+    return web.json_response(matchup)
+
+
+async def get_metrics(request):
+    return web.Response(text=metrics.to_prometheus(),
+                        content_type='text/plain', charset='utf-8')
+
+
+@web.middleware
+async def _count_requests(request, handler):
+    route = request.match_info.route.resource
+    route = route.canonical if route is not None else 'unmatched'
+    status = 500
+    try:
+        with metrics.timed('http_server_seconds', route=route):
+            response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        metrics.inc('http_server_requests_total', route=route, status=status)
+
+
+async def _read_matchup(request, option: str) -> tuple:
+    """Returns the two Pokémon and the `option` of the JSON body of a request."""
+    try:
+        body = await request.json()
+        return body['pokemon1'], body['pokemon2'], body.get(option)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise _error(web.HTTPBadRequest, 'expected a JSON object with pokemon1 and pokemon2')
+
+
+async def _load_matchup(pokemon1, pokemon2) -> tuple:
+    """
+        Loads the two Pokémon of a matchup from the caches, fetching what is missing in a thread.
+
+        Returns:
+            tuple: The constructor arguments of both Pokémon, the CACHE_MOVES entries of their moves and the catalog
+                   version of the matchup.
+        """
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, _resolve_matchup, pokemon1, pokemon2)
+    except FetchingError as e:
+        raise _error(web.HTTPNotFound, str(e))
+
+
+def _resolve_matchup(pokemon1, pokemon2) -> tuple:
+    pokemon1_data, pokemon2_data = resolve_move_pool(
+        *fetch_pokemons_data(pokemon1, pokemon2))
+    moves = {x: CACHE_MOVES[x] for x in pokemon1_data['moves'] + pokemon2_data['moves']}
+    return (pokemon1_data, pokemon2_data, moves,
+            catalog_version(Pokemon(**pokemon1_data), Pokemon(**pokemon2_data)))
+
+
+async def _record(app, notes: list, version: str):
+    """Queues the notes of finished battles to the notes writer from a thread, a full queue never blocks the loop."""
+    if app[take_notes] and notes:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _queue_notes, notes, version)
+
+
+def _queue_notes(notes: list, version: str):
+    for x in notes:
+        queue_battle_notes(x.attacker, x.defender, x.battle_duration, x.turns,
+                           x.seed, version, x.end_reason)
+
+
+async def _query(query, *args):
+    """Runs a repository query in a thread, each query in its own transaction so it sees the latest notes."""
+    def run():
+        try:
+            return query(*args)
+        finally:
+            db_session.remove()
+    return await asyncio.get_running_loop().run_in_executor(None, run)
+
+
+def _matchup_json(matchup):
+    if matchup is None:
+        return None
+    return {'battles': matchup.battles, 'wins': matchup.wins,
+            'win_rate': matchup.wins / matchup.battles if matchup.battles else None,
+            'avg_duration_s': matchup.total_duration_s / matchup.battles if matchup.battles else None,
+            'avg_turns': matchup.total_turns / matchup.battles if matchup.battles else None}
+
+
+def _error(exception_class, message: str) -> web.HTTPException:
+    return exception_class(text=json.dumps({'error': message}),
+                           content_type='application/json')
+
+
+async def _shutdown_pool(app):
+    app[battle_pool].shutdown(wait=False, cancel_futures=True)
+
+
+def _fight(task: tuple) -> tuple:
+    """
+        Fights one battle in a worker process.
+
+        Args:
+            task (tuple): `(pokemon1 data, pokemon2 data, CACHE_MOVES entries of their moves, seed)`.
+
+        Returns:
+            tuple: The winner, turns, seed and end reason of the battle as a dict, its `TurnLog` entries and its
+                   `BattleNote`.
+        """
+    pokemon1_data, pokemon2_data, moves, seed = task
+    CACHE_MOVES.update(moves)
+    turn_log = []
+    note, result, _ = _battle(pokemon1_data, pokemon2_data, seed, turn_log)
+    return ({'winner': result.winner and result.winner.name, 'turns': result.turns,
+             'seed': result.seed, 'end_reason': result.end_reason}, turn_log, note)
+
+
+def _simulate(task: tuple) -> tuple:
+    """
+        Fights a chunk of battles of one matchup in a worker process.
+
+        Args:
+            task (tuple): `(pokemon1 data, pokemon2 data, CACHE_MOVES entries of their moves, battles)`.
+
+        Returns:
+            tuple: A Counter of the outcomes by winning side, 1 or 2, and None for draws, the total turns and the
+                   `BattleNote` of every battle.
+        """
+    pokemon1_data, pokemon2_data, moves, battles = task
+    CACHE_MOVES.update(moves)
+    outcomes, turns, notes = Counter(), 0, []
+    for _ in range(battles):
+        note, result, side = _battle(pokemon1_data, pokemon2_data)
+        turns += result.turns
+        outcomes[side] += 1
+        notes.append(note)
+    return outcomes, turns, notes
+
+
+def _battle(pokemon1_data: dict, pokemon2_data: dict, seed: int = None,
+            turn_log: list = None) -> tuple:
+    """Fights a battle of fresh Pokémon and returns its `BattleNote`, its `BattleResult` and the winning side."""
+    pokemon1, pokemon2 = Pokemon(**pokemon1_data), Pokemon(**pokemon2_data)
+    t1 = perf_counter()
+    result = battle(pokemon1, pokemon2, verbose=False, take_notes=False,
+                    seed=seed, turn_log=turn_log)
+    note = BattleNote(snapshot_pokemon(pokemon1), snapshot_pokemon(pokemon2),
+                      perf_counter() - t1, result.turns, result.seed,
+                      end_reason=result.end_reason)
+    side = {id(pokemon1): 1, id(pokemon2): 2}.get(id(result.winner))
+    return note, result, side
+
+
+def main(argv=None) -> int:
+    """
+        Entry point of the `serve` command.
+
+        Args:
+            argv (list, optional): The command line arguments, defaults to `sys.argv[1:]`.
+
+        Returns:
+            int: The exit code.
+        """
+    parser = argparse.ArgumentParser(prog='serve', description='Runs the HTTP battle service.')
+    parser.add_argument('--host', default=Config.SERVER_HOST,
+                        help=f'interface to listen on (default: {Config.SERVER_HOST})')
+    parser.add_argument('--port', type=int, default=Config.SERVER_PORT,
+                        help=f'port to listen on (default: {Config.SERVER_PORT})')
+    parser.add_argument('--no-notes', action='store_true',
+                        help="don't record the battles in the database")
+    args = parser.parse_args(argv)
+
+    fetch_init_data()
+    if not args.no_notes:
+        init_schema()
+        init_db_cache()
+    web.run_app(create_app(notes=not args.no_notes), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
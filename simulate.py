@@ -0,0 +1,212 @@
+import argparse
+from collections import Counter, defaultdict
+from time import perf_counter
+
+import metrics
+from fetch_poke_data import fetch_pokemons_data, resolve_move_pool
+from main import battle, fetch_init_data
+from model.pokemon import Pokemon, catalog_version
+
+
+class SimulationReport:
+    """
+        Aggregated outcome and throughput of a batch of simulated battles.
+
+        Attributes:
+            battles (int): Number of battles simulated.
+            turns (int): Total number of turns over all the battles.
+            draws (int): Number of battles stopped as a draw.
+            wins (Counter): Number of won battles per Pokémon name.
+            phase_timings (defaultdict): Total seconds spent per phase ('crawl', 'load', 'resolve', 'battle', 'notes',
+                                         'flush').
+
+        Methods:
+            timed: Adds the duration of a block of code to a phase.
+            summary: Formats the report for printing.
+        """
+    def __init__(self):
+        self.battles = 0
+        self.turns = 0
+        self.draws = 0
+        self.wins = Counter()
+        self.phase_timings = defaultdict(float)
+
+    def timed(self, phase: str):
+        return _PhaseTimer(self, phase)
+
+    @property
+    def battle_time(self) -> float:
+        return self.phase_timings['battle']
+
+    @property
+    def battles_per_s(self) -> float:
+        return self.battles / self.battle_time if self.battle_time else 0.0
+
+    @property
+    def turns_per_s(self) -> float:
+        return self.turns / self.battle_time if self.battle_time else 0.0
+
+    def summary(self) -> str:
+        lines = [f'Battles: {self.battles} ({self.draws} draws), turns: {self.turns}',
+                 f'Throughput: {self.battles_per_s:.1f} battles/s, {self.turns_per_s:.1f} turns/s']
+        lines += [f'  {phase:<8}{seconds:10.3f}s'
+                  for phase, seconds in self.phase_timings.items()]
+        lines += [f'  {name}: {wins} wins'
+                  for name, wins in self.wins.most_common()]
+        return '\n'.join(lines)
+
+
+class _PhaseTimer:
+
+    def __init__(self, report: SimulationReport, phase: str):
+        self.report = report
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.report.phase_timings[self.phase] += perf_counter() - self.start
+
+
+def parse_matchups(pairs: list, matchups_file=None) -> list:
+    """
+        Parses matchups given as `pokemon1:pokemon2` arguments and/or as lines of a file.
+
+        Args:
+            pairs (list): Matchups in the form `pokemon1:pokemon2`.
+            matchups_file (TextIO, optional): A file with one matchup per line, the two Pokémon separated by a colon,
+                a comma or whitespace. Empty lines and lines starting with `#` are ignored.
+
+        Returns:
+            list: The matchups as `(pokemon1, pokemon2)` tuples.
+
+        Raises:
+            ValueError: If a matchup doesn't consist of exactly two Pokémon.
+        """
+    lines = list(pairs)
+    if matchups_file:
+        lines += [x for x in matchups_file
+                  if x.strip() and not x.lstrip().startswith('#')]
+
+    matchups = []
+    for line in lines:
+        names = line.replace(':', ' ').replace(',', ' ').split()
+        if len(names) != 2:
+            raise ValueError(f'Invalid matchup: {line.strip()!r}')
+        matchups.append(tuple(names))
+    return matchups
+
+
+def run_simulation(matchups: list, repetitions: int, take_notes: bool = True,
+                   report: SimulationReport = None) -> SimulationReport:
+    """
+        Simulates every matchup `repetitions` times without printing the battles.
+        The Pokémon data is loaded and their moves are resolved once per matchup, every battle gets fresh `Pokemon` objects.
+
+        Args:
+            matchups (list): The matchups as `(pokemon1, pokemon2)` tuples.
+            repetitions (int): How many battles to simulate per matchup.
+            take_notes (bool, optional): Whether to record battle notes in the database. Defaults to True. The notes are
+                written in the background and flushed once all the battles are over.
+            report (SimulationReport, optional): A report to add the battles to, a new one is created by default.
+
+        Returns:
+            SimulationReport: The aggregated outcome and timings of the battles.
+        """
+    report = report or SimulationReport()
+    if take_notes:
+        from battle_stat.notes_writer import queue_battle_notes, flush_battle_notes
+
+    for pokemon1_name, pokemon2_name in matchups:
+        with report.timed('load'):
+            pokemons_data = fetch_pokemons_data(pokemon1_name, pokemon2_name)
+        with report.timed('resolve'):
+            pokemon1_data, pokemon2_data = resolve_move_pool(*pokemons_data)
+
+        version = None
+        for _ in range(repetitions):
+            pokemon1 = Pokemon(**pokemon1_data)
+            pokemon2 = Pokemon(**pokemon2_data)
+
+            with report.timed('battle'):
+                t1 = perf_counter()
+                result = battle(pokemon1, pokemon2, verbose=False,
+                                take_notes=take_notes)
+                battle_duration = perf_counter() - t1
+
+            if take_notes:
+                with report.timed('notes'):
+                    version = version or catalog_version(pokemon1, pokemon2)
+                    queue_battle_notes(pokemon1, pokemon2, battle_duration,
+                                       result.turns, result.seed, version,
+                                       result.end_reason)
+
+            report.battles += 1
+            report.turns += result.turns
+            if result.winner is None:
+                report.draws += 1
+            else:
+                report.wins[result.winner.name] += 1
+
+    if take_notes:
+        with report.timed('flush'):
+            flush_battle_notes()
+    return report
+
+
+def main(argv=None) -> int:
+    """
+        Entry point of the `simulate` command.
+
+        Args:
+            argv (list, optional): The command line arguments, defaults to `sys.argv[1:]`.
+
+        Returns:
+            int: The exit code.
+        """
+    parser = argparse.ArgumentParser(
+        prog='simulate',
+        description='Runs Pokémon battles headless and reports the throughput.')
+    parser.add_argument('matchups', nargs='*', metavar='POKEMON1:POKEMON2',
+                        help='a matchup to simulate, e.g. pikachu:bulbasaur')
+    parser.add_argument('-f', '--file', type=argparse.FileType('r'),
+                        help='file with one matchup per line')
+    parser.add_argument('-n', '--repetitions', type=int, default=1,
+                        help='battles per matchup (default: 1)')
+    parser.add_argument('--no-notes', action='store_true',
+                        help="don't record battle notes in the database")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='record metrics and write them to PATH, in the Prometheus text format for a .prom file '
+                             'and as JSON otherwise')
+    args = parser.parse_args(argv)
+
+    try:
+        matchups = parse_matchups(args.matchups, args.file)
+    except ValueError as e:
+        parser.error(str(e))
+    if not matchups:
+        parser.error('no matchups given')
+
+    if args.metrics:
+        metrics.enable()
+    report = SimulationReport()
+    with report.timed('crawl'):
+        fetch_init_data()
+    if not args.no_notes:
+        from battle_stat.battle_notes import init_db_cache
+        from battle_stat.database import init_schema
+        init_schema()
+        init_db_cache()
+
+    run_simulation(matchups, args.repetitions, take_notes=not args.no_notes,
+                   report=report)
+    print(report.summary())
+    if args.metrics:
+        metrics.dump(args.metrics)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,9 +1,12 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from battle_stat import battle_notes
+from battle_stat.database import ATTACK_COLUMNS, ATTACK_ID_COLUMNS, BATTLE_COLUMNS
 from battle_stat.model.dim_move import MoveDimension
 from battle_stat.model.dim_pokemon import PokemonDimension
 from battle_stat.model.dim_stats import StatDimension
+from model.affecting_move import AffectingMove
+from model.move import Move
 from model.pokemon import Pokemon
 
 class TestBattleNotes(unittest.TestCase):
@@ -16,21 +19,22 @@ class TestBattleNotes(unittest.TestCase):
         Test that the database cache is initialized with the correct values from the database.
         """
         # Mocking the return values of the database fetching functions
-        mock_get_all_dim_moves.return_value = [MoveDimension(name='Move1'), MoveDimension(name='Move2')]
-        mock_get_all_dim_pokemons.return_value = [PokemonDimension(poke_id=1), PokemonDimension(poke_id=2)]
-        mock_get_all_dim_stats.return_value = [StatDimension(name='Stat1', move=MoveDimension(name='Move1')), StatDimension(name='Stat2', move=MoveDimension(name='Move2'))]
+        mock_get_all_dim_moves.return_value = [MoveDimension(id=11, name='Move1'), MoveDimension(id=12, name='Move2')]
+        mock_get_all_dim_pokemons.return_value = [PokemonDimension(id=21, poke_id=1), PokemonDimension(id=22, poke_id=2)]
+        mock_get_all_dim_stats.return_value = [StatDimension(id=31, name='Stat1', move=MoveDimension(name='Move1')), StatDimension(id=32, name='Stat2', move=MoveDimension(name='Move2'))]
 
         # Calling the function under test
         battle_notes.init_db_cache()
 
-        # Assertions to ensure the cache is populated with the mocked values
-        self.assertEqual(battle_notes.DBCache.DIM_MOVE_CACHE, {'Move1', 'Move2'})
-        self.assertEqual(battle_notes.DBCache.DIM_POKEMON_CACHE, {1, 2})
-        self.assertEqual(battle_notes.DBCache.DIM_STATS_CACHE, {('Stat1', 'Move1'), ('Stat2', 'Move2')})
+        # Assertions to ensure the cache is populated with the ids of the mocked values
+        self.assertEqual(battle_notes.DBCache.DIM_MOVE_CACHE, {'Move1': 11, 'Move2': 12})
+        self.assertEqual(battle_notes.DBCache.DIM_POKEMON_CACHE, {1: 21, 2: 22})
+        self.assertEqual(battle_notes.DBCache.DIM_STATS_CACHE, {('Stat1', 'Move1'): 31, ('Stat2', 'Move2'): 32})
 
+    @patch('battle_stat.battle_notes.upsert_matchups')
     @patch('battle_stat.battle_notes.save_list_data')
     @patch('battle_stat.battle_notes.__write_notes')
-    def test_take_battle_notes(self, mock_write_notes , mock_save_list_data):
+    def test_take_battle_notes(self, mock_write_notes , mock_save_list_data, mock_upsert_matchups):
         """
         Test that battle notes are correctly recorded and saved for both the attacker and defender.
         """
@@ -48,6 +52,92 @@ class TestBattleNotes(unittest.TestCase):
         # Assert that save_list_data was called, implying that battle notes were prepared and saved
         mock_save_list_data.assert_called()
         mock_write_notes.assert_called()
+        mock_upsert_matchups.assert_called()
+
+    @patch('battle_stat.battle_notes.upsert_matchups')
+    @patch('battle_stat.battle_notes.bulk_save_battle_facts')
+    @patch('battle_stat.battle_notes.resolve_dimensions')
+    def test_write_battle_notes(self, mock_resolve_dimensions, mock_bulk_save_battle_facts, mock_upsert_matchups):
+        """
+        Test that a batch of notes is written as attack and battle rows referencing the cached dimension ids.
+        """
+        move = Move('tackle', 40, 0)
+        attacker = battle_notes.PokemonNote(poke_id=1, name='bulbasaur', speed=45, hp=20,
+                                            current_attack=AffectingMove('attack', 49, 0, move))
+        defender = battle_notes.PokemonNote(poke_id=25, name='pikachu', speed=90, hp=-3.4,
+                                            current_attack=AffectingMove('defense', 40, 0, move))
+        with patch.multiple(battle_notes.DBCache, DIM_MOVE_CACHE={'tackle': 11},
+                            DIM_POKEMON_CACHE={1: 21, 25: 22},
+                            DIM_STATS_CACHE={('attack', 'tackle'): 31, ('defense', 'tackle'): 32}):
+            battle_notes.write_battle_notes([battle_notes.BattleNote(attacker, defender),
+                                             battle_notes.BattleNote(attacker, defender, 2.6, 4, 42, 'v1', 'knockout')])
+
+        mock_resolve_dimensions.assert_called_once_with([attacker, defender, attacker, defender])
+        (facts,), _ = mock_bulk_save_battle_facts.call_args
+        self.assertEqual(len(facts), 2)
+        attack_1, attack_2, battle = facts[1]
+        self.assertEqual((attack_1['pokemon_id'], attack_1['stat_id'], attack_1['move_id']), (21, 31, 11))
+        self.assertEqual((attack_2['pokemon_id'], attack_2['stat_id'], attack_2['hp']), (22, 32, -3))
+        self.assertEqual(battle, {'pokemon_id_1': 21, 'pokemon_id_2': 22, 'battle_duration_s': 3,
+                                  'turns': 4, 'seed': 42, 'catalog_version': 'v1',
+                                  'end_reason': 'knockout', 'winner_pokemon_id': 21})
+        self.assertIsNone(facts[0][2]['winner_pokemon_id'])
+        mock_upsert_matchups.assert_called_once_with([
+            {'pokemon_id_1': 21, 'pokemon_id_2': 22, 'battles': 1, 'wins': 1,
+             'total_duration_s': 2.6, 'total_turns': 4},
+            {'pokemon_id_1': 22, 'pokemon_id_2': 21, 'battles': 1, 'wins': 0,
+             'total_duration_s': 2.6, 'total_turns': 4}])
+
+    @patch('battle_stat.battle_notes.upsert_matchups')
+    @patch('battle_stat.battle_notes.bulk_save_battle_facts')
+    @patch('battle_stat.battle_notes.resolve_dimensions')
+    def test_mirror_matchup(self, mock_resolve_dimensions, mock_bulk_save_battle_facts, mock_upsert_matchups):
+        """
+        Test that a battle of a Pokémon against itself adds a single battle to its matchup.
+        """
+        move = Move('tackle', 40, 0)
+        attacker = battle_notes.PokemonNote(poke_id=25, name='pikachu', speed=90, hp=-1,
+                                            current_attack=AffectingMove('attack', 55, 0, move))
+        defender = battle_notes.PokemonNote(poke_id=25, name='pikachu', speed=90, hp=12,
+                                            current_attack=AffectingMove('defense', 40, 0, move))
+        with patch.multiple(battle_notes.DBCache, DIM_MOVE_CACHE={'tackle': 11}, DIM_POKEMON_CACHE={25: 22},
+                            DIM_STATS_CACHE={('attack', 'tackle'): 31, ('defense', 'tackle'): 32}):
+            battle_notes.write_battle_notes([battle_notes.BattleNote(attacker, defender, 1.5, 3, 42, 'v1', 'knockout')])
+
+        mock_upsert_matchups.assert_called_once_with([
+            {'pokemon_id_1': 22, 'pokemon_id_2': 22, 'battles': 1, 'wins': 0,
+             'total_duration_s': 1.5, 'total_turns': 3}])
+
+    @patch('battle_stat.database._supports_copy', return_value=True)
+    @patch('battle_stat.database.db_session')
+    @patch('battle_stat.battle_notes.upsert_matchups')
+    @patch('battle_stat.battle_notes.resolve_dimensions')
+    def test_copy_rows(self, mock_resolve_dimensions, mock_upsert_matchups, mock_db_session, mock_supports_copy):
+        """
+        Test that the notes are loaded with COPY as CSV rows PostgreSQL accepts: integers in the INT columns.
+        """
+        copied = {}
+        cursor = mock_db_session.connection.return_value.connection.cursor.return_value
+        cursor.copy_expert.side_effect = lambda sql, buffer: copied.setdefault(sql.split()[1], buffer.read())
+        mock_db_session.execute.return_value.scalars.return_value.all.return_value = [101, 102]
+        move = Move('tackle', 40, 0)
+        attacker = battle_notes.PokemonNote(poke_id=1, name='bulbasaur', speed=45, hp=27.63,
+                                            current_attack=AffectingMove('attack', 49, 0, move))
+        defender = battle_notes.PokemonNote(poke_id=25, name='pikachu', speed=90, hp=-3.4,
+                                            current_attack=AffectingMove('defense', 40, 0, move))
+        with patch.multiple(battle_notes.DBCache, DIM_MOVE_CACHE={'tackle': 11},
+                            DIM_POKEMON_CACHE={1: 21, 25: 22},
+                            DIM_STATS_CACHE={('attack', 'tackle'): 31, ('defense', 'tackle'): 32}):
+            battle_notes.write_battle_notes([battle_notes.BattleNote(attacker, defender, 0.0123, 4, 42, 'v1',
+                                                                     'knockout')])
+
+        attack_rows = [dict(zip(['id'] + ATTACK_COLUMNS, row.split(',')))
+                       for row in copied['fact_attack'].splitlines()]
+        battle_row = dict(zip(BATTLE_COLUMNS + ATTACK_ID_COLUMNS, copied['fact_battle'].strip().split(',')))
+        self.assertEqual([(x['id'], x['hp']) for x in attack_rows], [('101', '28'), ('102', '-3')])
+        self.assertEqual((battle_row['attack_pokemon_id_1'], battle_row['attack_pokemon_id_2']), ('101', '102'))
+        self.assertEqual((battle_row['battle_duration_s'], battle_row['turns']), ('0', '4'))
+        mock_db_session.commit.assert_called_once()
 
 # This allows running the tests from the command line
 if __name__ == '__main__':
@@ -0,0 +1,93 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import catalog
+import fetch_poke_data
+from catalog import Catalog, compile_catalog, get_catalog
+from config import Config
+from exceptions import CatalogError
+from fetch_poke_data import CACHE_MOVES, CACHE_POKEMONS
+from test_simulate import PIKACHU, BULBASAUR
+
+MOVES = {'thunder-shock': (40, 0), 'tackle': (40, 0), 'splash': (None, 0),
+         'growl': {'attack': (None, -1)}, 'charm': {'attack': (None, -2), 'defense': (None, 1)}}
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'catalog.bin')
+        self.summary = compile_catalog([PIKACHU, BULBASAUR, PIKACHU], MOVES, self.path)
+        self.catalog = Catalog(self.path)
+        self.addCleanup(self.catalog.close)
+
+    def test_lookups(self):
+        """
+        Test that a compiled catalog returns the Pokémon by name and id and the moves as CACHE_MOVES entries.
+        """
+        self.assertEqual(self.summary['pokemons'], 2)
+        self.assertEqual(len(self.catalog), 2)
+        self.assertEqual(self.catalog.pokemon_names(), ['bulbasaur', 'pikachu'])
+        self.assertEqual(self.catalog.pokemon(' Pikachu'), PIKACHU)
+        self.assertEqual(self.catalog.pokemon(1), BULBASAUR)
+        self.assertIsNone(self.catalog.pokemon('mew'))
+        self.assertIsNone(self.catalog.pokemon(151))
+        for name, entry in MOVES.items():
+            self.assertEqual(self.catalog.move(name), entry)
+        self.assertIsNone(self.catalog.move('surf'))
+
+    def test_invalid_catalog(self):
+        """
+        Test that a file of another format is rejected and that get_catalog only reports it.
+        """
+        with open(self.path, 'r+b') as f:
+            f.write(struct.pack('=8sI', b'POKECAT\0', 99))
+
+        with self.assertRaises(CatalogError):
+            Catalog(self.path)
+        self.addCleanup(setattr, catalog, '_catalog_path', None)
+        with patch.object(Config, 'CATALOG_PATH', self.path), \
+                patch('builtins.print') as mock_print:
+            self.assertIsNone(get_catalog())
+        mock_print.assert_called_once()
+
+    def test_previous_catalog_is_closed(self):
+        """
+        Test that get_catalog closes the catalog it mapped before when the catalog path changes.
+        """
+        self.addCleanup(setattr, catalog, '_catalog_path', None)
+        with patch.object(Config, 'CATALOG_PATH', self.path):
+            previous = get_catalog()
+        with patch.object(Config, 'CATALOG_PATH', ''):
+            self.assertIsNone(get_catalog())
+
+        self.assertTrue(previous._mmap.closed)
+
+    @patch('fetch_poke_data._get_json')
+    @patch('fetch_poke_data.fetch_data_sync')
+    def test_fetches_read_the_catalog(self, mock_fetch_data_sync, mock_get_json):
+        """
+        Test that the Pokémon and the moves of a battle are read from the catalog instead of PokeAPI.
+        """
+        CACHE_POKEMONS.clear()
+        self.addCleanup(CACHE_POKEMONS.clear)
+        self.addCleanup(CACHE_MOVES.clear)
+        self.addCleanup(setattr, catalog, '_catalog_path', None)
+
+        with patch.object(Config, 'CATALOG_PATH', self.path):
+            pokemon1, pokemon2 = fetch_poke_data.resolve_move_pool(
+                *fetch_poke_data.fetch_pokemons_data('pikachu', 1))
+
+        self.assertEqual((pokemon1, pokemon2), (PIKACHU, BULBASAUR))
+        self.assertEqual(CACHE_MOVES['growl'], {'attack': (None, -1)})
+        mock_fetch_data_sync.assert_not_called()
+        mock_get_json.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import battle_stat
+from battle_stat import db_session
+
+
+class TestDBSession(unittest.TestCase):
+
+    def tearDown(self):
+        db_session.remove()
+
+    def test_session_per_thread(self):
+        """
+        Test that every thread gets its own session, reused for the life of the thread.
+        """
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(db_session()))
+        thread.start()
+        thread.join()
+
+        self.assertIs(db_session(), db_session())
+        self.assertIsNot(sessions[0], db_session())
+
+    def test_after_fork_in_child(self):
+        """
+        Test that a forked child forgets the session inherited from the parent.
+        """
+        session = db_session()
+
+        battle_stat._after_fork_in_child()
+
+        self.assertIsNot(db_session(), session)
+
+    def test_init_engine(self):
+        """
+        Test that switching the database binds new sessions to the new engine.
+        """
+        previous_engine = battle_stat.engine
+        self.addCleanup(battle_stat.init_engine, previous_engine.url)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        battle_stat.init_engine(f"sqlite:///{os.path.join(directory.name, 'test.sqlite3')}")
+
+        self.assertIsNot(battle_stat.engine, previous_engine)
+        self.assertEqual(db_session.get_bind().dialect.name, 'sqlite')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import battle_stat
+from battle_stat import DBCache
+from battle_stat.battle_notes import BattleNote, PokemonNote, write_battle_notes
+from battle_stat.database import init_schema
+from battle_stat.export import export_battles, load_export
+from model.affecting_move import AffectingMove
+from model.move import Move
+
+
+def note(poke_id, name, hp, stat_type, move):
+    return PokemonNote(poke_id=poke_id, name=name, speed=50, hp=hp,
+                       current_attack=AffectingMove(stat_type, 50, 1, move))
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(battle_stat.init_engine, battle_stat.engine.url)
+        battle_stat.init_engine('sqlite://')
+        init_schema()
+        patcher = patch.multiple(DBCache, DIM_MOVE_CACHE={}, DIM_POKEMON_CACHE={}, DIM_STATS_CACHE={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_export_battles(self):
+        """
+        Test that the battles are streamed in chunks to column files and read back memory-mapped, dimensions as codes.
+        """
+        tackle, growl = Move('tackle', 40, 0), Move('growl', None, -1)
+        notes = [BattleNote(note(25, 'pikachu', 30 - i, 'attack', tackle),
+                            note(1, 'bulbasaur', 20 - i, 'defense', growl))
+                 for i in range(6)]
+        notes.append(BattleNote(note(25, 'pikachu', 5, 'attack', tackle),
+                                note(1, 'bulbasaur', -2, 'attack', tackle), 1.5, 7, 42))
+        write_battle_notes(notes)
+
+        manifest = export_battles(self.directory, chunk_size=3)
+        data = load_export(self.directory)
+
+        self.assertEqual(manifest['rows'], 7)
+        self.assertIsInstance(data['battle_id'], np.memmap)
+        self.assertEqual(list(data['battle_id']), sorted(data['battle_id']))
+        self.assertEqual(data['pokemon_names'][data['pokemon_1']].tolist(), ['pikachu'] * 7)
+        self.assertEqual(data['winner'].tolist(), [-1] * 6 + [data['pokemon_1'][0]])
+        self.assertEqual(data['pokemon_names'][data['winner'][-1]], 'pikachu')
+        self.assertEqual(data['move_names'][data['attack_2_move']].tolist(), ['growl'] * 6 + ['tackle'])
+        self.assertEqual(data['attack_1_hp'].tolist(), [30, 29, 28, 27, 26, 25, 5])
+        self.assertEqual(data['turns'].tolist(), [-1] * 6 + [7])
+        self.assertEqual(data['seed'].tolist(), [-1] * 6 + [42])
+        self.assertTrue(np.isnan(data['battle_duration_s'][0]))
+        self.assertFalse(np.isnat(data['timestamp']).any())
+
+
+if __name__ == '__main__':
+    unittest.main()
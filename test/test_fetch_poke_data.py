@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch, AsyncMock
+
+import fetch_poke_data
+from fetch_poke_data import Crawler, CACHE_MOVES, CACHE_POKEMONS
+
+
+class TestCrawler(unittest.TestCase):
+
+    def setUp(self):
+        CACHE_MOVES.clear()
+        self.addCleanup(CACHE_MOVES.clear)
+
+    @patch('fetch_poke_data._get_json', new_callable=AsyncMock)
+    def test_concurrent_fetches_of_a_url_are_deduplicated(self, mock_get_json):
+        """
+        Test that concurrent fetches of the same URL result in a single request.
+        """
+        mock_get_json.return_value = (200, {'power': 40}, None)
+
+        async def crawl():
+            crawler = Crawler(session=None)
+            return await asyncio.gather(crawler.fetch('move/1'),
+                                        crawler.fetch('move/1'))
+
+        results = asyncio.run(crawl())
+
+        self.assertEqual(results, [{'power': 40}, {'power': 40}])
+        mock_get_json.assert_called_once()
+
+    @patch('fetch_poke_data._get_json', new_callable=AsyncMock)
+    def test_retries_on_server_errors(self, mock_get_json):
+        """
+        Test that 429/5xx responses are retried and a non retryable status gives up immediately.
+        """
+        mock_get_json.side_effect = [(503, {}, None), (429, {}, 0),
+                                     (200, {'power': 40}, None),
+                                     (404, {}, None)]
+
+        async def crawl():
+            crawler = Crawler(session=None, max_retries=3, backoff_s=0)
+            return await crawler.fetch('move/1'), await crawler.fetch('move/2')
+
+        found, missing = asyncio.run(crawl())
+
+        self.assertEqual(found, {'power': 40})
+        self.assertEqual(missing, {})
+        self.assertEqual(mock_get_json.call_count, 4)
+
+    @patch('fetch_poke_data._get_json', new_callable=AsyncMock)
+    def test_stream_stats_skips_failed_fetches(self, mock_get_json):
+        """
+        Test that the moves of all the stats are fetched once and a move whose details can't be fetched is skipped
+        instead of failing the whole stat.
+        """
+        payloads = {'stat': {'results': [{'name': 'attack', 'url': 'stat/attack'},
+                                         {'name': 'defense', 'url': 'stat/defense'}]},
+                    'attack': {'affecting_moves': {
+                        'increase': [], 'decrease': [{'change': -1, 'move': {'name': 'growl'}},
+                                                     {'change': -1, 'move': {'name': 'broken'}}]}},
+                    'defense': {'affecting_moves': {
+                        'increase': [{'change': 1, 'move': {'name': 'growl'}}], 'decrease': []}},
+                    'growl': {'power': None, 'stat_changes': [{'change': -1, 'stat': {'name': 'attack'}},
+                                                              {'change': 1, 'stat': {'name': 'defense'}}]}}
+        mock_get_json.side_effect = lambda url, session: (
+            (200, payloads[url.rsplit('/', 1)[-1]], None)
+            if url.rsplit('/', 1)[-1] in payloads else (404, {}, None))
+
+        with patch.multiple(fetch_poke_data, POKE_API_ALL_STATS='stat', POKE_API_MOVE='move/'):
+            asyncio.run(fetch_poke_data.stream_stats(Crawler(session=None, backoff_s=0), consumers=2))
+
+        self.assertEqual(CACHE_MOVES, {'growl': {'attack': (None, -1), 'defense': (None, 1)}})
+        self.assertEqual(mock_get_json.call_count, 5)
+        self.assertEqual(fetch_poke_data._pending_moves, {})
+
+
+class TestResolveMovePool(unittest.TestCase):
+
+    def setUp(self):
+        CACHE_MOVES.clear()
+        self.addCleanup(CACHE_MOVES.clear)
+
+    @patch('fetch_poke_data._get_json', new_callable=AsyncMock)
+    def test_moves_are_resolved_before_the_battle(self, mock_get_json):
+        """
+        Test that the missing moves of both Pokémon are fetched once and unresolvable moves leave the move pool.
+        """
+        CACHE_MOVES['tackle'] = (40, 0)
+        payloads = {'growl': {'power': None, 'stat_changes': [{'change': -1, 'stat': {'name': 'attack'}}]},
+                    'ember': {'power': 40, 'stat_changes': []}}
+        mock_get_json.side_effect = lambda url, session: (
+            (200, payloads[url.rsplit('/', 1)[-1]], None)
+            if url.rsplit('/', 1)[-1] in payloads else (404, {}, None))
+
+        pokemon1, pokemon2 = fetch_poke_data.resolve_move_pool(
+            {'name': 'a', 'moves': ('tackle', 'growl', 'broken')},
+            {'name': 'b', 'moves': ('growl', 'ember')})
+
+        self.assertEqual(pokemon1['moves'], ('tackle', 'growl'))
+        self.assertEqual(pokemon2['moves'], ('growl', 'ember'))
+        self.assertEqual(CACHE_MOVES['growl'], {'attack': (None, -1)})
+        self.assertEqual(CACHE_MOVES['ember'], (40, 0))
+        self.assertEqual(mock_get_json.call_count, 3)
+
+
+    @patch('fetch_poke_data._get_json', new_callable=AsyncMock)
+    def test_moves_in_flight_are_awaited(self, mock_get_json):
+        """
+        Test that a move already being fetched, e.g. by the background crawl, is awaited instead of fetched again.
+        """
+        mock_get_json.return_value = (200, {'power': 40, 'stat_changes': []}, None)
+        (claimed,), _ = fetch_poke_data._claim_moves(['ember'])
+        threading.Timer(0.05, fetch_poke_data._publish_move,
+                        (claimed, {'power': 90, 'stat_changes': []})).start()
+
+        pokemon, = fetch_poke_data.resolve_move_pool({'name': 'a', 'moves': ('ember', 'tackle')})
+
+        self.assertEqual(pokemon['moves'], ('ember', 'tackle'))
+        self.assertEqual(CACHE_MOVES['ember'], (90, 0))
+        mock_get_json.assert_called_once()
+
+
+class TestFetchPokemonData(unittest.TestCase):
+
+    def setUp(self):
+        CACHE_POKEMONS.clear()
+        self.addCleanup(CACHE_POKEMONS.clear)
+
+    @patch('fetch_poke_data.fetch_data_sync')
+    def test_pokemon_is_cached_by_name_and_id(self, mock_fetch_data_sync):
+        """
+        Test that a fetched Pokémon is parsed once and served from the cache by its name and by its id.
+        """
+        mock_fetch_data_sync.return_value = {
+            'id': 25, 'name': 'pikachu',
+            'moves': [{'move': {'name': 'thunder-shock'}}],
+            'stats': [{'stat': {'name': 'hp'}, 'base_stat': 35, 'effort': 0},
+                      {'stat': {'name': 'speed'}, 'base_stat': 90, 'effort': 2}]}
+
+        by_name = fetch_poke_data.fetch_pokemon_data(' Pikachu')
+        by_id, mirror = fetch_poke_data.fetch_pokemons_data(25, '25')
+
+        self.assertEqual(by_name, {'poke_id': 25, 'name': 'pikachu',
+                                   'moves': ('thunder-shock',),
+                                   'stats': {'hp': (35, 0), 'speed': (90, 2)}})
+        self.assertEqual(by_id, by_name)
+        self.assertEqual(mirror, by_name)
+        mock_fetch_data_sync.assert_called_once_with(fetch_poke_data.POKE_API_POKEMON, 'pikachu')
+
+
+if __name__ == '__main__':
+    unittest.main()
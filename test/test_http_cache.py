@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+import fetch_poke_data
+from http_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'cache.sqlite3')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_put_and_get_survives_reopen(self):
+        """
+        Test that stored responses are persisted on disk together with their validators.
+        """
+        cache = ResponseCache(self.path, ttl_s=60, max_bytes=1024)
+        cache.put('url1', '{"name": "pikachu"}', etag='"abc"')
+        cache.close()
+
+        cached = ResponseCache(self.path, ttl_s=60, max_bytes=1024).get('url1')
+
+        self.assertEqual(cached.data, {'name': 'pikachu'})
+        self.assertTrue(cached.is_fresh)
+        self.assertEqual(cached.conditional_headers(), {'If-None-Match': '"abc"'})
+
+    def test_expired_entry_is_stale(self):
+        """
+        Test that entries older than the TTL are returned as stale until they are revalidated.
+        """
+        cache = ResponseCache(self.path, ttl_s=0, max_bytes=1024)
+        cache.put('url1', '{}')
+        self.assertFalse(cache.get('url1').is_fresh)
+
+        cache.ttl_s = 60
+        cache.revalidate('url1')
+        self.assertTrue(cache.get('url1').is_fresh)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """
+        Test that the least recently used entries are evicted once the stored bodies exceed `max_bytes`.
+        """
+        cache = ResponseCache(self.path, ttl_s=60, max_bytes=20)
+        cache.put('url1', '"aaaaaaaa"')
+        cache.put('url2', '"bbbbbbbb"')
+        cache.get('url1')
+        cache.put('url3', '"cccccccc"')
+
+        self.assertIsNotNone(cache.get('url1'))
+        self.assertIsNone(cache.get('url2'))
+        self.assertIsNotNone(cache.get('url3'))
+
+    def test_stored_size_is_tracked(self):
+        """
+        Test that a replaced entry only counts once and that a reopened cache counts the entries already stored.
+        """
+        cache = ResponseCache(self.path, ttl_s=60, max_bytes=20)
+        cache.put('url1', '"aaaaaaaa"')
+        cache.put('url1', '"AAAAAAAA"')
+        cache.put('url2', '"bbbbbbbb"')
+        self.assertEqual(cache.get('url1').data, 'AAAAAAAA')
+        self.assertIsNotNone(cache.get('url2'))
+        cache.close()
+
+        cache = ResponseCache(self.path, ttl_s=60, max_bytes=20)
+        cache.put('url3', '"cccccccc"')
+
+        self.assertIsNone(cache.get('url1'))
+        self.assertIsNotNone(cache.get('url2'))
+        self.assertIsNotNone(cache.get('url3'))
+
+
+class TestFetchDataSyncCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(os.path.join(self.tmp_dir.name, 'cache.sqlite3'),
+                                   ttl_s=0, max_bytes=1024)
+        patcher = patch('fetch_poke_data.get_response_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @patch('fetch_poke_data.get_http_session')
+    def test_stale_entry_is_revalidated(self, mock_get_http_session):
+        """
+        Test that a stale entry is revalidated with its ETag and served from the cache on `304 Not Modified`.
+        """
+        self.cache.put('api/pokemon/pikachu', json.dumps({'id': 25}), etag='"v1"')
+        mock_get = mock_get_http_session.return_value.get
+        mock_get.return_value = MagicMock(status_code=304)
+
+        data = fetch_poke_data.fetch_data_sync('api/pokemon/', 'pikachu')
+
+        self.assertEqual(data, {'id': 25})
+        mock_get.assert_called_once_with('api/pokemon/pikachu',
+                                         headers={'If-None-Match': '"v1"'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code: str) -> str:
+    """Runs code in a fresh interpreter and returns its output."""
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                          cwd=PROJECT_ROOT).stdout
+
+
+class TestImports(unittest.TestCase):
+
+    def test_battles_import_no_clients(self):
+        """
+        Test that running battles imports neither the HTTP clients nor the database.
+        """
+        modules = run_python('import sys\n'
+                             'from main import battle\n'
+                             'print(" ".join(sys.modules))').split()
+
+        self.assertFalse({'aiohttp', 'requests', 'sqlalchemy', 'asyncio'} & set(modules))
+
+    def test_battle_stat_creates_no_engine(self):
+        """
+        Test that importing the models creates no engine, the first session does.
+        """
+        output = run_python('import battle_stat, battle_stat.battle_notes\n'
+                            'print(battle_stat._engine)\n'
+                            'battle_stat.init_engine("sqlite://")\n'
+                            'print(battle_stat.db_session.get_bind() is battle_stat.engine)')
+
+        self.assertEqual(output.split(), ['None', 'True'])
+
+
+if __name__ == '__main__':
+    unittest.main()
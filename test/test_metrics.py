@@ -0,0 +1,100 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import metrics
+from fetch_poke_data import CACHE_MOVES
+from main import battle
+from model.pokemon import Pokemon
+from test_simulate import PIKACHU, BULBASAUR
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metrics.enable, metrics.is_enabled())
+        self.addCleanup(metrics.REGISTRY.reset)
+        metrics.REGISTRY.reset()
+
+    def test_disabled(self):
+        """
+        Test that nothing is recorded while metrics are disabled.
+        """
+        metrics.enable(False)
+
+        metrics.inc('calls_total')
+        metrics.observe('call_seconds', 0.1)
+        with metrics.timed('call_seconds'):
+            pass
+
+        self.assertEqual(metrics.REGISTRY.to_dict(), {'counters': [], 'histograms': []})
+
+    def test_exports(self):
+        """
+        Test that counters and histograms are exported as JSON and in the Prometheus text format.
+        """
+        metrics.enable()
+
+        metrics.inc('http_requests_total', status=200)
+        metrics.inc('http_requests_total', 2, status=200)
+        metrics.observe('sql_statements_per_battle', 3, metrics.COUNT_BUCKETS)
+        metrics.observe('sql_statements_per_battle', 7, metrics.COUNT_BUCKETS)
+
+        data = json.loads(metrics.to_json())
+        self.assertEqual(data['counters'], [{'name': 'http_requests_total', 'labels': {'status': '200'}, 'value': 3}])
+        histogram, = data['histograms']
+        self.assertEqual((histogram['count'], histogram['sum']), (2, 10))
+        self.assertIn([5, 1], histogram['buckets'])
+
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE http_requests_total counter\nhttp_requests_total{status="200"} 3\n', text)
+        self.assertIn('sql_statements_per_battle_bucket{le="10"} 2\n', text)
+        self.assertIn('sql_statements_per_battle_bucket{le="+Inf"} 2\n', text)
+        self.assertIn('sql_statements_per_battle_count 2\n', text)
+
+    def test_mixed_label_types(self):
+        """
+        Test that a metric recorded with label values of different types, e.g. an HTTP status or 'error', is exported.
+        """
+        metrics.enable()
+
+        metrics.inc('http_requests_total', status=200)
+        metrics.inc('http_requests_total', status='error')
+        metrics.inc('http_requests_total', status='200')
+        metrics.observe('http_request_seconds', 0.1, status=404)
+        metrics.observe('http_request_seconds', 0.2, status='error')
+
+        data = json.loads(metrics.to_json())
+        self.assertEqual([(x['labels'], x['value']) for x in data['counters']],
+                         [({'status': '200'}, 2), ({'status': 'error'}, 1)])
+        self.assertEqual(len(data['histograms']), 2)
+        text = metrics.to_prometheus()
+        self.assertIn('http_requests_total{status="200"} 2\nhttp_requests_total{status="error"} 1\n', text)
+        self.assertIn('http_request_seconds_count{status="404"} 1\n', text)
+
+    def test_battle_metrics(self):
+        """
+        Test that battles count their outcome, the damage computations and the errors they swallow.
+        """
+        metrics.enable()
+        CACHE_MOVES.update({'thunder-shock': (40, 0), 'tackle': (40, 0),
+                            'growl': {'attack': (None, -1)}})
+        self.addCleanup(CACHE_MOVES.clear)
+        pokemon1, pokemon2 = Pokemon(**PIKACHU), Pokemon(**BULBASAUR)
+
+        with patch.object(Pokemon, 'attack', side_effect=ValueError('boom')):
+            result = battle(pokemon1, pokemon2, verbose=False, take_notes=False)
+        battle(Pokemon(**PIKACHU), Pokemon(**BULBASAUR), verbose=False, take_notes=False)
+
+        counters = {(x['name'], tuple(x['labels'].values())): x['value']
+                    for x in metrics.REGISTRY.to_dict()['counters']}
+        self.assertIsNone(result.winner)
+        self.assertEqual(counters[('battle_errors_total', ('ValueError',))], 4)
+        self.assertEqual(counters[('battles_total', ('draw',))], 1)
+        self.assertEqual(counters[('battles_total', ('win',))], 1)
+        self.assertTrue(any(x['name'] == 'damage_seconds' and x['count'] > 0
+                            for x in metrics.REGISTRY.to_dict()['histograms']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+import monte_carlo
+from fetch_poke_data import CACHE_MOVES
+from model.pokemon import Pokemon
+from test_simulate import PIKACHU, BULBASAUR
+
+
+class TestMonteCarlo(unittest.TestCase):
+
+    def setUp(self):
+        CACHE_MOVES.update({'thunder-shock': (40, 0), 'tackle': (40, 0),
+                            'growl': {'attack': (None, -1)}})
+        self.addCleanup(CACHE_MOVES.clear)
+
+    def test_simulate_matchup(self):
+        """
+        Test that every replica ends with a winner, its battle length and the winner's remaining HP.
+        """
+        result = monte_carlo.simulate_matchup(Pokemon(**PIKACHU), Pokemon(**BULBASAUR),
+                                              replicas=2000, seed=7)
+
+        self.assertEqual(result.replicas, 2000)
+        self.assertEqual(result.draw_rate, 0.0)
+        self.assertTrue(np.all(result.turns >= 1))
+        self.assertTrue(np.all(result.remaining_hp > 0))
+        self.assertEqual(result.turn_distribution().sum(), 2000)
+        self.assertEqual(result.remaining_hp_distribution(bins=5)[0].sum(), 2000)
+
+    def test_seed_makes_results_reproducible(self):
+        """
+        Test that two runs with the same seed give the same battles.
+        """
+        results = [monte_carlo.simulate_matchup(Pokemon(**PIKACHU), Pokemon(**BULBASAUR),
+                                                replicas=500, seed=3) for _ in range(2)]
+
+        np.testing.assert_array_equal(results[0].winners, results[1].winners)
+        np.testing.assert_array_equal(results[0].turns, results[1].turns)
+
+    def test_battles_without_damage_are_draws(self):
+        """
+        Test that battles in which no move deals damage stop as draws after `max_turns`, or once they are stalled
+        for `stall_turns` turns.
+        """
+        pokemon = dict(PIKACHU, moves=('growl',))
+
+        result = monte_carlo.simulate_matchup(Pokemon(**pokemon), Pokemon(**pokemon),
+                                              replicas=100, max_turns=20, stall_turns=50)
+        stalled = monte_carlo.simulate_matchup(Pokemon(**pokemon), Pokemon(**pokemon),
+                                               replicas=100, max_turns=20, stall_turns=5)
+
+        self.assertEqual(result.draw_rate, 1.0)
+        self.assertTrue(np.all(result.turns == 20))
+        self.assertEqual(stalled.draw_rate, 1.0)
+        self.assertTrue(np.all(stalled.turns == 5))
+
+    def test_stat_changes_follow_the_creating_role(self):
+        """
+        Test that a move changing stats differently per role keeps the change of the role it was first used in, as
+        `main.battle` does.
+        """
+        CACHE_MOVES['shell-smash'] = {'attack': (None, 2), 'defense': (None, -1)}
+        pokemon = dict(PIKACHU, moves=('shell-smash',))
+        pokemon1, pokemon2 = Pokemon(**pokemon), Pokemon(**pokemon)
+        rng = np.random.default_rng(1)
+        side1, side2 = (monte_carlo._Side(x, 3, rng) for x in (pokemon1, pokemon2))
+        replicas = np.arange(3)
+
+        pokemon1.attack(pokemon2)
+        pokemon2.attack(pokemon1)
+        monte_carlo._attack(side1, side2, replicas, rng)
+        monte_carlo._attack(side2, side1, replicas, rng)
+
+        self.assertEqual((pokemon1.current_attack.stage, pokemon2.current_attack.stage), (4, -2))
+        np.testing.assert_array_equal(side1.stage[:, 0], [4, 4, 4])
+        np.testing.assert_array_equal(side2.stage[:, 0], [-2, -2, -2])
+
+
+if __name__ == '__main__':
+    unittest.main()
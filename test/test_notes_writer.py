@@ -0,0 +1,101 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from battle_stat.notes_writer import NotesWriter
+from model.pokemon import Pokemon
+
+
+def mock_pokemon(hp):
+    pokemon = MagicMock(spec=Pokemon)
+    pokemon.poke_id, pokemon.name, pokemon.speed, pokemon.hp = 1, 'pikachu', 90, hp
+    pokemon.current_attack = None
+    return pokemon
+
+
+class TestNotesWriter(unittest.TestCase):
+
+    def test_notes_are_written_in_batches(self):
+        """
+        Test that queued notes are written in batches of `batch_size` and the rest on flush.
+        """
+        batches = []
+        writer = NotesWriter(batch_size=2, flush_interval_s=60, write=batches.append).start()
+        self.addCleanup(writer.close)
+
+        for hp in (50, 40, 30):
+            writer.submit(mock_pokemon(hp), mock_pokemon(10))
+        writer.flush()
+
+        self.assertEqual([len(x) for x in batches], [2, 1])
+        self.assertEqual([x[0].hp for batch in batches for x in batch], [50, 40, 30])
+        self.assertEqual(writer.written, 3)
+
+    def test_notes_are_snapshots(self):
+        """
+        Test that the queued notes don't change when the Pokémon keeps battling.
+        """
+        batches = []
+        writer = NotesWriter(batch_size=10, flush_interval_s=60, write=batches.append).start()
+        pokemon = mock_pokemon(50)
+
+        writer.submit(pokemon, mock_pokemon(10), battle_duration=1.5, turns=7, seed=42,
+                      end_reason='stalled')
+        pokemon.hp = 0
+        writer.close()
+
+        (attacker, defender, battle_duration, turns, seed, catalog_version, end_reason), = batches[0]
+        self.assertEqual((attacker.hp, battle_duration, turns, seed, end_reason), (50, 1.5, 7, 42, 'stalled'))
+
+    def test_notes_are_written_after_the_flush_interval(self):
+        """
+        Test that a partial batch is written once the flush interval is over.
+        """
+        written = threading.Event()
+        writer = NotesWriter(batch_size=10, flush_interval_s=0.01,
+                             write=lambda batch: written.set()).start()
+        self.addCleanup(writer.close)
+
+        writer.submit(mock_pokemon(50), mock_pokemon(10))
+
+        self.assertTrue(written.wait(timeout=5))
+
+    def test_failed_batches_are_counted(self):
+        """
+        Test that a batch failing to be written doesn't stop the writer.
+        """
+        write = MagicMock(side_effect=[Exception('connection lost'), None])
+        writer = NotesWriter(batch_size=1, flush_interval_s=60, write=write).start()
+        self.addCleanup(writer.close)
+
+        with patch('battle_stat.notes_writer.init_db_cache'):
+            writer.submit(mock_pokemon(50), mock_pokemon(10))
+            writer.submit(mock_pokemon(40), mock_pokemon(10))
+            writer.flush()
+
+        self.assertEqual((writer.written, writer.failed), (1, 1))
+
+    def test_failed_batch_is_written_note_by_note(self):
+        """
+        Test that the notes of a failed batch are retried one by one, so only the bad note is lost.
+        """
+        def write(batch):
+            if any(x.attacker.hp == 0 for x in batch):
+                raise Exception('bad note')
+            written.extend(batch)
+
+        written = []
+        writer = NotesWriter(batch_size=3, flush_interval_s=60, write=write).start()
+        self.addCleanup(writer.close)
+
+        with patch('battle_stat.notes_writer.init_db_cache'), patch('builtins.print'):
+            for hp in (50, 0, 30):
+                writer.submit(mock_pokemon(hp), mock_pokemon(10))
+            writer.flush()
+
+        self.assertEqual([x.attacker.hp for x in written], [50, 30])
+        self.assertEqual((writer.written, writer.failed), (2, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
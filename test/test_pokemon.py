@@ -0,0 +1,97 @@
+import unittest
+
+from exceptions import UnresolvedMoveError
+from fetch_poke_data import CACHE_MOVES
+from model.affecting_move import AffectingMove
+from model.move import intern_move
+from model.pokemon import Pokemon, ATTACK, DEFENSE
+
+STATS = {'hp': (35, 0), 'attack': (55, 1), 'special-attack': (50, 0), 'defense': (40, 0), 'speed': (90, 2)}
+
+
+class TestPokemonMoveIndex(unittest.TestCase):
+
+    def setUp(self):
+        CACHE_MOVES.update({'tackle': (40, 0),
+                            'growl': {'attack': (None, -1), 'special-attack': (None, -1)},
+                            'acid-armor': {'defense': (None, 2)},
+                            'cosmic-power': {'special-defense': (None, 1)}})
+        self.addCleanup(CACHE_MOVES.clear)
+
+    def test_move_index(self):
+        """
+        Test that the stat of every move is resolved per attack type and moves without a matching stat are left out.
+        """
+        pokemon = Pokemon(1, 'pikachu', ('tackle', 'growl', 'acid-armor', 'cosmic-power'), STATS)
+
+        self.assertEqual(pokemon.usable_moves, ('tackle', 'growl', 'acid-armor'))
+        self.assertEqual(pokemon.move_index['tackle'][ATTACK], (None, intern_move('tackle', 40, 0)))
+        self.assertEqual(pokemon.move_index['growl'][ATTACK], ('attack', intern_move('growl', None, -1)))
+        self.assertEqual(pokemon.move_index['growl'][DEFENSE], ('attack', intern_move('growl', None, -1)))
+        self.assertEqual(pokemon.move_index['acid-armor'][ATTACK], ('defense', intern_move('acid-armor', None, 2)))
+
+    def test_used_moves_are_reused(self):
+        """
+        Test that a move keeps its AffectingMove once it has been used.
+        """
+        pokemon = Pokemon(1, 'pikachu', ('acid-armor',), STATS)
+
+        pokemon.set_current_move(DEFENSE)
+        first_attack = pokemon.current_attack
+        pokemon.set_current_move(ATTACK)
+
+        self.assertIs(pokemon.current_attack, first_attack)
+        self.assertEqual(pokemon.attacks, {'acid-armor': first_attack})
+        self.assertEqual(first_attack.stat_type, 'defense')
+
+    def test_unresolved_move(self):
+        """
+        Test that a Pokémon can't be created before its moves are resolved.
+        """
+        with self.assertRaises(UnresolvedMoveError):
+            Pokemon(1, 'pikachu', ('thunder',), STATS)
+
+
+class TestMoveRegistry(unittest.TestCase):
+
+    def test_moves_are_interned_and_immutable(self):
+        """
+        Test that Pokémon using the same move share one immutable Move.
+        """
+        CACHE_MOVES['tackle'] = (40, 0)
+        self.addCleanup(CACHE_MOVES.clear)
+
+        pokemon1 = Pokemon(1, 'pikachu', ('tackle',), STATS)
+        pokemon2 = Pokemon(2, 'raichu', ('tackle',), STATS)
+
+        self.assertIs(pokemon1.move_index['tackle'][ATTACK][1], pokemon2.move_index['tackle'][ATTACK][1])
+        with self.assertRaises(AttributeError):
+            pokemon1.move_index['tackle'][ATTACK][1].power = 100
+
+
+class TestAffectingMove(unittest.TestCase):
+
+    def test_stat_stages_are_clamped(self):
+        """
+        Test that every use of a move moves the stage of its stat, within ±6 stages, without recalculating the stat.
+        """
+        raise_attack = AffectingMove('attack', 55, 1, intern_move('swords-dance', None, 2))
+        lower_defense = AffectingMove('defense', 40, 0, intern_move('screech', None, -2))
+        attack_stat, defense_stat = raise_attack.stat, lower_defense.stat
+
+        self.assertEqual(raise_attack.attacking_damage(lower_defense), 0)
+        self.assertEqual((raise_attack.stage, lower_defense.stage), (2, -2))
+        self.assertAlmostEqual(raise_attack.stat_changed, attack_stat * 2)
+        self.assertAlmostEqual(lower_defense.stat_changed, defense_stat / 2)
+
+        for _ in range(10):
+            raise_attack.attacking_damage(lower_defense)
+
+        self.assertEqual((raise_attack.stage, lower_defense.stage), (6, -6))
+        self.assertAlmostEqual(raise_attack.stat_changed, attack_stat * 4)
+        self.assertAlmostEqual(lower_defense.stat_changed, defense_stat / 4)
+        self.assertEqual((raise_attack.stat, lower_defense.stat), (attack_stat, defense_stat))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+
+import battle_stat
+from battle_stat import DBCache, db_session, notes_writer
+from battle_stat.battle_notes import init_db_cache
+from battle_stat.database import init_schema
+from config import Config
+from exceptions import CatalogVersionError
+from fetch_poke_data import CACHE_MOVES
+from main import battle
+from model.pokemon import Pokemon
+from replay import replay_battle, replay_recorded_battle
+from sqlalchemy import text
+import simulate
+from test_simulate import PIKACHU, BULBASAUR
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(battle_stat.init_engine, battle_stat.engine.url)
+        battle_stat.init_engine('sqlite://')
+        init_schema()
+
+        CACHE_MOVES.update({'thunder-shock': (40, 0), 'tackle': (40, 0),
+                            'growl': {'attack': (None, -1)}})
+        self.addCleanup(CACHE_MOVES.clear)
+        patcher = patch.multiple(DBCache, DIM_MOVE_CACHE={}, DIM_POKEMON_CACHE={}, DIM_STATS_CACHE={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_seeded_battles_repeat(self):
+        """
+        Test that battles of fresh Pokémon with the same seed fight the same turns.
+        """
+        logs = []
+        for _ in range(2):
+            logs.append([])
+            result = battle(Pokemon(**PIKACHU), Pokemon(**BULBASAUR), verbose=False, take_notes=False,
+                            seed=1234, turn_log=logs[-1])
+
+        self.assertEqual(result.seed, 1234)
+        self.assertEqual(logs[0], logs[1])
+        self.assertEqual(logs[0][-1].turn, result.turns)
+
+    @patch('replay.fetch_pokemons_data', return_value=[PIKACHU, BULBASAUR])
+    @patch('simulate.fetch_pokemons_data', return_value=[PIKACHU, BULBASAUR])
+    def test_replay_recorded_battle(self, mock_simulate_fetch, mock_replay_fetch):
+        """
+        Test that a battle recorded without its turns is replayed from its seed to the same outcome.
+        """
+        writer = notes_writer.NotesWriter().start()
+        self.addCleanup(writer.close)
+        init_db_cache()
+
+        with patch('battle_stat.notes_writer._notes_writer', writer), \
+                patch.object(Config, 'NOTES_PER_TURN', False):
+            simulate.run_simulation([('pikachu', 'bulbasaur')], repetitions=3)
+
+        battles = db_session.execute(text(
+            'SELECT b.id, b.turns, w.name FROM fact_battle b '
+            'LEFT JOIN dim_pokemon w ON w.id = b.winner_pokemon_id')).all()
+        attacks = db_session.execute(text('SELECT count(*) FROM fact_attack')).scalar()
+        self.assertEqual((len(battles), attacks), (3, 6))
+        for battle_id, turns, winner in battles:
+            replay = replay_recorded_battle(battle_id)
+            self.assertEqual(replay.result.turns, turns)
+            self.assertEqual(replay.result.winner and replay.result.winner.name, winner)
+
+    @patch('replay.fetch_pokemons_data', return_value=[PIKACHU, BULBASAUR])
+    def test_catalog_version_mismatch(self, mock_fetch_pokemons_data):
+        """
+        Test that a battle fought with other catalog data is not replayed.
+        """
+        with self.assertRaises(CatalogVersionError):
+            replay_battle('pikachu', 'bulbasaur', seed=1, catalog_version='0123456789abcdef')
+
+
+if __name__ == '__main__':
+    unittest.main()
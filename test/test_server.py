@@ -0,0 +1,134 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import patch
+
+from aiohttp.test_utils import AioHTTPTestCase
+
+import battle_stat
+from battle_stat import DBCache, notes_writer
+from battle_stat.battle_notes import init_db_cache
+from battle_stat.database import init_schema
+from exceptions import FetchingError
+from fetch_poke_data import CACHE_MOVES
+from server import create_app
+from test_simulate import PIKACHU, BULBASAUR
+
+
+class TestServer(AioHTTPTestCase):
+
+    def setUp(self):
+        self.addCleanup(battle_stat.init_engine, battle_stat.engine.url)
+        battle_stat.init_engine('sqlite://')
+        init_schema()
+
+        CACHE_MOVES.update({'thunder-shock': (40, 0), 'tackle': (40, 0),
+                            'growl': {'attack': (None, -1)}})
+        self.addCleanup(CACHE_MOVES.clear)
+        for patcher in (patch.multiple(DBCache, DIM_MOVE_CACHE={}, DIM_POKEMON_CACHE={}, DIM_STATS_CACHE={}),
+                        patch('server.fetch_pokemons_data', return_value=[PIKACHU, BULBASAUR])):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.writer = notes_writer.NotesWriter().start()
+        self.addCleanup(self.writer.close)
+        patcher = patch('battle_stat.notes_writer._notes_writer', self.writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        init_db_cache()
+        super().setUp()
+
+    async def get_application(self):
+        return create_app(pool=ThreadPoolExecutor(2))
+
+    async def test_battle(self):
+        """
+        Test that a battle returns its turns, replays from its seed and is recorded.
+        """
+        responses = []
+        for _ in range(2):
+            response = await self.client.post('/battle', json={'pokemon1': 'pikachu', 'pokemon2': 'bulbasaur',
+                                                               'seed': 7})
+            self.assertEqual(response.status, 200)
+            responses.append(await response.json())
+
+        self.assertEqual(responses[0], responses[1])
+        self.assertEqual(responses[0]['seed'], 7)
+        self.assertIn(responses[0]['winner'], ('pikachu', 'bulbasaur'))
+        self.assertEqual(responses[0]['turn_log'][-1]['turn'], responses[0]['turns'])
+        self.writer.flush()
+        self.assertEqual(self.writer.written, 2)
+
+    async def test_simulate_and_stats(self):
+        """
+        Test that simulations are split in chunks, recorded and reflected in the stats.
+        """
+        response = await self.client.post('/simulate', json={'pokemon1': 'pikachu', 'pokemon2': 'bulbasaur',
+                                                              'n': 120})
+        result = await response.json()
+        self.assertEqual(result['battles'], 120)
+        self.assertEqual(sum(result['wins']) + result['draws'], 120)
+
+        self.writer.flush()
+        response = await self.client.get('/stats/pikachu/bulbasaur')
+        matchup = await response.json()
+        self.assertEqual((matchup['battles'], matchup['wins']), (120, result['wins'][0]))
+        response = await self.client.get('/stats')
+        self.assertEqual({x['pokemon'] for x in await response.json()}, {'pikachu', 'bulbasaur'})
+        response = await self.client.get('/stats/pikachu')
+        self.assertEqual([x['opponent'] for x in (await response.json())['matchups']], ['bulbasaur'])
+
+    async def test_errors(self):
+        """
+        Test that invalid requests and unknown Pokémon are rejected.
+        """
+        response = await self.client.post('/simulate', json={'pokemon1': 'pikachu', 'n': 10})
+        self.assertEqual(response.status, 400)
+        for battles in (0, True):
+            response = await self.client.post('/simulate', json={'pokemon1': 'pikachu', 'pokemon2': 'bulbasaur',
+                                                                  'n': battles})
+            self.assertEqual(response.status, 400)
+        for seed in (2 ** 63, -1, True, 'abc'):
+            response = await self.client.post('/battle', json={'pokemon1': 'pikachu', 'pokemon2': 'bulbasaur',
+                                                                'seed': seed})
+            self.assertEqual(response.status, 400)
+        with patch('server.fetch_pokemons_data', side_effect=FetchingError('Unknown pokemon: missingno')):
+            response = await self.client.post('/battle', json={'pokemon1': 'missingno', 'pokemon2': 'bulbasaur'})
+        self.assertEqual(response.status, 404)
+        self.assertEqual(await response.json(), {'error': 'Unknown pokemon: missingno'})
+        response = await self.client.get('/stats/pikachu/mew')
+        self.assertEqual(response.status, 404)
+
+    async def test_metrics(self):
+        """
+        Test that the metrics are served in the Prometheus text format.
+        """
+        response = await self.client.get('/metrics')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.content_type, 'text/plain')
+
+
+class TestServerProcessPool(AioHTTPTestCase):
+
+    def setUp(self):
+        CACHE_MOVES.update({'thunder-shock': (40, 0), 'tackle': (40, 0),
+                            'growl': {'attack': (None, -1)}})
+        self.addCleanup(CACHE_MOVES.clear)
+        patcher = patch('server.fetch_pokemons_data', return_value=[PIKACHU, BULBASAUR])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+    async def get_application(self):
+        return create_app(pool=ProcessPoolExecutor(1), notes=False)
+
+    async def test_battle_in_worker_process(self):
+        """
+        Test that battles fought in a worker process send their results back.
+        """
+        response = await self.client.post('/simulate', json={'pokemon1': 'pikachu', 'pokemon2': 'bulbasaur',
+                                                              'n': 60})
+        result = await response.json()
+        self.assertEqual(sum(result['wins']) + result['draws'], 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
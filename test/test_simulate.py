@@ -0,0 +1,66 @@
+import io
+import unittest
+from unittest.mock import patch
+
+import simulate
+from fetch_poke_data import CACHE_MOVES
+from main import MAX_TURNS, STALLED, battle
+from model.pokemon import Pokemon
+
+PIKACHU = {'poke_id': 25, 'name': 'pikachu', 'moves': ('thunder-shock', 'growl'),
+           'stats': {'hp': (35, 0), 'attack': (55, 0), 'defense': (40, 0), 'speed': (90, 2)}}
+BULBASAUR = {'poke_id': 1, 'name': 'bulbasaur', 'moves': ('tackle',),
+             'stats': {'hp': (45, 0), 'attack': (49, 0), 'defense': (49, 0), 'speed': (45, 0)}}
+
+
+class TestSimulate(unittest.TestCase):
+
+    def setUp(self):
+        CACHE_MOVES.update({'thunder-shock': (40, 0), 'tackle': (40, 0),
+                            'growl': {'attack': (None, -1)}})
+        self.addCleanup(CACHE_MOVES.clear)
+
+    def test_parse_matchups(self):
+        """
+        Test that matchups are read from the arguments and from a file, skipping comments and empty lines.
+        """
+        matchups_file = io.StringIO('# matchups\nmew, mewtwo\n\nditto eevee\n')
+
+        matchups = simulate.parse_matchups(['pikachu:bulbasaur'], matchups_file)
+
+        self.assertEqual(matchups, [('pikachu', 'bulbasaur'), ('mew', 'mewtwo'), ('ditto', 'eevee')])
+        with self.assertRaises(ValueError):
+            simulate.parse_matchups(['pikachu'])
+
+    @patch('simulate.fetch_pokemons_data', return_value=[PIKACHU, BULBASAUR])
+    def test_run_simulation(self, mock_fetch_pokemons_data):
+        """
+        Test that every repetition of a matchup is simulated on fresh Pokémon and aggregated in the report.
+        """
+        report = simulate.run_simulation([('pikachu', 'bulbasaur')], repetitions=5, take_notes=False)
+
+        self.assertEqual(report.battles, 5)
+        self.assertEqual(sum(report.wins.values()) + report.draws, 5)
+        self.assertGreaterEqual(report.turns, 5)
+        self.assertGreater(report.battles_per_s, 0)
+        self.assertEqual(set(report.phase_timings), {'load', 'resolve', 'battle'})
+        mock_fetch_pokemons_data.assert_called_once_with('pikachu', 'bulbasaur')
+
+    def test_stalled_battles_end_in_a_draw(self):
+        """
+        Test that a battle without any HP lost ends as a stalled draw and a long battle runs out of turns.
+        """
+        growler = dict(PIKACHU, moves=('growl',))
+
+        stalled = battle(Pokemon(**growler), Pokemon(**dict(BULBASAUR, moves=('growl',))),
+                         verbose=False, take_notes=False, max_turns=100, stall_turns=5)
+        out_of_turns = battle(Pokemon(**growler), Pokemon(**BULBASAUR), verbose=False,
+                              take_notes=False, max_turns=3, stall_turns=5)
+
+        self.assertEqual((stalled.winner, stalled.turns, stalled.end_reason), (None, 5, STALLED))
+        self.assertEqual((out_of_turns.winner, out_of_turns.turns, out_of_turns.end_reason),
+                         (None, 3, MAX_TURNS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import patch
+
+import battle_stat
+from battle_stat import DBCache, db_session, notes_writer
+from battle_stat.battle_notes import PokemonNote, init_db_cache
+from battle_stat.database import init_schema
+from battle_stat.repository.agg_matchup_repository import get_matchup, get_leaderboard
+from fetch_poke_data import CACHE_MOVES
+from model.affecting_move import AffectingMove
+from model.move import Move
+from sqlalchemy import inspect, text
+import simulate
+from test_simulate import PIKACHU, BULBASAUR
+
+
+class TestSQLiteBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(battle_stat.init_engine, battle_stat.engine.url)
+        battle_stat.init_engine('sqlite://')
+        init_schema()
+
+        CACHE_MOVES.update({'thunder-shock': (40, 0), 'tackle': (40, 0),
+                            'growl': {'attack': (None, -1)}})
+        self.addCleanup(CACHE_MOVES.clear)
+        patcher = patch.multiple(DBCache, DIM_MOVE_CACHE={}, DIM_POKEMON_CACHE={}, DIM_STATS_CACHE={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pragmas(self):
+        """
+        Test that SQLite connections enforce foreign keys.
+        """
+        self.assertEqual(db_session.execute(text('PRAGMA foreign_keys')).scalar(), 1)
+
+    def test_schema_upgrade(self):
+        """
+        Test that the columns and indexes added to fact_battle since it was created are added to an existing table.
+        """
+        db_session.execute(text('DROP TABLE fact_battle'))
+        db_session.execute(text(
+            'CREATE TABLE fact_battle (id INTEGER PRIMARY KEY, timestamp_ TIMESTAMP, pokemon_id_1 INT,'
+            ' pokemon_id_2 INT, attack_pokemon_id_1 INT, attack_pokemon_id_2 INT, battle_duration_s INT,'
+            ' winner_pokemon_id INT)'))
+        db_session.commit()
+
+        init_schema()
+
+        inspector = inspect(battle_stat.engine)
+        columns = {x['name'] for x in inspector.get_columns('fact_battle')}
+        self.assertTrue({'turns', 'seed', 'catalog_version', 'end_reason'} <= columns)
+        self.assertIn('ix_fact_battle_winner_pokemon_id', {x['name'] for x in inspector.get_indexes('fact_battle')})
+
+    @patch('simulate.fetch_pokemons_data', return_value=[PIKACHU, BULBASAUR])
+    def test_simulation_notes(self, mock_fetch_pokemons_data):
+        """
+        Test that the notes of simulated battles are written to SQLite by the background writer, end to end.
+        """
+        writer = notes_writer.NotesWriter().start()
+        self.addCleanup(writer.close)
+        init_db_cache()
+
+        with patch('battle_stat.notes_writer._notes_writer', writer):
+            report = simulate.run_simulation([('pikachu', 'bulbasaur')], repetitions=3)
+
+        self.assertEqual(writer.failed, 0)
+        battles = db_session.execute(text(
+            'SELECT count(*), count(winner_pokemon_id) FROM fact_battle')).one()
+        attacks = db_session.execute(text('SELECT count(*) FROM fact_attack')).scalar()
+        pokemons = db_session.execute(text('SELECT count(*) FROM dim_pokemon')).scalar()
+        self.assertEqual(battles, (writer.written, report.battles))
+        self.assertEqual(attacks, 2 * writer.written)
+        self.assertEqual(pokemons, 2)
+
+    @patch('simulate.fetch_pokemons_data', return_value=[PIKACHU, BULBASAUR])
+    def test_matchup_aggregates(self, mock_fetch_pokemons_data):
+        """
+        Test that the matchup totals are updated incrementally by every batch of notes.
+        """
+        writer = notes_writer.NotesWriter(batch_size=1).start()
+        self.addCleanup(writer.close)
+        init_db_cache()
+
+        with patch('battle_stat.notes_writer._notes_writer', writer):
+            report = simulate.run_simulation([('pikachu', 'bulbasaur')], repetitions=4)
+
+        matchup = get_matchup('pikachu', 'bulbasaur')
+        reverse = get_matchup('bulbasaur', 'pikachu')
+        self.assertEqual((matchup.battles, reverse.battles), (4, 4))
+        self.assertEqual((matchup.wins, reverse.wins), (report.wins['pikachu'], report.wins['bulbasaur']))
+        self.assertEqual(matchup.total_turns, report.turns)
+        leaderboard = get_leaderboard()
+        self.assertEqual({x[0] for x in leaderboard}, {'pikachu', 'bulbasaur'})
+        self.assertGreaterEqual(leaderboard[0][3], leaderboard[1][3])
+
+    def test_error_draw_notes(self):
+        """
+        Test that a battle ended by errors, a Pokémon without any attack, is written with the other notes of its batch.
+        """
+        writer = notes_writer.NotesWriter(batch_size=10, flush_interval_s=60).start()
+        self.addCleanup(writer.close)
+        init_db_cache()
+        move = Move('tackle', 40, 0)
+        pikachu = PokemonNote(poke_id=25, name='pikachu', speed=90, hp=35,
+                              current_attack=AffectingMove('attack', 55, 0, move))
+        bulbasaur = PokemonNote(poke_id=1, name='bulbasaur', speed=45, hp=45,
+                                current_attack=AffectingMove('defense', 49, 0, move))
+
+        for _ in range(3):
+            writer.submit(pikachu, bulbasaur, 1.5, 3, 42, 'v1', 'knockout')
+        writer.submit(pikachu, bulbasaur._replace(current_attack=None), 0.5, 4, 43, 'v1', 'errors')
+        writer.flush()
+
+        self.assertEqual((writer.written, writer.failed), (4, 0))
+        battles = db_session.execute(text(
+            'SELECT end_reason, attack_pokemon_id_1 IS NULL, attack_pokemon_id_2 IS NULL'
+            ' FROM fact_battle ORDER BY id')).all()
+        self.assertEqual([tuple(x) for x in battles], [('knockout', 0, 0)] * 3 + [('errors', 0, 1)])
+        self.assertEqual(db_session.execute(text('SELECT count(*) FROM fact_attack')).scalar(), 7)
+        self.assertEqual(get_matchup('pikachu', 'bulbasaur').battles, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
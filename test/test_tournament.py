@@ -0,0 +1,51 @@
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+import tournament
+from fetch_poke_data import CACHE_MOVES
+from test_simulate import PIKACHU, BULBASAUR
+
+
+class TestTournament(unittest.TestCase):
+
+    def setUp(self):
+        CACHE_MOVES.update({'thunder-shock': (40, 0), 'tackle': (40, 0),
+                            'growl': {'attack': (None, -1)}})
+        self.addCleanup(CACHE_MOVES.clear)
+
+    def test_standings(self):
+        """
+        Test that the standings count wins, losses and draws of both sides of every matchup.
+        """
+        report = tournament.TournamentReport()
+        report.add(('a', 'b'), Counter({1: 3, 2: 1, 'draw': 1}), turns=10)
+        report.add(('b', 'c'), Counter({1: 2}), turns=4)
+
+        self.assertEqual(report.battles, 7)
+        self.assertEqual(report.standings(), [('a', 3, 1, 1), ('b', 3, 3, 1), ('c', 0, 2, 0)])
+
+    def test_mirror_standings(self):
+        """
+        Test that the battles of a Pokémon against itself are counted once.
+        """
+        report = tournament.TournamentReport()
+        report.add(('a', 'a'), Counter({1: 2, 2: 1, 'draw': 1}), turns=10)
+
+        self.assertEqual(report.standings(), [('a', 2, 1, 1)])
+
+    @patch('tournament.fetch_pokemons_data', return_value=[PIKACHU, BULBASAUR])
+    def test_run_tournament(self, mock_fetch_pokemons_data):
+        """
+        Test that the battles of a matchup are split across the workers and aggregated in the parent.
+        """
+        report = tournament.run_tournament(['pikachu', 'bulbasaur'], repetitions=30,
+                                           workers=2, chunk_size=7)
+
+        self.assertEqual(report.battles, 30)
+        self.assertEqual(list(report.results), [('pikachu', 'bulbasaur')])
+        mock_fetch_pokemons_data.assert_called_once_with('pikachu', 'bulbasaur')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from fetch_poke_data import CACHE_MOVES, fetch_pokemons_data, \
+    resolve_move_pool
+from main import battle
+from model.move import build_move_registry
+from model.pokemon import Pokemon
+from simulate import parse_matchups
+
+# Pokémon data and move catalog of the running tournament, set once per worker process
+_SNAPSHOT = None
+
+
+class TournamentReport:
+    """
+        Aggregated results of a tournament.
+
+        Attributes:
+            results (defaultdict): `{(pokemon1, pokemon2): Counter({1: wins, 2: wins, 'draw': draws})}`, the wins counted
+                                   by side.
+            turns (int): Total number of turns over all the battles.
+            duration_s (float): Wall time of the battles in seconds.
+
+        Methods:
+            add: Adds the results of a chunk of battles.
+            standings: Wins, losses and draws per Pokémon, best win rate first.
+            summary: Formats the report for printing.
+        """
+    def __init__(self):
+        self.results = defaultdict(Counter)
+        self.turns = 0
+        self.duration_s = 0.0
+
+    def add(self, pair: tuple, outcomes: Counter, turns: int):
+        self.results[pair].update(outcomes)
+        self.turns += turns
+
+    @property
+    def battles(self) -> int:
+        return sum(sum(x.values()) for x in self.results.values())
+
+    def standings(self) -> list:
+        """
+            Computes wins, losses and draws per Pokémon over all of its matchups.
+
+            Returns:
+                list: `(name, wins, losses, draws)` tuples ordered by win rate.
+            """
+        table = defaultdict(Counter)
+        for (pokemon1, pokemon2), outcomes in self.results.items():
+            # A mirror matchup is counted once, from the first side
+            sides = ((pokemon1, 1, 2), (pokemon2, 2, 1))[:1 if pokemon1 == pokemon2 else 2]
+            for name, side, opponent_side in sides:
+                table[name]['wins'] += outcomes[side]
+                table[name]['losses'] += outcomes[opponent_side]
+                table[name]['draws'] += outcomes['draw']
+
+        standings = [(name, x['wins'], x['losses'], x['draws'])
+                     for name, x in table.items()]
+        return sorted(standings,
+                      key=lambda x: x[1] / max(sum(x[1:]), 1), reverse=True)
+
+    def summary(self) -> str:
+        battles_per_s = self.battles / self.duration_s if self.duration_s else 0.0
+        lines = [f'Battles: {self.battles}, turns: {self.turns} '
+                 f'({battles_per_s:.1f} battles/s)']
+        lines += [f'  {name:<20}{wins:>8} W{losses:>8} L{draws:>8} D'
+                  for name, wins, losses, draws in self.standings()]
+        return '\n'.join(lines)
+
+
+def build_snapshot(names: list) -> dict:
+    """
+        Loads the Pokémon and resolves their moves once in the parent process.
+
+        Args:
+            names (list): Names or ids of the Pokémon taking part in the tournament.
+
+        Returns:
+            dict: `{'pokemons': {requested name: constructor arguments}, 'moves': {move name: CACHE_MOVES entry}}`.
+        """
+    names = list(dict.fromkeys(names))
+    pokemons_data = resolve_move_pool(*fetch_pokemons_data(*names))
+    moves = {x for pokemon_data in pokemons_data for x in pokemon_data['moves']}
+    return {'pokemons': dict(zip(names, pokemons_data)),
+            'moves': {x: CACHE_MOVES[x] for x in moves}}
+
+
+def _init_worker(snapshot: dict = None):
+    """
+        Installs the tournament snapshot in a worker process. Forked workers inherit `_SNAPSHOT` and the interned moves
+        from the parent and get no argument, spawned workers receive the snapshot pickled once and intern its moves.
+        """
+    global _SNAPSHOT
+    if snapshot is not None:
+        _SNAPSHOT = snapshot
+        build_move_registry(snapshot['moves'])
+    CACHE_MOVES.update(_SNAPSHOT['moves'])
+
+
+def _run_matchups(task: tuple) -> tuple:
+    """
+        Simulates a chunk of battles of one matchup in a worker process.
+
+        Args:
+            task (tuple): `(pokemon1, pokemon2, repetitions)`, the Pokémon given by their name in the snapshot.
+
+        Returns:
+            tuple: `((pokemon1, pokemon2), Counter of outcomes, turns)`, the wins counted by side: 1, 2 or 'draw'.
+        """
+    pokemon1_name, pokemon2_name, repetitions = task
+    pokemon1_data = _SNAPSHOT['pokemons'][pokemon1_name]
+    pokemon2_data = _SNAPSHOT['pokemons'][pokemon2_name]
+
+    outcomes = Counter()
+    turns = 0
+    for _ in range(repetitions):
+        pokemon1 = Pokemon(**pokemon1_data)
+        pokemon2 = Pokemon(**pokemon2_data)
+        result = battle(pokemon1, pokemon2, verbose=False, take_notes=False)
+        turns += result.turns
+        if result.winner is None:
+            outcomes['draw'] += 1
+        elif result.winner is pokemon1:
+            outcomes[1] += 1
+        else:
+            outcomes[2] += 1
+
+    return (pokemon1_name, pokemon2_name), outcomes, turns
+
+
+def _split(pairs: list, repetitions: int, chunk_size: int):
+    for pokemon1, pokemon2 in pairs:
+        for start in range(0, repetitions, chunk_size):
+            yield pokemon1, pokemon2, min(chunk_size, repetitions - start)
+
+
+def run_tournament(names: list, repetitions: int, pairs: list = None,
+                   workers: int = None, chunk_size: int = 50) -> TournamentReport:
+    """
+        Runs a round-robin tournament, or the given matchups only, across a pool of worker processes.
+
+        The Pokémon data and the resolved move catalog are shipped to each worker once: inherited on fork where the
+        platform supports it, pickled once per worker otherwise. Tasks only carry the names of the Pokémon.
+
+        Args:
+            names (list): Names or ids of the Pokémon, every pair of them battles unless `pairs` is given.
+            repetitions (int): How many battles to simulate per matchup.
+            pairs (list, optional): The matchups as `(pokemon1, pokemon2)` tuples, instead of the full round-robin.
+            workers (int, optional): Number of worker processes, defaults to the number of CPUs.
+            chunk_size (int, optional): Number of battles of one matchup simulated per task. Defaults to 50.
+
+        Returns:
+            TournamentReport: The aggregated results.
+        """
+    global _SNAPSHOT
+    pairs = pairs or list(itertools.combinations(dict.fromkeys(names), 2))
+    snapshot = build_snapshot([x for pair in pairs for x in pair])
+    build_move_registry(snapshot['moves'])
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        _SNAPSHOT = snapshot
+        context, initargs = multiprocessing.get_context('fork'), ()
+    else:
+        context, initargs = multiprocessing.get_context('spawn'), (snapshot,)
+
+    report = TournamentReport()
+    t1 = perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             mp_context=context, initializer=_init_worker,
+                             initargs=initargs) as executor:
+        for pair, outcomes, turns in executor.map(
+                _run_matchups, _split(pairs, repetitions, chunk_size)):
+            report.add(pair, outcomes, turns)
+    report.duration_s = perf_counter() - t1
+    return report
+
+
+def main(argv=None) -> int:
+    """
+        Entry point of the `tournament` command.
+
+        Args:
+            argv (list, optional): The command line arguments, defaults to `sys.argv[1:]`.
+
+        Returns:
+            int: The exit code.
+        """
+    parser = argparse.ArgumentParser(
+        prog='tournament',
+        description='Runs a round-robin Pokémon tournament on all CPU cores.')
+    parser.add_argument('pokemons', nargs='*', metavar='POKEMON',
+                        help='a Pokémon taking part in the round-robin')
+    parser.add_argument('-f', '--file', type=argparse.FileType('r'),
+                        help='file with the matchups to run instead of the round-robin, one per line')
+    parser.add_argument('-n', '--repetitions', type=int, default=100,
+                        help='battles per matchup (default: 100)')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=50,
+                        help='battles of one matchup per task (default: 50)')
+    args = parser.parse_args(argv)
+
+    pairs = parse_matchups([], args.file) if args.file else None
+    if not pairs and len(args.pokemons) < 2:
+        parser.error('give at least two Pokémon or a matchups file')
+
+    report = run_tournament(args.pokemons, args.repetitions, pairs=pairs,
+                            workers=args.workers, chunk_size=args.chunk_size)
+    print(report.summary())
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())